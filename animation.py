@@ -0,0 +1,358 @@
+import math
+import time
+from array import array
+from itertools import count
+
+import labels
+import layout
+from parsing import ParseError
+from scene import Scene
+from tree import NIL, TreeStore, avl_insert, build_avl_tree_store, build_heap, heap_push
+
+ANIMATED_TYPES = ("heap", "avl_tree")
+# Builds with more events than this keep every k-th state only, so recording time and
+# memory stay bounded for trees with thousands of nodes.
+MAX_KEYFRAMES = 300
+# Parent slot of an entity that is not in the tree yet.
+ABSENT = -2
+
+# Duration of one step, the frame period, and how much of a frame may go to moving items.
+STEP_MS = 450
+FRAME_MS = 16
+FRAME_BUDGET = 0.010
+# Items moved between clock reads.
+CLOCK_EVERY = 32
+CULL_MARGIN = 80
+MIN_FONT_SIZE = 4
+
+COLORS = {"heap": ("#fed7aa", "#f97316"), "avl_tree": ("#d1fae5", "#10b981")}
+TITLES = {"heap": "Type: Heap (building a min-heap)", "avl_tree": "Type: AVL Tree (insertions)"}
+
+
+class Keyframe:
+    __slots__ = ("caption", "xs", "ys", "parents")
+
+    def __init__(self, caption, xs, ys, parents):
+        self.caption = caption
+        self.xs = xs
+        self.ys = ys
+        self.parents = parents
+
+
+class _Snapshots:
+    # Event callback for the builders: keeps every stride-th state, and always the last.
+    def __init__(self, total, snapshot, caption, job):
+        self.total = total
+        self.stride = max(1, math.ceil(total / MAX_KEYFRAMES))
+        self.snapshot = snapshot
+        self.caption = caption
+        self.job = job
+        self.seen = 0
+        self.keyframes = []
+
+    def __call__(self, kind, *slots):
+        self.seen += 1
+        if self.seen % self.stride and self.seen != self.total:
+            return
+        if self.job is not None:
+            self.job.progress(f"Recording animation… {self.seen:,}/{self.total:,} steps")
+        caption = self.caption(kind, *slots)
+        if self.stride > 1:
+            caption = f"{caption} (event {self.seen:,} of {self.total:,})"
+        xs, ys, parents = self.snapshot()
+        self.keyframes.append(Keyframe(caption, xs, ys, parents))
+
+
+def _integers(value, value_type):
+    try:
+        return [int(v) for v in value if not layout.is_none(v)]
+    except (TypeError, ValueError):
+        raise ParseError(f"{'AVL Tree' if value_type == 'avl_tree' else 'Heap'} must contain only integers.")
+
+
+def _frame_arrays(n):
+    return array("f", bytes(4 * n)), array("f", bytes(4 * n)), array("i", [ABSENT]) * n
+
+
+def _record_avl(keys, width, job):
+    events = count()
+    build_avl_tree_store(keys, lambda *event: next(events))
+    total = next(events)
+    store = TreeStore()
+
+    def snapshot():
+        xs, ys, parents = _frame_arrays(len(keys))
+        tree_xs, tree_ys = layout.tree_positions(store.left, store.right, store.root, width)
+        for node, parent, depth in store.preorder():
+            xs[node] = tree_xs[node]
+            ys[node] = tree_ys[node]
+            parents[node] = parent
+        return xs, ys, parents
+
+    def caption(kind, a, b=NIL):
+        if kind == "insert":
+            return f"insert {store.val(a)}"
+        # a was the top of the rotated subtree and b replaced it.
+        direction = "right" if store.right[b] == a else "left"
+        return f"rotate {direction} at {store.val(a)}"
+
+    snapshots = _Snapshots(total, snapshot, caption, job)
+    # Slots are handed out in insertion order, so slot i holds keys[i].
+    for key in keys:
+        avl_insert(store, key, snapshots)
+    return snapshots.keyframes
+
+
+def _record_heap(keys, width, job):
+    events = count()
+    build_heap(keys, lambda *event: next(events))
+    total = next(events)
+    heap = []
+
+    def snapshot():
+        xs, ys, parents = _frame_arrays(len(keys))
+        m = len(heap)
+        # Heap slot i has its children at 2i + 1 and 2i + 2.
+        left = array("i", [2 * i + 1 if 2 * i + 1 < m else NIL for i in range(m)])
+        right = array("i", [2 * i + 2 if 2 * i + 2 < m else NIL for i in range(m)])
+        slot_xs, slot_ys = layout.tree_positions(left, right, 0, width)
+        for i, item in enumerate(heap):
+            xs[item] = slot_xs[i]
+            ys[item] = slot_ys[i]
+            parents[item] = heap[(i - 1) // 2] if i else NIL
+        return xs, ys, parents
+
+    def caption(kind, a, b=NIL):
+        if kind == "insert":
+            return f"insert {keys[a]}"
+        return f"sift up: {keys[a]} above {keys[b]}"
+
+    snapshots = _Snapshots(total, snapshot, caption, job)
+    # Entities are input positions; a swap moves two of them, not the slots.
+    for item in range(len(keys)):
+        heap_push(heap, keys, item, snapshots)
+    return snapshots.keyframes
+
+
+def record(value, value_type, width, height, job=None):
+    if value_type not in ANIMATED_TYPES:
+        raise ParseError(f"Animation is available for {' and '.join(ANIMATED_TYPES)}.")
+    keys = _integers(value, value_type)
+    if not keys:
+        raise ParseError("Nothing to animate: enter at least one value.")
+    recorder = _record_avl if value_type == "avl_tree" else _record_heap
+    names = [labels.fit(str(key), layout.LABEL_FONT, layout.NODE_LABEL_WIDTH) for key in keys]
+    return Animation(value_type, names, recorder(keys, width, job), width, height)
+
+
+class Animation:
+    def __init__(self, value_type, labels, keyframes, width, height):
+        self.value_type = value_type
+        self.labels = labels
+        self.keyframes = keyframes
+        self.width = width
+        self.height = height
+
+    def __len__(self):
+        return len(self.keyframes)
+
+    def scene(self, index):
+        # A keyframe as an ordinary scene, keyed like the static tree layouts.
+        frame = self.keyframes[index]
+        scene = Scene(self.width, self.height)
+        layout.add_title(scene, TITLES[self.value_type])
+        order = [(node, parent) for node, parent in enumerate(frame.parents) if parent != ABSENT]
+        labels = self.labels
+        layout.add_node_tree(scene, order, frame.xs, frame.ys, labels.__getitem__, *COLORS[self.value_type])
+        return scene
+
+
+class Animator:
+    # Plays an Animation by moving existing canvas items with coords(); items are only made
+    # for nodes near the view, and each frame stops moving them once its time budget is spent.
+    def __init__(self, canvas, viewport, animation, on_change):
+        self.canvas = canvas
+        self.viewport = viewport
+        self.animation = animation
+        # Called as on_change(index, playing) whenever a step starts or playback halts.
+        self.on_change = on_change
+        self.index = 0
+        self.playing = False
+        self._single = False
+        self._after = None
+        self._start = 0.0
+        # entity -> [oval, text or None, line or None]
+        self._items = {}
+        self._visible = []
+        self._cursor = 0
+        self._view = None
+
+    def play(self):
+        if self.index >= len(self.animation) - 1:
+            self.index = 0
+        self._single = False
+        self._run()
+
+    def step(self):
+        if self.index < len(self.animation) - 1:
+            self._single = True
+            self._run()
+
+    def pause(self):
+        if self.playing:
+            self._halt()
+
+    def seek(self, index):
+        self.stop()
+        self.index = max(0, min(len(self.animation) - 1, index))
+        self.on_change(self.index, False)
+
+    def stop(self):
+        # Drops the animation items without reporting back.
+        if self._after is not None:
+            self.canvas.after_cancel(self._after)
+            self._after = None
+        self.playing = False
+        self.canvas.delete("anim")
+        self._items = {}
+        self._view = None
+
+    def _halt(self):
+        self.stop()
+        self.on_change(self.index, False)
+
+    def _run(self):
+        self._begin()
+        if self._after is None:
+            self._after = self.canvas.after(1, self._frame)
+
+    def _begin(self):
+        self.playing = True
+        self.on_change(self.index, True)
+        self._start = time.perf_counter()
+        self._sync_items()
+
+    def _frames(self):
+        keyframes = self.animation.keyframes
+        return keyframes[self.index], keyframes[min(self.index + 1, len(keyframes) - 1)]
+
+    def _sync_items(self):
+        # Make items for the nodes this step shows near the view and drop the rest.
+        view = self.viewport
+        state = (view.zoom, view.x, view.y)
+        if state != self._view:
+            # Sizes depend on the zoom, so a new view starts from fresh items.
+            self.canvas.delete("anim")
+            self._items = {}
+            self._view = state
+        a, b = self._frames()
+        x0, y0, x1, y1 = view.visible_rect(CULL_MARGIN)
+        xa, ya, pa = a.xs, a.ys, a.parents
+        xb, yb, pb = b.xs, b.ys, b.parents
+        visible = []
+        for e in range(len(pb)):
+            parent = pb[e]
+            if parent == ABSENT:
+                continue
+            if x0 <= xb[e] <= x1 and y0 <= yb[e] <= y1:
+                visible.append(e)
+            elif pa[e] != ABSENT and x0 <= xa[e] <= x1 and y0 <= ya[e] <= y1:
+                visible.append(e)
+            elif parent != NIL and x0 <= xb[parent] <= x1 and y0 <= yb[parent] <= y1:
+                # Off-screen child of an on-screen node: its edge still shows.
+                visible.append(e)
+
+        canvas = self.canvas
+        items = self._items
+        keep = set(visible)
+        for e in [e for e in items if e not in keep]:
+            canvas.delete(*(item for item in items.pop(e) if item is not None))
+        fill, outline = COLORS[self.animation.value_type]
+        zoom = view.zoom
+        font_size = round(layout.LABEL_FONT[1] * zoom)
+        font = (layout.LABEL_FONT[0], font_size) if font_size >= MIN_FONT_SIZE else None
+        created = False
+        for e in visible:
+            entry = items.get(e)
+            if entry is None:
+                oval = canvas.create_oval(0, 0, 0, 0, fill=fill, outline=outline, width=2, tags=("anim", "anim-node"))
+                text = None
+                if font is not None:
+                    text = canvas.create_text(0, 0, text=self.animation.labels[e], font=font, tags=("anim", "anim-text"))
+                items[e] = entry = [oval, text, None]
+                created = True
+            # Rotations can turn a child into the root and back, so edges come and go.
+            if pb[e] == NIL and entry[2] is not None:
+                canvas.delete(entry[2])
+                entry[2] = None
+            elif pb[e] != NIL and entry[2] is None:
+                entry[2] = canvas.create_line(0, 0, 0, 0, fill=outline, width=2, tags=("anim", "anim-line"))
+                created = True
+        if created:
+            canvas.tag_lower("anim-line")
+            canvas.tag_raise("anim-text")
+        self._visible = visible
+        self._cursor = 0
+        self._move(0.0, None)
+
+    def _frame(self):
+        self._after = None
+        frame_start = time.perf_counter()
+        view = self.viewport
+        if (view.zoom, view.x, view.y) != self._view:
+            self._sync_items()
+        t = min(1.0, (frame_start - self._start) * 1000 / STEP_MS)
+        self._move(t * t * (3 - 2 * t), frame_start + FRAME_BUDGET)
+        if t >= 1.0:
+            self.index += 1
+            if self._single or self.index >= len(self.animation) - 1:
+                self._halt()
+                return
+            self._begin()
+        elapsed_ms = (time.perf_counter() - frame_start) * 1000
+        self._after = self.canvas.after(max(1, int(FRAME_MS - elapsed_ms)), self._frame)
+
+    def _move(self, t, deadline):
+        # Place visible items at fraction t of the step. With a deadline, stop when it
+        # passes and carry on from the same node next frame, so big views lag instead of stutter.
+        visible = self._visible
+        n = len(visible)
+        if not n:
+            return
+        canvas = self.canvas
+        view = self.viewport
+        zoom, ox, oy = view.zoom, view.x, view.y
+        radius = layout.NODE_RADIUS * zoom
+        a, b = self._frames()
+        xa, ya, pa = a.xs, a.ys, a.parents
+        xb, yb, pb = b.xs, b.ys, b.parents
+        items = self._items
+        s = 1.0 - t
+
+        i = self._cursor
+        moved = 0
+        while moved < n:
+            e = visible[i]
+            if pa[e] == ABSENT:
+                x, y = xb[e], yb[e]
+            else:
+                x, y = xa[e] * s + xb[e] * t, ya[e] * s + yb[e] * t
+            sx, sy = (x - ox) * zoom, (y - oy) * zoom
+            oval, text, line = items[e]
+            canvas.coords(oval, sx - radius, sy - radius, sx + radius, sy + radius)
+            if text is not None:
+                canvas.coords(text, sx, sy)
+            if line is not None:
+                parent = pb[e]
+                if pa[parent] == ABSENT:
+                    px, py = xb[parent], yb[parent]
+                else:
+                    px, py = xa[parent] * s + xb[parent] * t, ya[parent] * s + yb[parent] * t
+                canvas.coords(line, (px - ox) * zoom, (py - oy) * zoom + radius, sx, sy - radius)
+            moved += 1
+            i += 1
+            if i == n:
+                i = 0
+            if deadline is not None and moved % CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+                break
+        self._cursor = i
@@ -0,0 +1,218 @@
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tkinter as tk
+import tracemalloc
+
+import instrument
+import layout
+import registry
+from render import CanvasRenderer
+
+# Scalars have no meaningful size; they are measured once at the smallest size.
+SCALAR_TYPES = ("int", "float", "str", "bool")
+SIZES = (10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6)
+PHASES = ("parse", "build", "layout", "draw")
+# A phase must be this much slower than the baseline, and by at least NOISE_FLOOR seconds,
+# before it counts as a regression.
+TOLERANCE = 0.25
+NOISE_FLOOR = 0.002
+
+
+def _numbers(n, rng):
+    return ", ".join(str(rng.randrange(10 * n)) for _ in range(n))
+
+
+def generate(value_type, n, seed=0):
+    # Raw text for the Value box, shaped like what a user would type for this type.
+    rng = random.Random(seed)
+    if value_type == "int":
+        return str(rng.randrange(10 ** 9))
+    if value_type == "float":
+        return repr(rng.random() * 1000)
+    if value_type == "str":
+        return "".join(rng.choice("abcdefghij") for _ in range(n))
+    if value_type == "bool":
+        return "true"
+    if value_type == "range":
+        return f"0, {n}"
+    if value_type == "dict":
+        return ", ".join(f"k{i}: {rng.randrange(n)}" for i in range(n))
+    if value_type == "binarytree":
+        return ", ".join("None" if i and rng.random() < 0.1 else str(rng.randrange(10 * n)) for i in range(n))
+    if value_type == "2dlist":
+        side = max(1, math.isqrt(n))
+        return repr([[rng.randrange(100) for _ in range(side)] for _ in range(side)])
+    if value_type == "directed_graph":
+        nodes = max(2, n // 3)
+        return repr([(f"n{rng.randrange(nodes)}", f"n{rng.randrange(nodes)}") for _ in range(n)])
+    return _numbers(n, rng)
+
+
+class NullCanvas:
+    # Stands in for tk.Canvas without a display: accepts every call, draws nothing,
+    # so the draw phase measures the renderer's own work.
+    def __init__(self):
+        self.next_id = 0
+
+    def _create(self, *args, **options):
+        self.next_id += 1
+        return self.next_id
+
+    create_rectangle = create_oval = create_line = create_text = create_image = _create
+
+    def _ignore(self, *args, **options):
+        pass
+
+    coords = itemconfigure = delete = tag_lower = tag_raise = _ignore
+
+    def after_idle(self, fn):
+        fn()
+
+
+class NullRenderer(CanvasRenderer):
+    def make_photo(self, ppm):
+        return ppm
+
+
+def make_renderer(kind, width, height):
+    if kind in ("auto", "tk"):
+        try:
+            root = tk.Tk()
+            root.withdraw()
+            canvas = tk.Canvas(root, width=width, height=height)
+            return CanvasRenderer(canvas, width, height), "tk"
+        except tk.TclError:
+            # No display to open a window on.
+            if kind == "tk":
+                raise
+    return NullRenderer(NullCanvas(), width, height), "null"
+
+
+def run_case(value_type, n, renderer, width, height, measure_memory):
+    raw = generate(value_type, n)
+    result = {"type": value_type, "size": n, "input_bytes": len(raw)}
+    peaks = {}
+
+    def phase(name, fn, *args):
+        gc.collect()
+        if measure_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        value = fn(*args)
+        result[f"{name}_s"] = time.perf_counter() - start
+        if measure_memory:
+            peaks[name] = tracemalloc.get_traced_memory()[1] - base
+        return value
+
+    value = phase("parse", registry.parse, raw, value_type)
+    # layout.layout runs the type's builder under its own build phase, which is split out
+    # of the layout time so each is counted once. Peak memory for layout includes the build.
+    metrics = instrument.Metrics(value_type)
+    with metrics.active():
+        scene = phase("layout", layout.layout, value, value_type, width, height)
+    result["build_s"] = metrics.phases.get("build")
+    if result["build_s"] is not None:
+        result["layout_s"] -= result["build_s"]
+    if "nodes" in scene.stats:
+        result["nodes"] = scene.stats["nodes"]
+    renderer.clear()
+    renderer.viewport.reset()
+    phase("draw", renderer.draw, scene)
+
+    result["scene_items"] = scene.counts()
+    result["canvas_items"] = len(renderer.items)
+    if measure_memory:
+        result["peak_bytes"] = peaks
+    return result
+
+
+def compare(results, baseline):
+    # Rows whose phase time grew beyond the tolerance relative to the baseline.
+    previous = {(r["type"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get((r["type"], r["size"]))
+        if old is None:
+            continue
+        for name in PHASES:
+            now, before = r.get(f"{name}_s"), old.get(f"{name}_s")
+            if now is None or before is None:
+                continue
+            if now > before * (1 + TOLERANCE) and now - before > NOISE_FLOOR:
+                regressions.append((r["type"], r["size"], name, before, now))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parse, build, layout and draw for every supported type.")
+    types = registry.names()
+    parser.add_argument("--types", nargs="+", default=types, choices=types)
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per case; the fastest is kept")
+    parser.add_argument("--budget", type=float, default=30.0, help="skip larger sizes of a type once one case takes this many seconds")
+    parser.add_argument("--canvas", default="auto", choices=("auto", "tk", "null"), help="draw onto a real Tk canvas or a null one")
+    parser.add_argument("--memory-max-size", type=int, default=10 ** 5,
+                        help="largest size that also gets a tracemalloc pass (0 disables it); tracing 10⁶ items takes minutes")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--width", type=int, default=1440)
+    parser.add_argument("--height", type=int, default=640)
+    args = parser.parse_args(argv)
+
+    renderer, canvas_kind = make_renderer(args.canvas, args.width, args.height)
+    results = []
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "canvas": canvas_kind,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    for value_type in args.types:
+        sizes = sorted(args.sizes)[:1] if value_type in SCALAR_TYPES else sorted(args.sizes)
+        for n in sizes:
+            runs = [run_case(value_type, n, renderer, args.width, args.height, False) for _ in range(max(1, args.repeat))]
+            best = runs[0]
+            for name in PHASES:
+                times = [r[f"{name}_s"] for r in runs]
+                best[f"{name}_s"] = None if times[0] is None else min(times)
+            if n <= args.memory_max_size:
+                # tracemalloc slows allocation a lot, so memory gets its own untimed pass.
+                tracemalloc.start()
+                best["peak_bytes"] = run_case(value_type, n, renderer, args.width, args.height, True)["peak_bytes"]
+                tracemalloc.stop()
+            results.append(best)
+            if args.out:
+                # Rewritten after every case so an interrupted run still leaves its numbers.
+                with open(args.out, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=1)
+
+            total = sum(best[f"{name}_s"] or 0 for name in PHASES)
+            phases = "  ".join(f"{name} {best[f'{name}_s'] * 1000:9.2f}ms" for name in PHASES if best[f"{name}_s"] is not None)
+            print(f"{value_type:>14} {n:>8}  {phases}  items {best['canvas_items']}", flush=True)
+            if total > args.budget:
+                print(f"{value_type:>14} skipping sizes above {n}: {total:.1f}s exceeds the {args.budget:g}s budget")
+                break
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        for value_type, n, name, before, now in regressions:
+            print(f"REGRESSION {value_type} n={n} {name}: {before * 1000:.2f}ms -> {now * 1000:.2f}ms ({now / before:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from itertools import islice
+
+# Default budget for everything the app memoises (parsed values and laid-out scenes).
+DEFAULT_MAX_BYTES = 256 << 20
+# Containers bigger than this are sized from a sample of their items.
+SIZE_SAMPLE = 1000
+
+
+def digest(*parts):
+    # Stable fingerprint of the raw input; holding the digest instead of the text keeps
+    # megabyte-sized inputs out of the keys.
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(str(part).encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def estimate_size(obj):
+    nbytes = getattr(obj, "nbytes", None)
+    if callable(nbytes):
+        return nbytes()
+    if isinstance(obj, (str, bytes, int, float, bool, range)) or obj is None:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        sample = list(islice(obj.items(), SIZE_SAMPLE))
+        per_item = sum(estimate_size(k) + estimate_size(v) for k, v in sample) / max(1, len(sample))
+        return sys.getsizeof(obj) + int(per_item * len(obj))
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        sample = list(islice(obj, SIZE_SAMPLE))
+        per_item = sum(estimate_size(item) for item in sample) / max(1, len(sample))
+        return sys.getsizeof(obj) + int(per_item * len(obj))
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # key -> (value, size); most recently used last.
+        self._entries = OrderedDict()
+        # Workers of superseded jobs may still be finishing, so every access is locked.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit.
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
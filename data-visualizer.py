@@ -1,9 +1,133 @@
+import argparse
+import json
+import os
 import tkinter as tk
+import tkinter.filedialog as filedialog
+import tkinter.font as tkfont
+import tkinter.messagebox as messagebox
 import tkinter.ttk as ttk
-import ast
-import math
 
-from tree import TreeNode, build_binary_tree, build_avl_tree
+import instrument
+import registry
+from cache import LRUCache, digest
+from jobs import JobRunner
+from parsing import ParseError
+from render import CanvasRenderer
+from scene import Scene
+
+# Features are imported through registry.resolve the first time they are used, so
+# start-up only pays for the window, the renderer and the type registry.
+
+
+def prepare_value(value, value_type, width, height, job=None, overlay="none"):
+    spec = registry.get(value_type)
+    if spec.renderer is not None:
+        return spec.handler("renderer")(value, value_type, width)
+    if job is not None:
+        job.progress("Laying out…")
+    return registry.resolve("layout:layout")(value, value_type, width, height, overlay)
+
+
+# Parsed values and laid-out scenes, so flipping the type or re-running the same input
+# skips the work. Values are keyed by input and parse kind, scenes also by type and canvas size.
+render_cache = LRUCache()
+_MISSING = object()
+
+
+def cached_parse(source, metrics, parse, *args):
+    key = ("value",) + source if source is not None else None
+    value = _MISSING if key is None else render_cache.get(key, _MISSING)
+    metrics.counts["value_cache"] = "miss" if value is _MISSING else "hit"
+    if value is _MISSING:
+        with instrument.phase("parse"):
+            value = parse(*args)
+        if key is not None:
+            render_cache.put(key, value)
+    return value
+
+
+def cached_layout(source, value, value_type, width, height, job, metrics, overlay):
+    spec = registry.get(value_type)
+    if source is None or spec.renderer is not None:
+        # Views like SequenceView lay out only the visible window, on demand.
+        return prepare_value(value, value_type, width, height, job, overlay)
+    key = ("scene",) + source + (value_type, width, height)
+    if spec.overlays:
+        key += (overlay,)
+    scene = render_cache.get(key)
+    metrics.counts["scene_cache"] = "miss" if scene is None else "hit"
+    if scene is None:
+        scene = prepare_value(value, value_type, width, height, job, overlay)
+        # Group items (large trees, object graphs) expand in place when clicked, so a cached
+        # copy would come back already expanded and outgrow the size it was stored at.
+        if not scene.groups:
+            render_cache.put(key, scene)
+    return scene
+
+
+def prepare(job, raw_value, type_hint, width, height, metrics, overlay="none"):
+    # Runs on a worker thread: no Tk calls allowed here.
+    source = ("text", digest(raw_value), registry.get(type_hint).parse_kind)
+    with metrics.active():
+        value = cached_parse(source, metrics, registry.parse, raw_value, type_hint)
+        job.check()
+        return cached_layout(source, value, type_hint, width, height, job, metrics, overlay)
+
+
+def prepare_diff(job, raw_before, raw_after, type_hint, width, height, metrics):
+    # Both inputs are parsed like the Value box; the scene is one structure coloured by change.
+    with metrics.active():
+        values = []
+        for raw in (raw_before, raw_after):
+            source = ("text", digest(raw), registry.get(type_hint).parse_kind)
+            values.append(cached_parse(source, metrics, registry.parse, raw, type_hint))
+            job.check()
+        return registry.resolve("diff:diff_scene")(*values, type_hint, width, height)
+
+
+def prepare_animation(job, raw_value, type_hint, width, height, metrics):
+    # Records the build on the worker; the Tk thread only plays the keyframes back.
+    source = ("text", digest(raw_value), registry.get(type_hint).parse_kind)
+    with metrics.active():
+        value = cached_parse(source, metrics, registry.parse, raw_value, type_hint)
+        job.check()
+        with instrument.phase("record"):
+            return registry.resolve("animation:record")(value, type_hint, width, height, job)
+
+
+def prepare_live(job, server, stream, width, height, metrics, overlay="none"):
+    # Copies the stream's newest state on the worker so the listener never waits on Tk.
+    with metrics.active():
+        value_type, value = server.take(stream)
+        job.check()
+        return prepare_value(value, value_type, width, height, overlay=overlay)
+
+
+def prepare_frame(job, recorded, index, width, height, metrics, overlay="none"):
+    # Rebuilds one recorded frame from its keyframe on the worker.
+    with metrics.active():
+        with instrument.phase("replay"):
+            value_type, value = recorded.frame(index)
+        job.check()
+        return prepare_value(value, value_type, width, height, job, overlay)
+
+
+def file_source(path, type_hint, fmt):
+    # A file is identified by where it is and when it last changed; stdin never repeats.
+    if path == "-":
+        return None
+    stat = os.stat(path)
+    return ("file", os.path.abspath(path), stat.st_mtime_ns, stat.st_size, fmt, type_hint)
+
+
+def prepare_file(job, path, type_hint, fmt, width, height, metrics, overlay="none"):
+    # Also on the worker thread: the file is streamed straight into the value.
+    source = file_source(path, type_hint, fmt)
+    with metrics.active():
+        value = cached_parse(source, metrics, registry.resolve("loader:load"), path, type_hint, fmt, job)
+        job.check()
+        return cached_layout(source, value, type_hint, width, height, job, metrics, overlay)
+
 
 class DataVisualizer:
     def __init__(self, root):
@@ -11,6 +135,55 @@ class DataVisualizer:
         self.root.title("Python Data Visualizer")
         self.root.configure(bg="#1e1e2f")
 
+        # Timings and item counts of the latest render, for the overlay and the exports.
+        self.metrics = None
+        self.pending_metrics = None
+        self.overlay_var = tk.BooleanVar(value=False)
+        self.profile_var = tk.BooleanVar(value=False)
+        menubar = tk.Menu(root)
+        diagnostics = tk.Menu(menubar, tearoff=0)
+        diagnostics.add_checkbutton(label="Show metrics overlay", variable=self.overlay_var, command=self._update_overlay)
+        diagnostics.add_checkbutton(label="Profile renders (cProfile)", variable=self.profile_var)
+        diagnostics.add_separator()
+        diagnostics.add_command(label="Export metrics as JSON…", command=self.export_metrics)
+        diagnostics.add_command(label="Save cProfile dump…", command=self.export_profile)
+        diagnostics.add_separator()
+        diagnostics.add_command(label="Clear cache", command=self.clear_cache)
+        menubar.add_cascade(label="Diagnostics", menu=diagnostics)
+        # Analyses drawn over directed graphs; picking one re-renders the current input.
+        self.graph_overlay_var = tk.StringVar(value="none")
+        self.rerun = None
+        analysis = tk.Menu(menubar, tearoff=0)
+        for overlay, text in zip(registry.GRAPH_OVERLAYS, (
+            "None", "Strongly connected components", "Topological order",
+            "Find a cycle", "Breadth-first search", "Depth-first search",
+        )):
+            analysis.add_radiobutton(label=text, value=overlay, variable=self.graph_overlay_var, command=self._overlay_changed)
+        menubar.add_cascade(label="Graph", menu=analysis)
+        # Structures pushed by other processes through feed.FeedClient.
+        self.feed = None
+        # None listens on the default port.
+        self.feed_address = None
+        self.feed_poll_id = None
+        self.feed_names = []
+        self.live_var = tk.BooleanVar(value=False)
+        self.follow_var = tk.StringVar(value="")
+        self.live_menu = tk.Menu(menubar, tearoff=0)
+        self.live_menu.add_checkbutton(label="Listen for live updates", variable=self.live_var, command=self._toggle_feed)
+        self.live_menu.add_separator()
+        self.live_menu.add_radiobutton(label="Follow the latest stream", value="", variable=self.follow_var)
+        menubar.add_cascade(label="Live", menu=self.live_menu)
+        # Recordings made with recording.Recorder, scrubbed with the timeline below the canvas.
+        self.recording = None
+        self.replay_want = None
+        self.replay_shown = None
+        self.replay_retry = None
+        replay = tk.Menu(menubar, tearoff=0)
+        replay.add_command(label="Open recording…", command=self.choose_recording)
+        replay.add_command(label="Close recording", command=self.close_recording)
+        menubar.add_cascade(label="Replay", menu=replay)
+        root.config(menu=menubar)
+
         # Input Frame
         self.input_frame = tk.Frame(root, bg="#2c2c3e", bd=0)
         self.input_frame.pack(pady=20, padx=20, fill="x")
@@ -21,25 +194,64 @@ class DataVisualizer:
         self._add_label_entry("Type:", 1)
         self.type_var = tk.StringVar(value="str")
 
-        allowed_types = [
-            "int", "float", "str", "list", "tuple", "set", "dict", "bool",
-            "linkedlist", "stack", "queue", "binarytree", "2dlist", "range",
-            "directed_graph", "heap", "avl_tree"
-            ]
-
+        # Built-in types are listed straight away; installed plugins are looked up the
+        # first time the list is opened, so start-up never scans the installed packages.
         self.type_combobox = ttk.Combobox(
             self.input_frame, textvariable=self.type_var,
-            values=allowed_types, state="readonly",
-            font=("Segoe UI", 10), width=15
+            values=registry.names(discover=False), state="readonly",
+            font=("Segoe UI", 10), width=15,
+            postcommand=lambda: self.type_combobox.config(values=registry.names())
         )
         self.type_combobox.grid(row=1, column=1, padx=10, pady=5, sticky="w")
 
+        # The earlier value of the same type, for Compare.
+        self._add_label_entry("Before (to compare):", 2)
+        self.before_entry = self._add_entry(2)
+
+        self.button_frame = tk.Frame(self.input_frame, bg="#2c2c3e")
+        self.button_frame.grid(row=3, columnspan=2, pady=14)
         self.submit_btn = tk.Button(
-            self.input_frame, text="Visualize", command=self.visualize,
+            self.button_frame, text="Visualize", command=self.visualize,
             bg="#3b82f6", fg="white", activebackground="#2563eb", activeforeground="white",
             font=("Segoe UI", 11, "bold"), relief="flat", bd=0, padx=10, pady=6, cursor="hand2"
         )
-        self.submit_btn.grid(row=2, columnspan=2, pady=14)
+        self.submit_btn.pack(side="left", padx=(0, 10))
+        self.load_btn = tk.Button(
+            self.button_frame, text="Load from file", command=self.choose_file,
+            bg="#4b5563", fg="white", activebackground="#374151", activeforeground="white",
+            font=("Segoe UI", 11, "bold"), relief="flat", bd=0, padx=10, pady=6, cursor="hand2"
+        )
+        self.load_btn.pack(side="left")
+        self.animate_btn = tk.Button(
+            self.button_frame, text="Animate build", command=self.animate,
+            bg="#10b981", fg="white", activebackground="#059669", activeforeground="white",
+            font=("Segoe UI", 11, "bold"), relief="flat", bd=0, padx=10, pady=6, cursor="hand2"
+        )
+        self.animate_btn.pack(side="left", padx=(10, 0))
+        self.compare_btn = tk.Button(
+            self.button_frame, text="Compare", command=self.compare,
+            bg="#f59e0b", fg="white", activebackground="#d97706", activeforeground="white",
+            font=("Segoe UI", 11, "bold"), relief="flat", bd=0, padx=10, pady=6, cursor="hand2"
+        )
+        self.compare_btn.pack(side="left", padx=(10, 0))
+
+        # Shown while a job is parsing or laying out in the background
+        self.status_frame = tk.Frame(self.input_frame, bg="#2c2c3e")
+        self.status_frame.grid(row=4, columnspan=2, pady=(0, 10))
+        self.progress = ttk.Progressbar(self.status_frame, mode="indeterminate", length=160)
+        self.progress.pack(side="left", padx=(0, 8))
+        self.status_label = tk.Label(
+            self.status_frame, text="", bg="#2c2c3e", fg="#f1f1f1", font=("Segoe UI", 10)
+        )
+        self.status_label.pack(side="left", padx=(0, 8))
+        self.cancel_btn = tk.Button(
+            self.status_frame, text="Cancel", command=self.cancel,
+            bg="#ef4444", fg="white", activebackground="#dc2626", activeforeground="white",
+            font=("Segoe UI", 10, "bold"), relief="flat", bd=0, padx=8, pady=3, cursor="hand2"
+        )
+        self.cancel_btn.pack(side="left")
+        self.status_frame.grid_remove()
+        self.jobs = JobRunner(root, self._on_result, self._on_error, self._set_busy)
 
         # Canvas
         self.canvas_frame = tk.Frame(root, bg="#1e1e2f")
@@ -55,6 +267,72 @@ class DataVisualizer:
             bg="#ffffff", bd=0, highlightthickness=0, relief="flat"
         )
         self.canvas.pack()
+        self.labels_warm = False
+        self.renderer = CanvasRenderer(self.canvas, self.canvas_width, self.canvas_height)
+        self.renderer.on_refresh = self._update_overlay
+        self.last_type = None
+
+        # Drag to pan, wheel to zoom, double-click to reset the view.
+        self.canvas.bind("<ButtonPress-1>", self._start_pan)
+        self.canvas.bind("<B1-Motion>", self._pan)
+        # A click that did not drag opens the summary box under it.
+        self.canvas.bind("<ButtonRelease-1>", self._click)
+        self.canvas.bind("<MouseWheel>", self._wheel_zoom)
+        self.canvas.bind("<Button-4>", lambda event: self.renderer.zoom_at(1.2, event.x, event.y))
+        self.canvas.bind("<Button-5>", lambda event: self.renderer.zoom_at(1 / 1.2, event.x, event.y))
+        self.canvas.bind("<Double-Button-1>", lambda event: self.renderer.reset_view())
+        # Hovering a heatmap shows the value of the cell under the cursor.
+        self.canvas.bind("<Motion>", self._hover)
+        self.canvas.bind("<Leave>", lambda event: self.canvas.delete("hover"))
+
+        # Scrollbar and jump-to-index control for long lists, tuples and ranges
+        self.sequence_view = None
+        self.seq_frame = tk.Frame(self.canvas_frame, bg="#1e1e2f")
+        self.seq_scroll = tk.Scrollbar(self.seq_frame, orient="horizontal", command=self._scroll_sequence)
+        self.seq_scroll.pack(side="left", fill="x", expand=True)
+        tk.Label(
+            self.seq_frame, text="Go to index:", bg="#1e1e2f", fg="#f1f1f1", font=("Segoe UI", 10)
+        ).pack(side="left", padx=(10, 4))
+        self.seq_index_entry = tk.Entry(
+            self.seq_frame, width=16, font=("Segoe UI", 10), relief="flat", bd=3
+        )
+        self.seq_index_entry.pack(side="left")
+        self.seq_index_entry.bind("<Return>", self._jump_to_index)
+
+        # Step-through controls for heap and AVL build animations
+        self.animator = None
+        self.anim_frame = tk.Frame(self.canvas_frame, bg="#1e1e2f")
+        for text, command in (
+            ("◀ Step", lambda: self.animator.seek(self.animator.index - 1)),
+            ("Play", self._toggle_animation),
+            ("Step ▶", lambda: self.animator.step()),
+            ("Done", lambda: self.animator.seek(len(self.animator.animation) - 1)),
+        ):
+            button = tk.Button(
+                self.anim_frame, text=text, command=command, width=7,
+                bg="#4b5563", fg="white", activebackground="#374151", activeforeground="white",
+                font=("Segoe UI", 10, "bold"), relief="flat", bd=0, pady=3, cursor="hand2"
+            )
+            button.pack(side="left", padx=(0, 6))
+            if text == "Play":
+                self.anim_play_btn = button
+        self.anim_label = tk.Label(
+            self.anim_frame, text="", bg="#1e1e2f", fg="#f1f1f1", font=("Segoe UI", 10), anchor="w"
+        )
+        self.anim_label.pack(side="left", fill="x", expand=True, padx=(6, 0))
+
+        # Timeline for replaying a recording
+        self.timeline_frame = tk.Frame(self.canvas_frame, bg="#1e1e2f")
+        self.timeline = tk.Scale(
+            self.timeline_frame, orient="horizontal", showvalue=False, from_=0, to=0,
+            command=self._seek_recording, bg="#1e1e2f", troughcolor="#4b5563",
+            highlightthickness=0, bd=0, sliderrelief="flat"
+        )
+        self.timeline.pack(side="left", fill="x", expand=True)
+        self.timeline_label = tk.Label(
+            self.timeline_frame, text="", bg="#1e1e2f", fg="#f1f1f1", font=("Segoe UI", 10), width=28, anchor="w"
+        )
+        self.timeline_label.pack(side="left", padx=(10, 0))
 
     def _add_label_entry(self, text, row):
         label = tk.Label(
@@ -71,450 +349,478 @@ class DataVisualizer:
         entry.grid(row=row, column=1, padx=10, pady=5, sticky="w")
         return entry
 
-    def visualize(self):
-        self.canvas.delete("all")
+    def _start_pan(self, event):
+        self.pan_origin = (event.x, event.y)
+        self.press_origin = (event.x, event.y)
 
-        raw_value = self.value_entry.get().strip()
-        type_hint = self.type_var.get().strip().lower()
+    def _click(self, event):
+        x, y = self.press_origin
+        if abs(event.x - x) <= 3 and abs(event.y - y) <= 3:
+            self.renderer.expand_at(event.x, event.y)
 
-        def_types = {
-            "int": int,
-            "float": float,
-            "str": str,
-            "list": list,
-            "tuple": tuple,
-            "set": set,
-            "dict": dict,
-            "bool": bool,
-            "range": range,
-        }
-        if type_hint in def_types:
-            converter = def_types[type_hint]
-        try:
-            if type_hint == "bool":
-                raw = raw_value.lower().strip()
-                if raw in ("", "false", "none"):
-                    value = False
-                else:
-                    try:
-                        numeric = float(raw)
-                        value = numeric != 0
-                    except ValueError:
-                        value = True
-            elif type_hint in ("list", "tuple", "set"):
-                stripped = raw_value.strip("[](){}")
-                parts = [part.strip() for part in stripped.split(",") if part.strip()]
-                if type_hint == "list":
-                    value = parts
-                elif type_hint == "tuple":
-                    value = tuple(parts)
-                else: 
-                    value = set(parts)
-            elif type_hint == "dict":
-                stripped = raw_value.strip("{}")
-                pairs = [pair.strip() for pair in stripped.split(",") if pair.strip()]
-                d = {}
-                for pair in pairs:
-                    if ":" in pair:
-                        k, v = pair.split(":", 1)
-                        d[k.strip()] = v.strip()
-                value = d
-            elif type_hint == "int":
-                try:
-                    value = int(raw_value)
-                except ValueError:
-                    f = float(raw_value)
-                    value = int(f)
-                except ValueError as e:
-                    raise e
-            elif type_hint in ("linkedlist", "stack", "queue", "binarytree", "directed_graph", "heap", "avl_tree"):
-                stripped = raw_value.strip("[](){}")
-                parts = [part.strip() for part in stripped.split(",") if part.strip()]
-                if type_hint == "directed_graph":
-                    try:
-                        value = ast.literal_eval(raw_value)
-                        if not (isinstance(value, list) and all(isinstance(edge, tuple) and len(edge) == 2 for edge in value)):
-                            raise ValueError("Each edge must be a tuple (from, to)")
-                    except Exception:
-                        raise ValueError("Invalid input for directed graph. Use format: [(A, B), (B, C)]")
-                else:
-                    value = parts
-            elif type_hint == "2dlist":
-                try:
-                    parsed = ast.literal_eval(raw_value)
-                    if not (isinstance(parsed, list) and all(isinstance(row, list) for row in parsed)):
-                        raise ValueError("Invalid 2D list format")
-                    value = parsed
-                except Exception:
-                    raise ValueError("Invalid input for list2d")
-            elif type_hint == "range":
-                stripped = raw_value.strip("[](){}")
-                parts = [part.strip() for part in stripped.split(",") if part.strip()]
-                if len(parts) == 1:
-                    value = range(int(parts[0]))
-                elif len(parts) == 2:
-                    value = range(int(parts[0]), int(parts[1]))
-                elif len(parts) == 3:
-                    value = range(int(parts[0]), int(parts[1]), int(parts[2]))
-                else:
-                    raise ValueError("Invalid input for range. Use start, stop[, step]")
-            else:
-                value = converter(raw_value)
-        except Exception as e:
-            self._show_error(f"Cannot typecast entered value. Please enter a valid {type_hint} value.")
-            return
-        value_type = type_hint
+    def _pan(self, event):
+        x, y = self.pan_origin
+        self.renderer.pan(event.x - x, event.y - y)
+        self.pan_origin = (event.x, event.y)
 
-        draw_fn = getattr(self, f"draw_{value_type}", self.draw_default)
-        draw_fn(value, value_type)
+    def _wheel_zoom(self, event):
+        factor = 1.2 if event.delta > 0 else 1 / 1.2
+        self.renderer.zoom_at(factor, event.x, event.y)
 
-    def _show_error(self, msg):
-        self.canvas.create_text(
-            self.center_x, 230, text=msg, fill="#ef4444", font=("Segoe UI", 20, "bold"), justify="center"
+    def _hover(self, event):
+        self.canvas.delete("hover")
+        hit = self.renderer.cell_at(event.x, event.y)
+        if hit is None:
+            return
+        row, col, value = hit
+        label = self.canvas.create_text(
+            event.x + 14, event.y + 14, text=f"[{row}][{col}] = {value!r}", anchor="nw",
+            font=("Segoe UI", 10), fill="#f9fafb", tags="hover"
+        )
+        x0, y0, x1, y1 = self.canvas.bbox(label)
+        background = self.canvas.create_rectangle(
+            x0 - 4, y0 - 2, x1 + 4, y1 + 2, fill="#1f2937", outline="", tags="hover"
         )
+        self.canvas.tag_lower(background, label)
 
-    def draw_default(self, value, value_type):
-        self.canvas.create_rectangle(self.center_x - 140, 180, self.center_x + 140, 270, fill="#f3f4f6", outline="#d1d5db", width=2)
-        self.canvas.create_text(self.center_x, 205, text=f"Type: {value_type}", font=("Segoe UI", 13, "bold"))
-        self.canvas.create_text(self.center_x, 240, text=f"Value: {str(value)}", font=("Segoe UI", 11))
-
-    def draw_list(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text=f"Type: {value_type}", font=("Segoe UI", 20, "bold"))
-
-        if isinstance(value, list) and all(isinstance(row, list) for row in value):
-            box_size = 50
-            spacing = 10
-            num_rows = len(value)
-            num_cols = max(len(row) for row in value) if num_rows > 0 else 0
-
-            total_width = num_cols * (box_size + spacing) - spacing
-            total_height = num_rows * (box_size + spacing) - spacing
-
-            start_x = self.center_x - total_width // 2
-            start_y = self.center_y - total_height // 2
-
-            for row_idx, row in enumerate(value):
-                for col_idx, item in enumerate(row):
-                    x0 = start_x + col_idx * (box_size + spacing)
-                    y0 = start_y + row_idx * (box_size + spacing)
-                    x1 = x0 + box_size
-                    y1 = y0 + box_size
-                    self.canvas.create_rectangle(x0, y0, x1, y1, fill="#bfdbfe", outline="#1d4ed8", width=2)
-                    self.canvas.create_text((x0 + x1)//2, (y0 + y1)//2, text=str(item), font=("Segoe UI", 11))
+    def _scroll_sequence(self, action, amount, unit=None):
+        view = self.sequence_view
+        if view is None:
             return
-
-        box_width = 60
-        y = self.center_y - box_width // 2
-        max_boxes = min(len(value), 12)
-        total_width = max_boxes * (box_width + 10) - 10
-        start_x = self.center_x - total_width // 2
-
-        for i, item in enumerate(value[:max_boxes]):
-            x0 = start_x + i * (box_width + 10)
-            x1 = x0 + box_width
-            self.canvas.create_rectangle(x0, y, x1, y + 60, fill="#bfdbfe", outline="#1d4ed8", width=2)
-            self.canvas.create_text((x0 + x1)//2, y + 30, text=str(item), font=("Segoe UI", 11))
-        
-        if len(value) > max_boxes:
-            self.canvas.create_text(x1 + 40, y + 30, text="...", font=("Segoe UI", 16))
-
-
-    def draw_tuple(self, value, value_type):
-        self.draw_list(value, "tuple")
-
-    def draw_set(self, value, value_type):
-        self.draw_list(list(value), "set")
-    
-    def draw_2dlist(self, value, value_type):
-        self.draw_list(value, "2dlist")
-
-    def draw_dict(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: dict", font=("Segoe UI", 20, "bold"))
-        y = 80
-        for i, (k, v) in enumerate(value.items()):
-            self.canvas.create_rectangle(self.center_x-250, y + i * 50, self.center_x+250, y + 40 + i * 50, fill="#fef9c3", outline="#ca8a04", width=2)
-            self.canvas.create_text(self.center_x, y + 20 + i * 50, text=f"{k} : {v}", font=("Segoe UI", 11))
-    
-    def draw_linkedlist(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: Linked List", font=("Segoe UI", 20, "bold"))
-        
-        node_width = 80
-        node_height = 60
-        spacing = 20
-        arrow_length = 30
-        
-        total_width = len(value) * node_width + (len(value) - 1) * (arrow_length + spacing)
-        start_x = self.center_x - total_width // 2
-        y = self.center_y - node_height // 2  # Center vertically based on node height
-        
-        if value:
-            self.canvas.create_text(start_x + node_width // 2, y - 20, text="Head", font=("Segoe UI", 10, "italic"), fill="#6b7280")
-        
-        for i, item in enumerate(value):
-            x0 = start_x + i * (node_width + arrow_length + spacing)
-            x1 = x0 + node_width
-            
-            # Draw node
-            self.canvas.create_rectangle(x0, y, x1, y + node_height, fill="#bbf7d0", outline="#16a34a", width=2)
-            self.canvas.create_text((x0 + x1) // 2, y + node_height // 2, text=str(item), font=("Segoe UI", 11))
-            
-            # Draw arrow to next node (if not last)
-            if i < len(value) - 1:
-                arrow_start = x1
-                arrow_end = x1 + arrow_length
-                self.canvas.create_line(arrow_start, y + node_height // 2, arrow_end, y + node_height // 2, arrow=tk.LAST, fill="#16a34a", width=2)
-        
-        if value:
-            # Draw "None" after the last node
-            self.canvas.create_text(x1 + 40, y + node_height // 2, text="None", font=("Segoe UI", 10, "italic"), fill="#6b7280")
-
-    
-    def draw_stack(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: Stack (Top → Bottom)", font=("Segoe UI", 20, "bold"))
-
-        box_width = 140
-        box_height = 40
-        start_x = self.center_x - box_width // 2
-        start_y = 100
-
-        for i, item in enumerate(reversed(value)): 
-            y0 = start_y + i * (box_height + 10)
-            y1 = y0 + box_height
-            w_plus = i*10
-            self.canvas.create_rectangle(start_x - w_plus, y0, start_x + box_width + w_plus, y1, fill="#fca5a5", outline="#b91c1c", width=2)
-            self.canvas.create_text(start_x + box_width // 2, y0 + box_height // 2, text=str(item), font=("Segoe UI", 11))
-
-        top_label_x = start_x + box_width + 40
-        top_label_y = start_y + 20
-        self.canvas.create_text(top_label_x, top_label_y, text="Top", font=("Segoe UI", 10, "bold"), fill="#ef4444")
-
-        self.canvas.create_line(top_label_x - 10, top_label_y, start_x + box_width, top_label_y, arrow=tk.LAST, fill="#ef4444", width=2)
-    
-    def draw_queue(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: Queue (Front → Rear)", font=("Segoe UI", 20, "bold"))
-
-        box_width = 80
-        box_height = 60
-        y = self.center_y - box_height // 2
-        total_width = len(value) * (box_width + 10) - 10
-        start_x = self.center_x - total_width // 2
-
-        for i, item in enumerate(value):
-            x0 = start_x + i * (box_width + 10)
-            x1 = x0 + box_width
-            self.canvas.create_rectangle(x0, y, x1, y + box_height, fill="#ddd6fe", outline="#7c3aed", width=2)
-            self.canvas.create_text((x0 + x1) // 2, y + box_height//2, text=str(item), font=("Segoe UI", 11))
-            
-            if i < len(value) - 1:
-                arrow_start = x1
-                arrow_end = x1 + 10
-                self.canvas.create_line(arrow_start, y + box_height//2, arrow_end + 10, y + 30, arrow=tk.LAST, fill="#7c3aed", width=2)
-
-        if value:
-            self.canvas.create_text(start_x - 10, y + 80, text="Front", font=("Segoe UI", 10), fill="#7c3aed")
-            self.canvas.create_text(x1 + 30, y + 80, text="Rear", font=("Segoe UI", 10), fill="#7c3aed")
-            front_arrow_x = start_x - 30
-            rear_arrow_x = x1 + 30
-
-            self.canvas.create_line(front_arrow_x, y + box_height//2, start_x, y + 30, arrow=tk.FIRST, fill="#7c3aed", width=2)
-
-            self.canvas.create_line(rear_arrow_x + 20, y + 30, x1, y + 30, arrow=tk.LAST, fill="#7c3aed", width=2)
-
-    def draw_binarytree(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: Binary Tree", font=("Segoe UI", 20, "bold"))
-
-        values = [None if val.lower() == "none" else val for val in value]
-        root = build_binary_tree(values)
-        if not root:
+        if action == "moveto":
+            view.scroll_to(int(float(amount) * view.length))
+        elif unit == "pages":
+            view.scroll_to(view.start + int(amount) * view.window)
+        else:
+            view.scroll_to(view.start + int(amount))
+        self._draw_sequence()
+
+    def _jump_to_index(self, event=None):
+        view = self.sequence_view
+        if view is None:
             return
-
-        level_height = 80
-        node_radius = 25
-
-        positions = {}
-
-        def assign_positions(node, depth, x_min, x_max):
-            if not node:
-                return
-            x = (x_min + x_max) // 2
-            y = 100 + depth * level_height
-            positions[node] = (x, y)
-            assign_positions(node.left, depth + 1, x_min, x)
-            assign_positions(node.right, depth + 1, x, x_max)
-
-        assign_positions(root, 0, self.center_x - 600, self.center_x + 600)
-
-        def draw_edges(node):
-            if not node:
-                return
-            x, y = positions[node]
-            for child in [node.left, node.right]:
-                if child:
-                    cx, cy = positions[child]
-                    self.canvas.create_line(x, y + node_radius, cx, cy - node_radius, fill="#7c3aed", width=2)
-                    draw_edges(child)
-
-        def draw_nodes():
-            for node, (x, y) in positions.items():
-                self.canvas.create_oval(x - node_radius, y - node_radius, x + node_radius, y + node_radius, fill="#ddd6fe", outline="#7c3aed", width=2)
-                self.canvas.create_text(x, y, text=str(node.val), font=("Segoe UI", 11))
-
-        draw_edges(root)
-        draw_nodes()
-    
-    def draw_range(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: range", font=("Segoe UI", 20, "bold"))
-        items = list(value)
-        if not items:
-            self.canvas.create_text(self.center_x, self.center_y, text="Empty range", font=("Segoe UI", 14, "italic"))
+        try:
+            index = int(self.seq_index_entry.get().strip().replace(",", "").replace("_", ""))
+        except ValueError:
             return
-        box_width = 60
-        y = self.center_y - box_width // 2
-        max_boxes = min(len(items), 12)
-        total_width = max_boxes * (box_width + 10) - 10
-        start_x = self.center_x - total_width // 2
-
-        for i, item in enumerate(items[:max_boxes]):
-            x0 = start_x + i * (box_width + 10)
-            x1 = x0 + box_width
-            self.canvas.create_rectangle(x0, y, x1, y + 60, fill="#fde68a", outline="#b45309", width=2)
-            self.canvas.create_text((x0 + x1)//2, y + 30, text=str(item), font=("Segoe UI", 11))
-        if len(items) > max_boxes:
-            self.canvas.create_text(x1 + 40, y + 30, text="...", font=("Segoe UI", 16))
-    
-    def draw_directed_graph(self, edges, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: Directed Graph", font=("Segoe UI", 20, "bold"))
-
-        nodes = sorted(set(n for edge in edges for n in edge))
-        num_nodes = len(nodes)
-        radius = 220
-        node_radius = 25
-        node_positions = {}
-
-        for i, node in enumerate(nodes):
-            angle = 2 * math.pi * i / num_nodes
-            x = self.center_x + int(radius * math.cos(angle))
-            y = self.center_y + int(radius * math.sin(angle))
-            node_positions[node] = (x, y)
-
-        for src, dst in edges:
-            if src not in node_positions or dst not in node_positions:
-                continue
-            x1, y1 = node_positions[src]
-            x2, y2 = node_positions[dst]
-            dx, dy = x2 - x1, y2 - y1
-            dist = math.hypot(dx, dy)
-            if dist == 0:
-                continue
-            offset_x = node_radius * dx / dist
-            offset_y = node_radius * dy / dist
-            self.canvas.create_line(
-                x1 + offset_x, y1 + offset_y, x2 - offset_x, y2 - offset_y,
-                arrow=tk.LAST, fill="#0ea5e9", width=2
-            )
+        if index < 0:
+            index += view.length
+        # Put the requested element in the middle of the window where possible.
+        view.scroll_to(index - view.window // 2)
+        self._draw_sequence()
+
+    def _draw_sequence(self):
+        with instrument.phase("layout"):
+            scene = self.sequence_view.layout(self.canvas_width, self.canvas_height)
+        self.renderer.draw(scene)
+        self.seq_scroll.set(*self.sequence_view.fraction())
 
-        for node, (x, y) in node_positions.items():
-            self.canvas.create_oval(
-                x - node_radius, y - node_radius, x + node_radius, y + node_radius,
-                fill="#cffafe", outline="#06b6d4", width=2
-            )
-            self.canvas.create_text(x, y, text=str(node), font=("Segoe UI", 11))
+    def visualize(self):
+        raw_value = self.value_entry.get().strip()
+        type_hint = self._current_type()
+        metrics = self._start_metrics(type_hint)
+        self.rerun = self.visualize
+        self.jobs.submit(
+            prepare, raw_value, type_hint, self.canvas_width, self.canvas_height, metrics, self.graph_overlay_var.get()
+        )
+        self._set_busy("Parsing…")
+
+    def _overlay_changed(self):
+        if self.rerun is not None and registry.get(self.last_type).overlays:
+            self.rerun()
+
+    def _toggle_feed(self):
+        if self.live_var.get():
+            self.start_feed(self.feed_address)
+        else:
+            self.stop_feed()
+
+    def start_feed(self, address=None):
+        self.stop_feed()
+        if address is None:
+            address = ("127.0.0.1", registry.resolve("feed:DEFAULT_PORT"))
+        server = registry.resolve("feed:FeedServer")(address)
+        try:
+            server.start()
+        except OSError as e:
+            self.live_var.set(False)
+            self._show_error(f"Could not listen on {address}: {e}")
+            return
+        self.feed = server
+        self.live_var.set(True)
+        self.root.title(f"Python Data Visualizer — listening on {server.address}")
+        self._poll_feed()
 
-    def draw_heap(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: Heap (Min/Max)", font=("Segoe UI", 20, "bold"))
+    def stop_feed(self):
+        if self.feed is None:
+            return
+        if self.feed_poll_id is not None:
+            self.root.after_cancel(self.feed_poll_id)
+            self.feed_poll_id = None
+        self.feed.stop()
+        self.feed = None
+        self.live_var.set(False)
+        self.root.title("Python Data Visualizer")
 
-        try:
-            numbers = [int(v) for v in value]
-        except ValueError:
-            self._show_error("Heap must contain only integers.")
+    def _poll_feed(self):
+        # Runs once per frame: at most one layout is in flight, and it always takes the
+        # newest state, so bursts of updates collapse into the next frame.
+        self.feed_poll_id = self.root.after(registry.resolve("feed:FRAME_MS"), self._poll_feed)
+        names = self.feed.names()
+        if names != self.feed_names:
+            self.live_menu.delete(3, "end")
+            for name in names:
+                self.live_menu.add_radiobutton(label=name, value=name, variable=self.follow_var)
+            self.feed_names = names
+        if self.jobs.busy:
             return
+        pending = self.feed.pending(self.follow_var.get() or None)
+        if pending is None:
+            return
+        name, value_type = pending
+        if value_type != self.last_type:
+            self.renderer.viewport.reset()
+            self.last_type = value_type
+        self.rerun = None
+        self.root.title(f"Python Data Visualizer — live: {name}")
+        metrics = self._start_metrics(f"live {name} ({value_type})")
+        self.jobs.submit(
+            prepare_live, self.feed, name, self.canvas_width, self.canvas_height, metrics, self.graph_overlay_var.get()
+        )
 
-        level_height = 80
-        node_radius = 25
-
-        positions = {}
-
-        def assign_positions(index, depth, x_min, x_max):
-            if index >= len(numbers):
-                return
-            x = (x_min + x_max) // 2
-            y = 100 + depth * level_height
-            positions[index] = (x, y)
-            assign_positions(2 * index + 1, depth + 1, x_min, x)
-            assign_positions(2 * index + 2, depth + 1, x, x_max)
-
-        assign_positions(0, 0, self.center_x - 600, self.center_x + 600)
-
-        def draw_edges():
-            for i in range(len(numbers)):
-                if i in positions:
-                    x, y = positions[i]
-                    left = 2 * i + 1
-                    right = 2 * i + 2
-                    for child in (left, right):
-                        if child < len(numbers) and child in positions:
-                            cx, cy = positions[child]
-                            self.canvas.create_line(x, y + node_radius, cx, cy - node_radius, fill="#f97316", width=2)
-
-        def draw_nodes():
-            for i, val in enumerate(numbers):
-                if i in positions:
-                    x, y = positions[i]
-                    self.canvas.create_oval(x - node_radius, y - node_radius, x + node_radius, y + node_radius,
-                                            fill="#fed7aa", outline="#f97316", width=2)
-                    self.canvas.create_text(x, y, text=str(val), font=("Segoe UI", 11))
-
-        draw_edges()
-        draw_nodes()
-
-    def draw_avl_tree(self, value, value_type):
-        self.canvas.create_text(self.center_x, 40, text="Type: AVL Tree", font=("Segoe UI", 20, "bold"))
+    def choose_recording(self):
+        path = filedialog.askopenfilename(
+            parent=self.root, title="Open recording",
+            filetypes=[("Recordings", "*.dvrec"), ("All files", "*")],
+        )
+        if path:
+            self.open_recording(path)
 
+    def open_recording(self, path):
+        self.close_recording()
         try:
-            values = [int(v) for v in value if v.lower() != "none"]
-        except Exception:
-            self._show_error("AVL Tree must contain only integers.")
+            self.recording = registry.resolve("recording:Recording")(path)
+        except (OSError, ValueError) as e:
+            self._show_error(f"Could not open recording {path}: {e}")
+            return
+        if not len(self.recording):
+            self.close_recording()
+            self._show_error(f"{path} has no frames.")
             return
+        self.renderer.viewport.reset()
+        self.timeline.config(to=len(self.recording) - 1)
+        self.timeline.set(0)
+        self.timeline_frame.pack(fill="x", pady=(6, 0))
+        self._seek_recording(0)
+
+    def close_recording(self):
+        if self.recording is None:
+            return
+        if self.replay_retry is not None:
+            self.root.after_cancel(self.replay_retry)
+            self.replay_retry = None
+        self.jobs.cancel()
+        self._set_busy(None)
+        self.recording.close()
+        self.recording = None
+        self.replay_want = self.replay_shown = None
+        self.timeline_frame.pack_forget()
+
+    def _seek_recording(self, value):
+        self.replay_want = int(float(value))
+        self._replay()
+
+    def _replay(self):
+        # Dragging the timeline asks for many frames; while one is being laid out the
+        # others are skipped, and the newest position is drawn once it is done.
+        self.replay_retry = None
+        if self.recording is None or self.replay_want == self.replay_shown:
+            return
+        if self.jobs.busy:
+            self.replay_retry = self.root.after(registry.resolve("feed:FRAME_MS"), self._replay)
+            return
+        index = self.replay_shown = self.replay_want
+        value_type = self.recording.value_type(index)
+        if value_type != self.last_type:
+            self.renderer.viewport.reset()
+            self.last_type = value_type
+        self.timeline_label.config(text=f"Frame {index + 1:,}/{len(self.recording):,} · {value_type}")
+        self.rerun = self._redraw_frame
+        metrics = self._start_metrics(f"frame {index} of {self.recording.path}")
+        self.jobs.submit(
+            prepare_frame, self.recording, index, self.canvas_width, self.canvas_height, metrics,
+            self.graph_overlay_var.get()
+        )
 
-        root = build_avl_tree(values)
-        if not root:
+    def _redraw_frame(self):
+        self.replay_shown = None
+        self._replay()
+
+    def _start_metrics(self, label):
+        # Every render starts here, on the Tk thread. Layouts run on worker threads where
+        # Tk cannot measure text, so node labels are fitted from glyph widths measured
+        # here, once, before the first job starts.
+        if not self.labels_warm:
+            font = registry.resolve("layout:LABEL_FONT")
+            registry.resolve("labels:warm")(font, tkfont.Font(root=self.root, font=font).measure)
+            self.labels_warm = True
+        self.pending_metrics = instrument.Metrics(label, profile=self.profile_var.get())
+        return self.pending_metrics
+
+    def animate(self):
+        raw_value = self.value_entry.get().strip()
+        type_hint = self._current_type()
+        animated = registry.resolve("animation:ANIMATED_TYPES")
+        if type_hint not in animated:
+            self._stop_animation()
+            self._show_error(f"Animation is available for {' and '.join(animated)}.")
+            return
+        metrics = self._start_metrics(f"{type_hint} animation")
+        self.jobs.submit(prepare_animation, raw_value, type_hint, self.canvas_width, self.canvas_height, metrics)
+        self._set_busy("Recording…")
+
+    def compare(self):
+        raw_before = self.before_entry.get().strip()
+        raw_after = self.value_entry.get().strip()
+        type_hint = self._current_type()
+        diff_types = registry.resolve("diff:DIFF_TYPES")
+        if type_hint not in diff_types:
+            self._show_error(f"Compare is available for {', '.join(diff_types)}.")
             return
+        metrics = self._start_metrics(f"{type_hint} diff")
+        self.rerun = None
+        self.jobs.submit(prepare_diff, raw_before, raw_after, type_hint, self.canvas_width, self.canvas_height, metrics)
+        self._set_busy("Comparing…")
+
+    def _autoplay(self, animator):
+        # Skipped if another result replaced the animation before Tk got idle.
+        if animator is self.animator:
+            animator.play()
+
+    def _toggle_animation(self):
+        if self.animator.playing:
+            self.animator.pause()
+        else:
+            self.animator.play()
+
+    def _animation_changed(self, index, playing):
+        anim = self.animator.animation
+        self.anim_label.config(text=f"Step {index + 1}/{len(anim)}: {anim.keyframes[index].caption}")
+        self.anim_play_btn.config(text="Pause" if playing else "Play")
+        if playing:
+            # The animator owns the canvas while it plays.
+            if self.renderer.scene is not None:
+                self.renderer.clear()
+                self._update_overlay()
+        else:
+            self.renderer.draw(anim.scene(index))
+
+    def _stop_animation(self):
+        if self.animator is not None:
+            self.animator.stop()
+            self.animator = None
+            self.anim_frame.pack_forget()
+
+    def _current_type(self):
+        type_hint = self.type_var.get().strip().lower()
+        if type_hint != self.last_type:
+            self.renderer.viewport.reset()
+            self.last_type = type_hint
+        return type_hint
+
+    def choose_file(self):
+        path = filedialog.askopenfilename(
+            parent=self.root, title="Load structure",
+            filetypes=[
+                ("Structure files", "*.json *.jsonl *.ndjson *.csv *.tsv *.edges *.edgelist *.txt"),
+                ("All files", "*"),
+            ],
+        )
+        if path:
+            self.load_file(path)
+
+    def load_file(self, path, fmt=None):
+        type_hint = self._current_type()
+        metrics = self._start_metrics(f"{type_hint} from {path}")
+        # Standard input cannot be read twice.
+        self.rerun = None if path == "-" else lambda: self.load_file(path, fmt)
+        self.jobs.submit(
+            prepare_file, path, type_hint, fmt, self.canvas_width, self.canvas_height, metrics, self.graph_overlay_var.get()
+        )
+        self._set_busy("Loading…")
 
-        level_height = 80
-        node_radius = 25
-        positions = {}
+    def cancel(self):
+        self.jobs.cancel()
+        self._set_busy(None)
 
-        def assign_positions(node, depth, x_min, x_max):
-            if not node:
-                return
-            x = (x_min + x_max) // 2
-            y = 100 + depth * level_height
-            positions[node] = (x, y)
-            assign_positions(node.left, depth + 1, x_min, x)
-            assign_positions(node.right, depth + 1, x, x_max)
+    def _set_busy(self, phase):
+        if phase is None:
+            self.progress.stop()
+            self.status_frame.grid_remove()
+            return
+        self.status_label.config(text=phase)
+        if not self.status_frame.winfo_ismapped():
+            self.status_frame.grid()
+            self.progress.start(12)
+
+    def _on_result(self, result):
+        self._set_busy(None)
+        metrics, self.pending_metrics = self.pending_metrics, None
+        if metrics is None:
+            self._show_result(result)
+            return
+        with metrics.active(), instrument.phase("draw"):
+            self._show_result(result)
+        metrics.finish()
+        scene = self.renderer.scene
+        metrics.counts.update(scene.stats)
+        metrics.counts["scene_items"] = scene.counts()
+        metrics.counts["canvas_created"] = self.renderer.last_refresh["created"]
+        metrics.counts["canvas_items"] = self.renderer.last_refresh["visible"]
+        self.metrics = metrics
+        self._update_overlay()
+
+    def _show_result(self, result):
+        self._stop_animation()
+        # Scenes first: the other kinds of result only exist once their module is loaded.
+        if not isinstance(result, Scene) and isinstance(result, registry.resolve("layout:SequenceView")):
+            self.sequence_view = result
+            self.seq_frame.pack(fill="x", pady=(6, 0))
+            self._draw_sequence()
+            return
+        if not isinstance(result, Scene) and isinstance(result, registry.resolve("animation:Animation")):
+            self.sequence_view = None
+            self.seq_frame.pack_forget()
+            self.anim_frame.pack(fill="x", pady=(6, 0))
+            self.animator = registry.resolve("animation:Animator")(self.canvas, self.renderer.viewport, result, self._animation_changed)
+            self._animation_changed(0, False)
+            self.root.after_idle(self._autoplay, self.animator)
+            return
+        self.sequence_view = None
+        self.seq_frame.pack_forget()
+        self.renderer.draw(result)
+
+    def _on_error(self, error):
+        self._set_busy(None)
+        self.pending_metrics = None
+        self._stop_animation()
+        self.sequence_view = None
+        self.seq_frame.pack_forget()
+        if isinstance(error, ParseError):
+            self._show_error(str(error))
+        else:
+            self._show_error(f"Could not visualize input: {error}")
 
-        assign_positions(root, 0, self.center_x - 600, self.center_x + 600)
+    def _show_error(self, msg):
+        self.renderer.draw(registry.resolve("layout:error_scene")(msg, self.canvas_width, self.canvas_height))
 
-        def draw_edges(node):
-            if not node:
-                return
-            x, y = positions[node]
-            for child in [node.left, node.right]:
-                if child:
-                    cx, cy = positions[child]
-                    self.canvas.create_line(x, y + node_radius, cx, cy - node_radius, fill="#10b981", width=2)
-                    draw_edges(child)
+    def draw(self, value, value_type):
+        metrics = self._start_metrics(value_type)
+        with metrics.active():
+            result = prepare_value(value, value_type, self.canvas_width, self.canvas_height, overlay=self.graph_overlay_var.get())
+        self._on_result(result)
 
-        def draw_nodes():
-            for node, (x, y) in positions.items():
-                self.canvas.create_oval(x - node_radius, y - node_radius, x + node_radius, y + node_radius, fill="#d1fae5", outline="#10b981", width=2)
-                self.canvas.create_text(x, y, text=str(node.val), font=("Segoe UI", 11))
+    def _update_overlay(self):
+        self.canvas.delete("overlay")
+        if not self.overlay_var.get():
+            return
+        lines = self.metrics.lines() if self.metrics is not None else ["No render measured yet"]
+        if self.metrics is not None:
+            counts = self.metrics.counts
+            structure = [f"{counts[name]:,} {name}" for name in ("nodes", "edges", "cells") if name in counts]
+            if structure:
+                lines.append(" · ".join(structure))
+        refresh = self.renderer.last_refresh
+        if refresh is not None:
+            made = ", ".join(f"{n} {kind}" for kind, n in refresh["created"].items() if n) or "none"
+            lines.append(f"canvas {refresh['visible']:,} items, last refresh {refresh['seconds'] * 1000:.1f} ms")
+            lines.append(f"created {made}; deleted {refresh['deleted']}")
+        if self.feed is not None:
+            stats = self.feed.stats()
+            lines.append(f"feed {stats['streams']} streams, {stats['messages']:,} messages, {stats['errors']} rejected")
+            if stats["last_error"]:
+                lines.append(f"  last rejected: {stats['last_error'][:60]}")
+        stats = render_cache.stats()
+        if stats["hit_rate"] is not None:
+            lines.append(
+                f"cache {stats['entries']} entries, {stats['bytes'] / 2 ** 20:.1f} MB, "
+                f"{stats['hits']} hits / {stats['misses']} misses, {stats['evictions']} evicted"
+            )
+        label = self.canvas.create_text(
+            self.canvas_width - 12, 12, text="\n".join(lines), anchor="ne", justify="left",
+            font=("Consolas", 9), fill="#f9fafb", tags="overlay"
+        )
+        x0, y0, x1, y1 = self.canvas.bbox(label)
+        background = self.canvas.create_rectangle(
+            x0 - 6, y0 - 4, x1 + 6, y1 + 4, fill="#111827", outline="", tags="overlay"
+        )
+        self.canvas.tag_lower(background, label)
 
-        draw_edges(root)
-        draw_nodes()
+    def export_metrics(self):
+        if self.metrics is None:
+            messagebox.showinfo("Export metrics", "Visualize something first.", parent=self.root)
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Export metrics", defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("All files", "*")],
+        )
+        if not path:
+            return
+        report = self.metrics.to_dict()
+        report["last_refresh"] = self.renderer.last_refresh
+        report["cache"] = render_cache.stats()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+
+    def clear_cache(self):
+        render_cache.clear()
+        self._update_overlay()
+
+    def export_profile(self):
+        if self.metrics is None or not self.metrics.profiles:
+            messagebox.showinfo(
+                "Save cProfile dump", "Turn on Diagnostics → Profile renders, then visualize again.", parent=self.root
+            )
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Save cProfile dump", defaultextension=".prof",
+            filetypes=[("cProfile dump", "*.prof"), ("All files", "*")],
+        )
+        if path:
+            self.metrics.dump_profile(path)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Python Data Visualizer")
+    parser.add_argument("--input", help="file to load on start-up; '-' reads standard input")
+    parser.add_argument("--type", default="list", help="type to build from --input (see loader.LOADABLE_TYPES)")
+    parser.add_argument("--format", help="input format (default: from the file extension or contents)")
+    parser.add_argument("--cache-mb", type=int, default=render_cache.max_bytes >> 20,
+                        help="memory for cached parses and layouts (0 disables caching)")
+    parser.add_argument("--listen", action="store_true", help="accept live updates from feed.FeedClient on start-up")
+    parser.add_argument("--feed-port", type=int, help="localhost TCP port for --listen (default: feed.DEFAULT_PORT)")
+    parser.add_argument("--feed-socket", help="listen on this Unix socket path instead of a TCP port")
+    parser.add_argument("--replay", help="recording to open on start-up, made with recording.Recorder")
+    args = parser.parse_args()
+    if args.input:
+        # The loader is only imported when there is something to load.
+        for name, value, allowed in (
+            ("--type", args.type, registry.resolve("loader:LOADABLE_TYPES")),
+            ("--format", args.format, registry.resolve("loader:FORMATS")),
+        ):
+            if value is not None and value not in allowed:
+                parser.error(f"argument {name}: invalid choice: {value!r} (choose from {', '.join(allowed)})")
+    render_cache.max_bytes = args.cache_mb << 20
+
     root = tk.Tk()
     app = DataVisualizer(root)
+    if args.input:
+        app.type_var.set(args.type)
+        app.load_file(args.input, args.format)
+    if args.feed_socket or args.feed_port:
+        app.feed_address = args.feed_socket or ("127.0.0.1", args.feed_port)
+    if args.listen:
+        app.start_feed(app.feed_address)
+    if args.replay:
+        app.open_recording(args.replay)
     root.mainloop()
@@ -0,0 +1,291 @@
+from array import array
+from collections import defaultdict
+
+import instrument
+import labels
+from digraph import draw_graph
+from graph import label_order
+from layout import LABEL_FONT, add_title, layout_node_tree, tree_store
+from parsing import ParseError
+from scene import Scene
+from tree import NIL
+
+DIFF_TYPES = ("binarytree", "heap", "avl_tree", "directed_graph", "dict")
+SAME, MOVED, CHANGED, ADDED, REMOVED = range(5)
+STATUS_NAMES = ("unchanged", "moved", "changed", "added", "removed")
+# Fills per status; edges use the darker shades so thin lines still read.
+FILLS = ("#f3f4f6", "#93c5fd", "#fde047", "#86efac", "#fca5a5")
+EDGE_COLORS = ("#6b7280", "#2563eb", "#ca8a04", "#16a34a", "#dc2626")
+LEGEND_FONT = ("Segoe UI", 10)
+LEGEND_Y = 66
+# Changed values spelled out in the legend before it trails off.
+NOTE_CHANGES = 5
+
+
+def _signatures(store, order, table, value_ids):
+    # Hash-consed subtree signatures: two subtrees, in either tree, get the same id exactly
+    # when they have the same values in the same shape. Children come before parents.
+    sig = array("i", [0]) * len(store)
+    left, right, local = store.left, store.right, store.value_ids
+    shared = [value_ids.setdefault(value, len(value_ids)) for value in store.values]
+    for node in reversed(order):
+        l, r = left[node], right[node]
+        key = (shared[local[node]], sig[l] if l != NIL else -1, sig[r] if r != NIL else -1)
+        s = table.get(key)
+        if s is None:
+            s = table[key] = len(table)
+        sig[node] = s
+    return sig
+
+
+class TreeDiff:
+    # Matches the nodes of two trees in linear time, in three passes over the nodes of
+    # `after`, each preferring the node at the same path in `before`:
+    #   1. identical subtrees, tallest first, by signature (unchanged, or moved if the
+    #      match sits at another path);
+    #   2. remaining nodes by value (unchanged or moved);
+    #   3. remaining nodes paired with an unmatched node at the same path (changed).
+    # Whatever is left over was added to `after` or removed from `before`.
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+        before_order = [(node, parent) for node, parent, depth in before.preorder()]
+        after_order = [node for node, parent, depth in after.preorder()]
+        table, value_ids = {}, {}
+        before_sig = _signatures(before, [node for node, parent in before_order], table, value_ids)
+        after_sig = _signatures(after, after_order, table, value_ids)
+        self.twin = self._twins(after_order)
+        self.match = array("i", [NIL]) * len(after)
+        self.used = bytearray(len(before))
+        self.status = bytearray(len(after))
+        twin, match, used = self.twin, self.match, self.used
+
+        by_sig = defaultdict(list)
+        for node, parent in before_order:
+            by_sig[before_sig[node]].append(node)
+        by_height = defaultdict(list)
+        for node in after_order:
+            by_height[after.height[node]].append(node)
+        for height in sorted(by_height, reverse=True):
+            for a in by_height[height]:
+                if match[a] != NIL:
+                    continue
+                s, t = after_sig[a], twin[a]
+                if t != NIL and before_sig[t] == s and self._claim(a, t, SAME):
+                    continue
+                candidates = by_sig.get(s)
+                while candidates:
+                    b = candidates.pop()
+                    # A candidate that fails is partly taken and can never match whole.
+                    if b != t and self._claim(a, b, MOVED):
+                        break
+
+        by_value = defaultdict(list)
+        for node, parent in before_order:
+            if not used[node]:
+                by_value[before.val(node)].append(node)
+        for a in after_order:
+            if match[a] != NIL:
+                continue
+            value, t = after.val(a), twin[a]
+            if t != NIL and not used[t] and before.val(t) == value:
+                self._pair(a, t, SAME)
+                continue
+            candidates = by_value.get(value)
+            while candidates:
+                b = candidates.pop()
+                if not used[b]:
+                    self._pair(a, b, MOVED)
+                    break
+
+        self.changes = []
+        for a in after_order:
+            if match[a] == NIL:
+                t = twin[a]
+                if t != NIL and not used[t]:
+                    self._pair(a, t, CHANGED)
+                    self.changes.append((before.val(t), after.val(a)))
+                else:
+                    self.status[a] = ADDED
+        self._merge(after_order, before_order)
+
+    def _twins(self, after_order):
+        # The node of `before` at the same path from the root, or NIL.
+        before, after = self.before, self.after
+        twin = array("i", [NIL]) * len(after)
+        if after.root == NIL or before.root == NIL:
+            return twin
+        twin[after.root] = before.root
+        for node in after_order:
+            t = twin[node]
+            if t == NIL:
+                continue
+            if after.left[node] != NIL:
+                twin[after.left[node]] = before.left[t]
+            if after.right[node] != NIL:
+                twin[after.right[node]] = before.right[t]
+        return twin
+
+    def _pair(self, a, b, status):
+        self.match[a] = b
+        self.used[b] = 1
+        self.status[a] = status
+
+    def _claim(self, a, b, status):
+        # Pairs two subtrees of the same signature node by node, unless part of the
+        # `before` one is already taken.
+        al, ar, bl, br = self.after.left, self.after.right, self.before.left, self.before.right
+        pairs = []
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            if self.used[y]:
+                return False
+            pairs.append((x, y))
+            if al[x] != NIL:
+                stack.append((al[x], bl[y]))
+            if ar[x] != NIL:
+                stack.append((ar[x], br[y]))
+        for x, y in pairs:
+            self._pair(x, y, status)
+        return True
+
+    def _merge(self, after_order, before_order):
+        # One tree to draw: `after`, with each removed subtree hung from the empty slot it
+        # left where its parent is still there. Removed nodes with nowhere to go are
+        # only counted.
+        before = self.before
+        merged = self.after.copy()
+        status = bytearray(self.status)
+        # Slot in merged of each node of before that is drawn.
+        owner = array("i", [NIL]) * len(before)
+        for node, b in enumerate(self.match):
+            if b != NIL:
+                owner[b] = node
+        grafted = []
+        self.unplaced = 0
+        for node, parent in before_order:
+            if self.used[node]:
+                continue
+            if parent == NIL:
+                if merged.root == NIL:
+                    owner[node] = merged.root = merged.add(before.val(node))
+                    grafted.append(owner[node])
+                    continue
+            elif owner[parent] != NIL:
+                side = merged.left if before.left[parent] == node else merged.right
+                if side[owner[parent]] == NIL:
+                    owner[node] = side[owner[parent]] = merged.add(before.val(node))
+                    grafted.append(owner[node])
+                    continue
+            self.unplaced += 1
+        status.extend([REMOVED] * len(grafted))
+        merged.update_heights(after_order + grafted)
+        self.store = merged
+        self.merged_status = status
+        self.counts = _counts(self.status)
+        self.counts[REMOVED] = len(before) - sum(self.used)
+
+
+def dict_diff(before, after):
+    # (key, status, old value, new value) per key: after's keys in order, then removed ones.
+    rows = []
+    for key, value in after.items():
+        if key not in before:
+            rows.append((key, ADDED, None, value))
+        else:
+            rows.append((key, SAME if before[key] == value else CHANGED, before[key], value))
+    rows.extend((key, REMOVED, value, None) for key, value in before.items() if key not in after)
+    return rows
+
+
+def graph_diff(before, after):
+    # Edge sets compared by hashing: (edges, status per edge, nodes, status per node).
+    old = dict.fromkeys(tuple(edge) for edge in before)
+    new = dict.fromkeys(tuple(edge) for edge in after)
+    edges = list(new) + [edge for edge in old if edge not in new]
+    edge_status = [SAME if edge in old else ADDED for edge in new] + [REMOVED] * (len(edges) - len(new))
+    old_nodes = {n for edge in old for n in edge}
+    new_nodes = {n for edge in new for n in edge}
+    nodes = sorted(old_nodes | new_nodes, key=label_order)
+    node_status = [ADDED if n not in old_nodes else REMOVED if n not in new_nodes else SAME for n in nodes]
+    return edges, edge_status, nodes, node_status
+
+
+def _counts(statuses):
+    counts = [0] * len(STATUS_NAMES)
+    for s in statuses:
+        counts[s] += 1
+    return counts
+
+
+def _legend(scene, items):
+    # A swatch and a line of text per (status, text), centred under the title.
+    font = labels.metrics(LEGEND_FONT)
+    widths = [font.width(text) for s, text in items]
+    x = scene.center_x - (sum(widths) + len(items) * 36 - 18) / 2
+    text_style = scene.style(font=LEGEND_FONT, fill="#374151")
+    for (s, text), width in zip(items, widths):
+        scene.rect(x, LEGEND_Y - 6, x + 12, LEGEND_Y + 6, scene.style(fill=FILLS[s], outline=EDGE_COLORS[s], width=1), key=("legend", s))
+        scene.text(x + 18 + width / 2, LEGEND_Y, text, text_style, key=("legend", s))
+        x += width + 36
+
+
+def _layout_tree_diff(scene, before, after, value_type):
+    with instrument.phase("build"):
+        stores = tree_store(before, value_type), tree_store(after, value_type)
+    with instrument.phase("diff"):
+        result = TreeDiff(*stores)
+    counts = result.counts
+    items = [(s, f"{counts[s]:,} {STATUS_NAMES[s]}") for s in (MOVED, CHANGED, ADDED, REMOVED)]
+    if result.changes:
+        shown = ", ".join(f"{old} → {new}" for old, new in result.changes[:NOTE_CHANGES])
+        items[1] = (CHANGED, f"{items[1][1]}: {shown}{', …' if len(result.changes) > NOTE_CHANGES else ''}")
+    if result.unplaced:
+        items[3] = (REMOVED, f"{items[3][1]} ({result.unplaced:,} not shown)")
+    _legend(scene, items)
+    fills = [FILLS[s] for s in result.merged_status]
+    layout_node_tree(scene, result.store, FILLS[SAME], EDGE_COLORS[SAME], fills)
+
+
+def _layout_graph_diff(scene, before, after):
+    with instrument.phase("diff"):
+        edges, edge_status, nodes, node_status = graph_diff(before, after)
+    edge_counts, node_counts = _counts(edge_status), _counts(node_status)
+    _legend(scene, [
+        (s, f"{edge_counts[s]:,} edges, {node_counts[s]:,} nodes {STATUS_NAMES[s]}") for s in (ADDED, REMOVED)
+    ])
+    node_fill = [None if s == SAME else FILLS[s] for s in node_status]
+    edge_color = {i: EDGE_COLORS[s] for i, s in enumerate(edge_status) if s != SAME}
+    draw_graph(scene, edges, nodes, node_fill, edge_color)
+
+
+def _layout_dict_diff(scene, before, after):
+    with instrument.phase("diff"):
+        rows = dict_diff(before, after)
+    counts = _counts(s for key, s, old, new in rows)
+    _legend(scene, [(s, f"{counts[s]:,} keys {STATUS_NAMES[s]}") for s in (CHANGED, ADDED, REMOVED)])
+    cx = scene.center_x
+    label_style = scene.style(font=LABEL_FONT)
+    y = 90
+    for i, (key, s, old, new) in enumerate(rows):
+        text = f"{key} : {old} → {new}" if s == CHANGED else f"{key} : {new if s != REMOVED else old}"
+        row_style = scene.style(fill=FILLS[s], outline=EDGE_COLORS[s], width=2)
+        scene.rect(cx - 250, y + i * 50, cx + 250, y + 40 + i * 50, row_style, key=("key", key))
+        scene.text(cx, y + 20 + i * 50, labels.fit(text, LABEL_FONT, 500), label_style, key=("key", key))
+
+
+def diff_scene(before, after, value_type, width, height):
+    # Both values as parsed for value_type, drawn as one colour-coded structure.
+    if value_type not in DIFF_TYPES:
+        raise ParseError(f"Diffs are available for {', '.join(DIFF_TYPES)}.")
+    scene = Scene(width, height)
+    with instrument.phase("layout"):
+        add_title(scene, f"Diff: {value_type}")
+        if value_type == "dict":
+            _layout_dict_diff(scene, before, after)
+        elif value_type == "directed_graph":
+            _layout_graph_diff(scene, before, after)
+        else:
+            _layout_tree_diff(scene, before, after, value_type)
+    return scene
@@ -0,0 +1,159 @@
+import math
+from collections import Counter
+
+import instrument
+import labels
+from force import ForceLayout
+from graph import Graph, label_order
+from heatmap import PALETTE_HEX
+from layout import ARROW_LAST, LABEL_FONT, NODE_LABEL_WIDTH, add_title
+
+# Graphs up to this many nodes keep the classic circle; bigger ones get a force layout.
+CIRCLE_MAX_NODES = 30
+# Shared between renders so an edited graph warm-starts from its previous positions.
+graph_layout = ForceLayout()
+# Fills for strongly connected components; nodes outside any cycle stay uncoloured.
+COMPONENT_COLORS = ("#fca5a5", "#fdba74", "#fde047", "#86efac", "#5eead4",
+                    "#93c5fd", "#c4b5fd", "#f9a8d4", "#d6d3d1", "#a3e635")
+HIGHLIGHT_COLOR = "#dc2626"
+UNREACHED_COLOR = "#e5e7eb"
+# Labels listed in the overlay note before it trails off.
+NOTE_LABELS = 8
+
+
+def _ramp(position, count):
+    # Colour for position 0..count-1 along the heatmap palette.
+    return PALETTE_HEX[(len(PALETTE_HEX) - 1) * position // max(1, count - 1)]
+
+
+def _path_note(graph, nodes, arrow=" → "):
+    labels = [str(graph.labels[v]) for v in nodes[:NOTE_LABELS]]
+    if len(nodes) > NOTE_LABELS:
+        labels.append("…")
+    return arrow.join(labels)
+
+
+def _cycle_overlay(graph, node_fill, edge_color, prefix):
+    cycle = graph.find_cycle()
+    if cycle is None:
+        return "No cycles: the graph is a DAG"
+    nodes, edge_ids = cycle
+    for v in nodes:
+        node_fill[v] = HIGHLIGHT_COLOR
+    for e in edge_ids:
+        edge_color[e] = HIGHLIGHT_COLOR
+    return f"{prefix}{_path_note(graph, nodes + nodes[:1])}"
+
+
+def graph_overlay(graph, overlay):
+    # Node fills (None keeps the default) and highlighted edges by input position for
+    # one analysis, plus a line summarising it.
+    node_fill = [None] * len(graph)
+    edge_color = {}
+    if overlay == "scc":
+        component, count = graph.strongly_connected()
+        sizes = Counter(component)
+        for v, c in enumerate(component):
+            if sizes[c] > 1:
+                node_fill[v] = COMPONENT_COLORS[c % len(COMPONENT_COLORS)]
+        for e, (a, b) in enumerate(zip(graph.src, graph.dst)):
+            c = component[a]
+            if c == component[b] and sizes[c] > 1:
+                edge_color[e] = COMPONENT_COLORS[c % len(COMPONENT_COLORS)]
+        cyclic = sum(1 for size in sizes.values() if size > 1)
+        note = f"{count:,} strongly connected components, {cyclic:,} with cycles; largest has {max(sizes.values()):,} nodes"
+    elif overlay == "topological":
+        order = graph.topological_order()
+        if order is None:
+            note = _cycle_overlay(graph, node_fill, edge_color, "No topological order, cycle: ")
+        else:
+            for rank, v in enumerate(order):
+                node_fill[v] = _ramp(rank, len(order))
+            note = f"Topological order: {_path_note(graph, order, ', ')}"
+    elif overlay == "cycle":
+        note = _cycle_overlay(graph, node_fill, edge_color, "Cycle: ")
+    elif overlay in ("bfs", "dfs"):
+        # Searches start where the input does: at the source of the first edge.
+        start = graph.src[0]
+        if overlay == "bfs":
+            rank, via = graph.bfs(start)
+            depth = max(rank)
+            note = f"BFS from {graph.labels[start]}: {sum(1 for d in rank if d >= 0):,} reachable nodes, {depth + 1} levels"
+        else:
+            rank, via = graph.dfs(start)
+            depth = len(graph) - 1
+            trees = sum(1 for e in via if e < 0)
+            note = f"DFS from {graph.labels[start]}: a forest of {trees:,} trees, tree edges in red"
+        for v, r in enumerate(rank):
+            node_fill[v] = UNREACHED_COLOR if r < 0 else _ramp(r, depth + 1)
+            if via[v] >= 0:
+                edge_color[via[v]] = HIGHLIGHT_COLOR
+    else:
+        return None, None, None
+    return node_fill, edge_color, note
+
+
+def layout_directed_graph(scene, edges, value_type, mode="auto", overlay="none"):
+    add_title(scene, "Type: Directed Graph")
+
+    nodes = sorted(set(n for edge in edges for n in edge), key=label_order)
+    node_fill = edge_color = None
+    if overlay != "none" and edges:
+        with instrument.phase("analysis"):
+            node_fill, edge_color, note = graph_overlay(Graph.for_edges(edges, nodes), overlay)
+        if note is not None:
+            scene.text(scene.center_x, 72, note, scene.style(fill="#374151", font=LABEL_FONT), key="overlay-note")
+    draw_graph(scene, edges, nodes, node_fill, edge_color, mode)
+
+
+def draw_graph(scene, edges, nodes, node_fill=None, edge_color=None, mode="auto"):
+    # node_fill is indexed like nodes (None keeps the default), edge_color maps positions
+    # in edges to the colour of a highlighted edge.
+    num_nodes = len(nodes)
+    scene.stats.update(nodes=num_nodes, edges=len(edges))
+    radius = 220
+    node_radius = 25
+    node_positions = {}
+
+    use_force = mode == "force" or (mode == "auto" and num_nodes > CIRCLE_MAX_NODES)
+    if use_force and graph_layout.available(num_nodes):
+        positions = graph_layout.layout(nodes, edges)
+        xs = [x for x, y in positions.values()]
+        ys = [y for x, y in positions.values()]
+        shift_x = scene.center_x - (min(xs) + max(xs)) / 2
+        shift_y = scene.center_y - (min(ys) + max(ys)) / 2
+        for node, (x, y) in positions.items():
+            node_positions[node] = (x + shift_x, y + shift_y)
+    else:
+        for i, node in enumerate(nodes):
+            angle = 2 * math.pi * i / num_nodes
+            x = scene.center_x + int(radius * math.cos(angle))
+            y = scene.center_y + int(radius * math.sin(angle))
+            node_positions[node] = (x, y)
+
+    edge_style = scene.style(arrow=ARROW_LAST, fill="#0ea5e9", width=2)
+    for i, (src, dst) in enumerate(edges):
+        if src not in node_positions or dst not in node_positions:
+            continue
+        x1, y1 = node_positions[src]
+        x2, y2 = node_positions[dst]
+        dx, dy = x2 - x1, y2 - y1
+        dist = math.hypot(dx, dy)
+        if dist == 0:
+            continue
+        offset_x = node_radius * dx / dist
+        offset_y = node_radius * dy / dist
+        style = edge_style
+        if edge_color and i in edge_color:
+            style = scene.style(arrow=ARROW_LAST, fill=edge_color[i], width=3)
+        scene.line(x1 + offset_x, y1 + offset_y, x2 - offset_x, y2 - offset_y, style, key=i)
+
+    node_style = scene.style(fill="#cffafe", outline="#06b6d4", width=2)
+    label_style = scene.style(font=LABEL_FONT)
+    for i, node in enumerate(nodes):
+        x, y = node_positions[node]
+        style = node_style
+        if node_fill and node_fill[i] is not None:
+            style = scene.style(fill=node_fill[i], outline="#374151", width=2)
+        scene.oval(x - node_radius, y - node_radius, x + node_radius, y + node_radius, style, key=("node", node))
+        scene.text(x, y, labels.fit(str(node), LABEL_FONT, NODE_LABEL_WIDTH), label_style, key=("node", node))
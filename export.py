@@ -0,0 +1,313 @@
+import argparse
+import base64
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+
+import layout
+import loader
+import registry
+from parsing import ParseError
+from scene import RECT, OVAL, LINE, TEXT, IMAGE
+
+try:
+    import cairosvg
+except (ImportError, OSError):
+    # cairosvg installs fine without the cairo C library and only fails on import.
+    cairosvg = None
+
+FORMATS = ("svg", "ps", "png")
+# Blank border around the drawing, in scene units.
+MARGIN = 20
+# Tk measures fonts in points; scene units are screen pixels at 96 dpi.
+PX_PER_PT = 96 / 72
+# Tk's default arrowshape: tip to neck and tip to trailing points along the line, half width.
+ARROW_SHAPE = (8, 10, 3)
+
+PS_FONTS = {
+    (False, False): "Helvetica",
+    (True, False): "Helvetica-Bold",
+    (False, True): "Helvetica-Oblique",
+    (True, True): "Helvetica-BoldOblique",
+}
+
+
+def export_bounds(scene):
+    # The canvas area, grown to take in anything laid out beyond it.
+    x0, y0, x1, y1 = scene.bounds()
+    return (
+        min(0, x0 - MARGIN), min(0, y0 - MARGIN),
+        max(scene.width, x1 + MARGIN), max(scene.height, y1 + MARGIN),
+    )
+
+
+def _font(options):
+    font = options.get("font", ("TkDefaultFont", 10))
+    bold = "bold" in font[2:]
+    italic = "italic" in font[2:]
+    return font[0], font[1] * PX_PER_PT, bold, italic
+
+
+def _png(width, height, rows):
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    raw = b"".join(b"\0" + row for row in rows)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def scene_to_svg(scene):
+    x0, y0, x1, y1 = export_bounds(scene)
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{x1 - x0:g}" height="{y1 - y0:g}" '
+        f'viewBox="{x0:g} {y0:g} {x1 - x0:g} {y1 - y0:g}">\n',
+        f'<rect x="{x0:g}" y="{y0:g}" width="{x1 - x0:g}" height="{y1 - y0:g}" fill="#ffffff"/>\n',
+    ]
+    markers = {}
+    body = []
+    for i in range(len(scene)):
+        kind, (ax, ay, bx, by), options, label = scene.item(i)
+        fill = options.get("fill", "")
+        outline = options.get("outline", "#000000")
+        width = options.get("width", 1)
+        paint = f'fill="{fill or "none"}" stroke="{outline or "none"}" stroke-width="{width:g}"'
+        if kind == RECT:
+            body.append(f'<rect x="{min(ax, bx):g}" y="{min(ay, by):g}" width="{abs(bx - ax):g}" height="{abs(by - ay):g}" {paint}/>\n')
+        elif kind == OVAL:
+            body.append(
+                f'<ellipse cx="{(ax + bx) / 2:g}" cy="{(ay + by) / 2:g}" rx="{abs(bx - ax) / 2:g}" ry="{abs(by - ay) / 2:g}" {paint}/>\n'
+            )
+        elif kind == LINE:
+            color = fill or "#000000"
+            ends = ""
+            arrow = options.get("arrow")
+            if arrow:
+                marker = markers.setdefault(color, f"arrow{len(markers)}")
+                if arrow in (layout.ARROW_FIRST, "both"):
+                    ends += f' marker-start="url(#{marker})"'
+                if arrow in (layout.ARROW_LAST, "both"):
+                    ends += f' marker-end="url(#{marker})"'
+            body.append(f'<line x1="{ax:g}" y1="{ay:g}" x2="{bx:g}" y2="{by:g}" stroke="{color}" stroke-width="{width:g}"{ends}/>\n')
+        elif kind == TEXT:
+            family, size, bold, italic = _font(options)
+            lines = label.split("\n")
+            style = f'font-family={quoteattr(family + ", sans-serif")} font-size="{size:.1f}"'
+            if bold:
+                style += ' font-weight="bold"'
+            if italic:
+                style += ' font-style="italic"'
+            # Tk centres the whole block on the anchor point.
+            top = ay - (len(lines) - 1) * size * 0.6
+            body.append(f'<text text-anchor="middle" dominant-baseline="central" fill="{fill or "#000000"}" {style}>')
+            for n, line in enumerate(lines):
+                body.append(f'<tspan x="{ax:g}" y="{top + n * size * 1.2:g}">{escape(line)}</tspan>')
+            body.append("</text>\n")
+        elif kind == IMAGE:
+            xs, ys = label.native_axes()
+            data = base64.b64encode(_png(len(xs), len(ys), label.pixel_rows(xs, ys))).decode("ascii")
+            body.append(
+                f'<image x="{ax:g}" y="{ay:g}" width="{bx - ax:g}" height="{by - ay:g}" preserveAspectRatio="none" '
+                f'style="image-rendering:pixelated" href="data:image/png;base64,{data}"/>\n'
+            )
+
+    if markers:
+        neck, back, half = ARROW_SHAPE
+        out.append("<defs>\n")
+        for color, marker in markers.items():
+            out.append(
+                f'<marker id="{marker}" markerUnits="userSpaceOnUse" markerWidth="{back}" markerHeight="{2 * half}" '
+                f'refX="{back}" refY="{half}" orient="auto-start-reverse">'
+                f'<path d="M{back},{half} L0,0 L{back - neck},{half} L0,{2 * half} z" fill="{color}"/></marker>\n'
+            )
+        out.append("</defs>\n")
+    out.extend(body)
+    out.append("</svg>\n")
+    return "".join(out)
+
+
+def _ps_color(color):
+    color = color.lstrip("#")
+    return " ".join(f"{int(color[k:k + 2], 16) / 255:.3f}" for k in (0, 2, 4)) + " setrgbcolor"
+
+
+def _ps_string(text):
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def scene_to_postscript(scene):
+    x0, y0, x1, y1 = export_bounds(scene)
+    width, height = x1 - x0, y1 - y0
+    neck, back, half = ARROW_SHAPE
+    out = [
+        "%!PS-Adobe-3.0 EPSF-3.0\n",
+        f"%%BoundingBox: 0 0 {int(width + 0.999)} {int(height + 0.999)}\n",
+        "%%EndComments\n",
+        "/ellipse { matrix currentmatrix 5 1 roll translate scale 0 0 1 0 360 arc closepath setmatrix } def\n",
+        "/ctext { dup stringwidth pop 2 div neg 0 rmoveto show } def\n",
+        # Arrow head at the end of the current segment: x y angle arrow
+        f"/arrow {{ gsave 3 1 roll translate rotate newpath 0 0 moveto -{back} {half} lineto -{neck} 0 lineto "
+        f"-{back} -{half} lineto closepath fill grestore }} def\n",
+        # Scene coordinates grow downwards; flip once and draw everything in scene units.
+        f"0 {height:g} translate 1 -1 scale {-x0:g} {-y0:g} translate\n",
+        f"1 1 1 setrgbcolor {x0:g} {y0:g} {width:g} {height:g} rectfill\n",
+        "1 setlinejoin\n",
+    ]
+    for i in range(len(scene)):
+        kind, (ax, ay, bx, by), options, label = scene.item(i)
+        fill = options.get("fill", "")
+        outline = options.get("outline", "#000000")
+        line_width = options.get("width", 1)
+        if kind in (RECT, OVAL):
+            if kind == RECT:
+                path = f"newpath {ax:g} {ay:g} moveto {bx:g} {ay:g} lineto {bx:g} {by:g} lineto {ax:g} {by:g} lineto closepath"
+            else:
+                path = f"newpath {abs(bx - ax) / 2:g} {abs(by - ay) / 2:g} {(ax + bx) / 2:g} {(ay + by) / 2:g} ellipse"
+            if fill:
+                out.append(f"{path} {_ps_color(fill)} fill\n")
+            if outline:
+                out.append(f"{path} {_ps_color(outline)} {line_width:g} setlinewidth stroke\n")
+        elif kind == LINE:
+            color = _ps_color(fill or "#000000")
+            out.append(f"newpath {ax:g} {ay:g} moveto {bx:g} {by:g} lineto {color} {line_width:g} setlinewidth stroke\n")
+            arrow = options.get("arrow")
+            if arrow in (layout.ARROW_LAST, "both"):
+                out.append(f"{bx:g} {by:g} {by - ay:g} {bx - ax:g} atan arrow\n")
+            if arrow in (layout.ARROW_FIRST, "both"):
+                out.append(f"{ax:g} {ay:g} {ay - by:g} {ax - bx:g} atan arrow\n")
+        elif kind == TEXT:
+            family, size, bold, italic = _font(options)
+            out.append(f"/{PS_FONTS[bold, italic]} findfont {size:.1f} scalefont setfont {_ps_color(fill or '#000000')}\n")
+            lines = label.split("\n")
+            top = ay - (len(lines) - 1) * size * 0.6
+            for n, line in enumerate(lines):
+                # Undo the flip locally so glyphs stay upright; 0.35em drops the baseline to centre.
+                out.append(f"gsave {ax:g} {top + n * size * 1.2 + size * 0.35:g} translate 1 -1 scale 0 0 moveto {_ps_string(line)} ctext grestore\n")
+        elif kind == IMAGE:
+            xs, ys = label.native_axes()
+            cols, rows = len(xs), len(ys)
+            out.append(
+                f"gsave {ax:g} {ay:g} translate {bx - ax:g} {by - ay:g} scale /row {3 * cols} string def\n"
+                f"{cols} {rows} 8 [{cols} 0 0 {rows} 0 0] {{ currentfile row readhexstring pop }} false 3 colorimage\n"
+            )
+            for pixels in label.pixel_rows(xs, ys):
+                out.append(pixels.hex() + "\n")
+            out.append("grestore\n")
+    out.append("showpage\n%%EOF\n")
+    return "".join(out)
+
+
+def write_scene(scene, path, fmt):
+    # A file has no zoom to adapt to, so level-of-detail groups are written out in full.
+    scene = scene.flattened()
+    if fmt == "svg":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(scene_to_svg(scene))
+    elif fmt == "ps":
+        with open(path, "w", encoding="latin-1") as f:
+            f.write(scene_to_postscript(scene))
+    elif fmt == "png":
+        if cairosvg is None:
+            raise RuntimeError("PNG export needs the optional cairosvg package; use svg or ps instead.")
+        cairosvg.svg2png(bytestring=scene_to_svg(scene).encode("utf-8"), write_to=path)
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}. Use one of: {', '.join(FORMATS)}.")
+
+
+def _read(path, type_hint, raw):
+    if not raw:
+        return loader.load(path, type_hint)
+    stream = loader.open_input(path)
+    try:
+        return registry.parse(stream.read().strip(), type_hint)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def targets(paths, out_dir, fmt):
+    # One output per input, named after it; inputs sharing a name (a/x.json, b/x.csv)
+    # get -2, -3, ... in input order instead of overwriting each other.
+    taken = set()
+    names = []
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0] if path != "-" else "stdin"
+        name, n = stem, 1
+        while name in taken:
+            n += 1
+            name = f"{stem}-{n}"
+        taken.add(name)
+        names.append(os.path.join(out_dir, f"{name}.{fmt}"))
+    return names
+
+
+def export_one(task):
+    # Runs in a worker process; returns (input, output, error message or None).
+    path, type_hint, fmt, target, width, height, raw, overlay, before = task
+    try:
+        value = _read(path, type_hint, raw)
+        if before is not None:
+            # Resolved on first use so plain exports skip the graph and diff modules.
+            diff_scene = registry.resolve("diff:diff_scene")
+            scene = diff_scene(_read(before, type_hint, raw), value, type_hint, width, height)
+        else:
+            scene = layout.layout(value, type_hint, width, height, overlay)
+        write_scene(scene, target, fmt)
+    except (OSError, ParseError, RuntimeError, ValueError) as e:
+        return path, target, str(e)
+    except Exception as e:
+        # Any other failure is still this input's alone; the rest of the batch goes on.
+        return path, target, f"{type(e).__name__}: {e}"
+    return path, target, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render structure files to SVG, PostScript or PNG without a display.")
+    parser.add_argument("inputs", nargs="+", help="structure files (see loader.py for formats)")
+    parser.add_argument("--type", required=True, help="type to build from every input")
+    parser.add_argument("--format", default="svg", choices=FORMATS)
+    parser.add_argument("--out", default=".", help="output directory")
+    parser.add_argument("--raw", action="store_true", help="inputs hold text as typed into the Value box")
+    parser.add_argument("--width", type=int, default=1440)
+    parser.add_argument("--height", type=int, default=640)
+    parser.add_argument("--overlay", default="none", choices=registry.GRAPH_OVERLAYS, help="analysis drawn over directed graphs")
+    parser.add_argument("--compare", metavar="BEFORE", help="draw each input as a diff against this earlier file")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (1 renders in-process)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    tasks = [
+        (path, args.type, args.format, target, args.width, args.height, args.raw, args.overlay, args.compare)
+        for path, target in zip(args.inputs, targets(args.inputs, args.out, args.format))
+    ]
+    if args.jobs <= 1 or len(tasks) == 1:
+        failed = _report(map(export_one, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            # Hand out work in a few chunks per worker to keep inter-process traffic low.
+            failed = _report(pool.map(export_one, tasks, chunksize=max(1, len(tasks) // (args.jobs * 4))))
+    return 1 if failed else 0
+
+
+def _report(results):
+    failed = 0
+    for path, target, error in results:
+        if error is None:
+            print(target)
+        else:
+            failed += 1
+            print(f"{path}: {error}", file=sys.stderr)
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import heapq
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections import deque
+
+import loader
+from parsing import ParseError
+
+DEFAULT_PORT = 47474
+# The newest state of the followed stream is drawn at most this often, however fast
+# updates arrive; everything received in between is folded into one frame.
+FRAME_MS = 50
+LIVE_TYPES = loader.LOADABLE_TYPES
+
+
+def _pop_key(mapping, key):
+    mapping.pop(key, None)
+
+
+# Delta operations per type, as op name -> function(state, *args).
+SEQUENCE_OPS = {
+    "append": deque.append,
+    "appendleft": deque.appendleft,
+    "pop": deque.pop,
+    "popleft": deque.popleft,
+    "push": deque.append,
+    "enqueue": deque.append,
+    "dequeue": deque.popleft,
+    "set": deque.__setitem__,
+    "insert": deque.insert,
+    "delete": deque.__delitem__,
+    "clear": deque.clear,
+}
+OPS = {
+    "heap": {"push": heapq.heappush, "pop": heapq.heappop, "clear": list.clear},
+    "avl_tree": {"insert": list.append, "delete": list.remove, "clear": list.clear},
+    "set": {"add": set.add, "discard": set.discard, "clear": set.clear},
+    "dict": {"set": dict.__setitem__, "delete": _pop_key, "clear": dict.clear},
+    "directed_graph": {
+        "add_edge": lambda edges, a, b: edges.__setitem__((a, b), None),
+        "remove_edge": lambda edges, a, b: _pop_key(edges, (a, b)),
+        "clear": dict.clear,
+    },
+}
+
+
+def to_state(value_type, value):
+    # The working copy deltas are applied to: a deque for sequences so either end is O(1),
+    # a heapified list for heaps and an ordered dict of edges for graphs.
+    if value_type not in LIVE_TYPES:
+        raise ParseError(f"{value_type!r} cannot be streamed. Use one of: {', '.join(LIVE_TYPES)}.")
+    if value_type == "dict" and isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = loader.shape(value, value_type)
+    else:
+        raise ParseError(f"A {value_type} snapshot must be a JSON array.")
+    try:
+        if value_type == "heap":
+            heap = list(items)
+            heapq.heapify(heap)
+            return heap
+        if value_type == "avl_tree":
+            return list(items)
+        if value_type == "directed_graph":
+            return dict.fromkeys(items)
+        if value_type in ("set", "dict"):
+            return loader.COLLECTORS[value_type](items)
+        return deque(items)
+    except TypeError as e:
+        raise ParseError(f"Unsupported value in snapshot: {e}.")
+
+
+def to_view(value_type, state):
+    # A copy in the shape the layouts take, safe to lay out while updates keep arriving.
+    if value_type == "directed_graph":
+        return list(state)
+    if value_type == "tuple":
+        return tuple(state)
+    if value_type in ("set", "dict"):
+        return state.copy()
+    return list(state)
+
+
+def apply_ops(value_type, state, entries, name):
+    # Applies a delta's ops in order; ops before a failing one stay applied.
+    if not isinstance(entries, list):
+        raise ParseError("A delta needs an 'ops' array.")
+    ops = OPS.get(value_type, SEQUENCE_OPS)
+    for entry in entries:
+        if not isinstance(entry, list) or not entry or entry[0] not in ops:
+            raise ParseError(f"Unknown {value_type} operation {entry!r}.")
+        try:
+            ops[entry[0]](state, *entry[1:])
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            raise ParseError(f"Cannot apply {entry!r} to {name!r}: {e}")
+
+
+class Stream:
+    def __init__(self, value_type, state):
+        self.value_type = value_type
+        self.state = state
+        self.version = 0
+        # Version last handed out for drawing.
+        self.drawn = -1
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                self.server.feed.receive(line)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+class FeedServer:
+    # Receives JSON lines from FeedClient connections and keeps the latest state of each
+    # named stream. Messages are applied on the connection threads as they arrive; the
+    # Tk side only asks, once per frame, whether the stream it follows has changed.
+    def __init__(self, address=("127.0.0.1", DEFAULT_PORT)):
+        self.requested = address
+        self.streams = {}
+        # Name of the stream that changed most recently.
+        self.latest = None
+        self.messages = 0
+        self.errors = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def address(self):
+        return self._server.server_address if self._server is not None else self.requested
+
+    def start(self):
+        if isinstance(self.requested, str):
+            if _UnixServer is None:
+                raise OSError("Unix sockets are not available on this platform; listen on a TCP port instead.")
+            if os.path.exists(self.requested):
+                os.unlink(self.requested)
+            self._server = _UnixServer(self.requested, _LineHandler)
+        else:
+            self._server = _TCPServer(self.requested, _LineHandler)
+        self._server.feed = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if isinstance(self.requested, str) and os.path.exists(self.requested):
+            os.unlink(self.requested)
+
+    def receive(self, line):
+        # A bad message is counted and skipped; the connection and the stream carry on.
+        try:
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                raise ParseError("Each message must be a JSON object.")
+            self._apply(message)
+        except (ValueError, ParseError) as e:
+            with self._lock:
+                self.errors += 1
+                self.last_error = str(e)
+
+    def _apply(self, message):
+        name = str(message.get("stream", "default"))
+        op = message.get("op")
+        if op == "snapshot":
+            value_type = message.get("type")
+            # Built outside the lock: a big snapshot must not hold up the other streams.
+            state = to_state(value_type, message.get("value"))
+            with self._lock:
+                stream = self.streams.get(name)
+                if stream is None or stream.value_type != value_type:
+                    stream = self.streams[name] = Stream(value_type, state)
+                else:
+                    stream.state = state
+                    stream.version += 1
+                self.latest = name
+                self.messages += 1
+        elif op == "delta":
+            with self._lock:
+                stream = self.streams.get(name)
+                if stream is None:
+                    raise ParseError(f"Stream {name!r} has no snapshot yet; send one before any delta.")
+                try:
+                    apply_ops(stream.value_type, stream.state, message.get("ops"), name)
+                finally:
+                    # Operations before a failing one have been applied.
+                    stream.version += 1
+                    self.latest = name
+                self.messages += 1
+        else:
+            raise ParseError(f"Unknown message op {op!r}; use 'snapshot' or 'delta'.")
+
+    def pending(self, name=None):
+        # (stream, type) when the stream (or the latest one) has changed since it was last
+        # taken, else None.
+        with self._lock:
+            if name is None:
+                name = self.latest
+            stream = self.streams.get(name)
+            if stream is None or stream.drawn == stream.version:
+                return None
+            return name, stream.value_type
+
+    def take(self, name):
+        with self._lock:
+            stream = self.streams[name]
+            stream.drawn = stream.version
+            return stream.value_type, to_view(stream.value_type, stream.state)
+
+    def names(self):
+        with self._lock:
+            return sorted(self.streams)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "streams": len(self.streams),
+                "messages": self.messages,
+                "errors": self.errors,
+                "last_error": self.last_error,
+            }
+
+
+class FeedClient:
+    # Pushes values from another process to a visualizer listening with FeedServer.
+    def __init__(self, address=("127.0.0.1", DEFAULT_PORT)):
+        if isinstance(address, str):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(address)
+        else:
+            self._sock = socket.create_connection(address)
+        self._file = self._sock.makefile("wb")
+
+    def snapshot(self, stream, value_type, value):
+        self._send({"op": "snapshot", "stream": stream, "type": value_type, "value": value})
+
+    def delta(self, stream, *ops):
+        # Each op is a sequence like ("append", 5) or ("add_edge", "A", "B").
+        self._send({"op": "delta", "stream": stream, "ops": [list(op) for op in ops]})
+
+    def _send(self, message):
+        # Sets, tuples and deques go out as JSON arrays.
+        self._file.write(json.dumps(message, default=list).encode("utf-8") + b"\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,181 @@
+import math
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Repulsion is computed particle-mesh style on a square grid of this many cells per side,
+# picked from the node count; far nodes push through an FFT convolution of the mesh.
+MIN_GRID = 16
+MAX_GRID = 128
+# Without NumPy the exact O(n²) loop is only affordable for small graphs.
+PURE_PYTHON_MAX_NODES = 200
+
+
+class ForceLayout:
+    def __init__(self, edge_length=120, iterations=60, warm_iterations=25, seed=0):
+        self.edge_length = edge_length
+        self.iterations = iterations
+        self.warm_iterations = warm_iterations
+        self.seed = seed
+        # Last computed position per node label, used to warm-start the next run.
+        self.positions = {}
+
+    def available(self, num_nodes):
+        return np is not None or num_nodes <= PURE_PYTHON_MAX_NODES
+
+    def layout(self, nodes, edges):
+        index = {node: i for i, node in enumerate(nodes)}
+        src = [index[a] for a, b in edges if a in index and b in index and a != b]
+        dst = [index[b] for a, b in edges if a in index and b in index and a != b]
+        xs, ys, warm = self._initial_positions(nodes, src, dst)
+        iterations = self.warm_iterations if warm else self.iterations
+        if np is not None:
+            xs, ys = _run_numpy(xs, ys, src, dst, self.edge_length, iterations, warm)
+        else:
+            xs, ys = _run_python(xs, ys, src, dst, self.edge_length, iterations, warm)
+        self.positions = {node: (xs[i], ys[i]) for i, node in enumerate(nodes)}
+        return self.positions
+
+    def _initial_positions(self, nodes, src, dst):
+        rng = random.Random(self.seed)
+        n = len(nodes)
+        spread = self.edge_length * math.sqrt(n)
+        previous = self.positions
+        known = [node in previous for node in nodes]
+        warm = n > 0 and sum(known) * 2 >= n
+
+        xs = [0.0] * n
+        ys = [0.0] * n
+        for i, node in enumerate(nodes):
+            if known[i]:
+                xs[i], ys[i] = previous[node]
+            else:
+                xs[i] = rng.uniform(-spread / 2, spread / 2)
+                ys[i] = rng.uniform(-spread / 2, spread / 2)
+        if warm:
+            # New nodes start next to an already placed neighbour instead of at random.
+            for a, b in zip(src + dst, dst + src):
+                if not known[a] and known[b]:
+                    xs[a] = xs[b] + rng.uniform(-1, 1) * self.edge_length
+                    ys[a] = ys[b] + rng.uniform(-1, 1) * self.edge_length
+                    known[a] = True
+        return xs, ys, warm
+
+
+def _run_numpy(xs, ys, src, dst, k, iterations, warm):
+    n = len(xs)
+    x = np.asarray(xs, dtype=float)
+    y = np.asarray(ys, dtype=float)
+    src = np.asarray(src, dtype=np.intp)
+    dst = np.asarray(dst, dtype=np.intp)
+    k2 = k * k
+    temperature = k * (2 if warm else math.sqrt(n) / 2 + 2)
+    cooling = temperature / (iterations + 1)
+    grid = min(MAX_GRID, max(MIN_GRID, 1 << int(math.log2(max(1.0, math.sqrt(n))))))
+    kernel = _repulsion_kernel(grid)
+
+    for _ in range(iterations):
+        disp_x, disp_y = _repulsion_numpy(x, y, k2, grid, kernel)
+
+        if len(src):
+            dx = x[dst] - x[src]
+            dy = y[dst] - y[src]
+            pull = np.hypot(dx, dy) / k
+            dx *= pull
+            dy *= pull
+            disp_x += np.bincount(src, weights=dx, minlength=n) - np.bincount(dst, weights=dx, minlength=n)
+            disp_y += np.bincount(src, weights=dy, minlength=n) - np.bincount(dst, weights=dy, minlength=n)
+
+        # Mild gravity keeps disconnected components from drifting apart forever.
+        disp_x -= (x - x.mean()) * 0.01
+        disp_y -= (y - y.mean()) * 0.01
+
+        length = np.hypot(disp_x, disp_y) + 1e-9
+        step = np.minimum(length, temperature) / length
+        x += disp_x * step
+        y += disp_y * step
+        temperature = max(temperature - cooling, k * 0.05)
+
+    return x.tolist(), y.tolist()
+
+
+def _repulsion_kernel(grid):
+    # Fourier transform of the unit-cell repulsion field r / |r|², zero-padded to 2G
+    # so the circular convolution behaves like a linear one.
+    size = 2 * grid
+    offsets = np.fft.fftfreq(size, 1.0 / size)
+    dx, dy = np.meshgrid(offsets, offsets, indexing="ij")
+    r2 = dx * dx + dy * dy
+    r2[0, 0] = np.inf
+    return np.fft.rfft2(dx / r2), np.fft.rfft2(dy / r2)
+
+
+def _repulsion_numpy(x, y, k2, grid, kernel):
+    x0, y0 = x.min(), y.min()
+    cell_size = max(x.max() - x0, y.max() - y0, 1e-9) / grid
+    cx = np.minimum((x - x0) / cell_size, grid - 1).astype(np.intp)
+    cy = np.minimum((y - y0) / cell_size, grid - 1).astype(np.intp)
+    cell = cx * grid + cy
+
+    # Far field: spread node mass on the mesh and convolve with the repulsion kernel.
+    mass = np.bincount(cell, minlength=grid * grid).astype(float)
+    shape = (2 * grid, 2 * grid)
+    spectrum = np.fft.rfft2(mass.reshape(grid, grid), s=shape)
+    scale = k2 / cell_size
+    disp_x = np.fft.irfft2(spectrum * kernel[0], s=shape)[:grid, :grid].ravel()[cell] * scale
+    disp_y = np.fft.irfft2(spectrum * kernel[1], s=shape)[:grid, :grid].ravel()[cell] * scale
+
+    # Near field: push away from the centroid of the other nodes sharing the cell.
+    others = mass[cell] - 1
+    idx = np.nonzero(others > 0)[0]
+    if len(idx):
+        count = others[idx]
+        dx = x[idx] - (np.bincount(cell, weights=x, minlength=grid * grid)[cell[idx]] - x[idx]) / count
+        dy = y[idx] - (np.bincount(cell, weights=y, minlength=grid * grid)[cell[idx]] - y[idx]) / count
+        push = k2 * count / (dx * dx + dy * dy + 1e-9)
+        disp_x[idx] += dx * push
+        disp_y[idx] += dy * push
+
+    return disp_x, disp_y
+
+
+def _run_python(xs, ys, src, dst, k, iterations, warm):
+    n = len(xs)
+    xs, ys = list(xs), list(ys)
+    k2 = k * k
+    temperature = k * (2 if warm else math.sqrt(n) / 2 + 2)
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        dx = [0.0] * n
+        dy = [0.0] * n
+        for i in range(n):
+            xi, yi = xs[i], ys[i]
+            for j in range(i + 1, n):
+                ddx, ddy = xi - xs[j], yi - ys[j]
+                f = k2 / (ddx * ddx + ddy * ddy + 1e-9)
+                dx[i] += ddx * f
+                dy[i] += ddy * f
+                dx[j] -= ddx * f
+                dy[j] -= ddy * f
+        for a, b in zip(src, dst):
+            ddx, ddy = xs[b] - xs[a], ys[b] - ys[a]
+            f = math.hypot(ddx, ddy) / k
+            dx[a] += ddx * f
+            dy[a] += ddy * f
+            dx[b] -= ddx * f
+            dy[b] -= ddy * f
+        mx, my = sum(xs) / n, sum(ys) / n
+        for i in range(n):
+            ddx = dx[i] - (xs[i] - mx) * 0.01
+            ddy = dy[i] - (ys[i] - my) * 0.01
+            length = math.hypot(ddx, ddy) + 1e-9
+            step = min(length, temperature) / length
+            xs[i] += ddx * step
+            ys[i] += ddy * step
+        temperature = max(temperature - cooling, k * 0.05)
+
+    return xs, ys
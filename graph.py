@@ -0,0 +1,245 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# The graph of the most recent input, so switching overlays does not rebuild the index.
+_last = (None, None)
+
+
+def label_order(label):
+    # Sort key for node labels that may mix types (1 and "a"): by type name, then value.
+    return type(label).__name__, label
+
+
+def _int_array(values):
+    out = array("i")
+    out.frombytes(values.astype(np.int32).tobytes())
+    return out
+
+
+class Graph:
+    # Compressed sparse rows: the successors of node v are targets[offsets[v]:offsets[v + 1]],
+    # and edge_ids[p] is the input position of the edge stored at p.
+    def __init__(self, labels, src, dst, offsets, targets, edge_ids):
+        self.labels = labels
+        self.src = src
+        self.dst = dst
+        self.offsets = offsets
+        self.targets = targets
+        self.edge_ids = edge_ids
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def edge_count(self):
+        return len(self.src)
+
+    @classmethod
+    def from_edges(cls, edges, labels=None):
+        if labels is None:
+            labels = sorted(set(node for edge in edges for node in edge), key=label_order)
+        index = {label: i for i, label in enumerate(labels)}
+        src = array("i", [index[a] for a, b in edges])
+        dst = array("i", [index[b] for a, b in edges])
+        n, m = len(labels), len(src)
+        if np is not None and m:
+            s = np.frombuffer(src, dtype=np.int32)
+            d = np.frombuffer(dst, dtype=np.int32)
+            order = np.argsort(s, kind="stable")
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(s, minlength=n), out=offsets[1:])
+            return cls(labels, src, dst, _int_array(offsets), _int_array(d[order]), _int_array(order))
+
+        # Counting sort by source; edges keep their input order within a row.
+        offsets = array("i", bytes(4 * (n + 1)))
+        for s in src:
+            offsets[s + 1] += 1
+        for v in range(n):
+            offsets[v + 1] += offsets[v]
+        cursor = array("i", offsets[:n])
+        targets = array("i", bytes(4 * m))
+        edge_ids = array("i", bytes(4 * m))
+        for e in range(m):
+            s = src[e]
+            p = cursor[s]
+            targets[p] = dst[e]
+            edge_ids[p] = e
+            cursor[s] = p + 1
+        return cls(labels, src, dst, offsets, targets, edge_ids)
+
+    @classmethod
+    def for_edges(cls, edges, labels=None):
+        # Built once per input: parsed values come back from the cache as the same object.
+        global _last
+        cached_edges, graph = _last
+        if cached_edges is not edges:
+            graph = cls.from_edges(edges, labels)
+            _last = (edges, graph)
+        return graph
+
+    def bfs(self, start):
+        # Hop distance from start (-1 if unreachable) and the edge each node was reached by.
+        n = len(self)
+        offsets, targets, edge_ids = self.offsets, self.targets, self.edge_ids
+        dist = array("i", [-1]) * n
+        via = array("i", [-1]) * n
+        order = array("i", [start])
+        dist[start] = 0
+        head = 0
+        while head < len(order):
+            v = order[head]
+            head += 1
+            step = dist[v] + 1
+            for p in range(offsets[v], offsets[v + 1]):
+                w = targets[p]
+                if dist[w] < 0:
+                    dist[w] = step
+                    via[w] = edge_ids[p]
+                    order.append(w)
+        return dist, via
+
+    def dfs(self, start):
+        # Discovery order of a depth-first forest rooted at start, then at any node still
+        # unvisited, and the tree edge each node was discovered by.
+        n = len(self)
+        offsets, targets, edge_ids = self.offsets, self.targets, self.edge_ids
+        discovered = array("i", [-1]) * n
+        via = array("i", [-1]) * n
+        counter = 0
+        for root in [start] + list(range(n)):
+            if discovered[root] >= 0:
+                continue
+            discovered[root] = counter
+            counter += 1
+            stack = [(root, offsets[root])]
+            while stack:
+                v, p = stack[-1]
+                end = offsets[v + 1]
+                while p < end and discovered[targets[p]] >= 0:
+                    p += 1
+                if p == end:
+                    stack.pop()
+                    continue
+                w = targets[p]
+                stack[-1] = (v, p + 1)
+                discovered[w] = counter
+                counter += 1
+                via[w] = edge_ids[p]
+                stack.append((w, offsets[w]))
+        return discovered, via
+
+    def topological_order(self):
+        # Kahn's algorithm; None when the graph has a cycle.
+        n = len(self)
+        offsets, targets = self.offsets, self.targets
+        indegree = array("i", bytes(4 * n))
+        for w in targets:
+            indegree[w] += 1
+        order = array("i", [v for v in range(n) if indegree[v] == 0])
+        head = 0
+        while head < len(order):
+            v = order[head]
+            head += 1
+            for p in range(offsets[v], offsets[v + 1]):
+                w = targets[p]
+                indegree[w] -= 1
+                if indegree[w] == 0:
+                    order.append(w)
+        return order if len(order) == n else None
+
+    def find_cycle(self):
+        # One directed cycle as (nodes, edge ids) in order, or None for a DAG.
+        n = len(self)
+        offsets, targets, edge_ids = self.offsets, self.targets, self.edge_ids
+        # 0 = unvisited, 1 = on the current path, 2 = finished
+        state = bytearray(n)
+        via = array("i", [-1]) * n
+        for root in range(n):
+            if state[root]:
+                continue
+            state[root] = 1
+            stack = [(root, offsets[root])]
+            while stack:
+                v, p = stack[-1]
+                if p == offsets[v + 1]:
+                    state[v] = 2
+                    stack.pop()
+                    continue
+                stack[-1] = (v, p + 1)
+                w = targets[p]
+                if state[w] == 1:
+                    # Back edge v → w closes a cycle; walk the path back from v to w.
+                    nodes, edges = [], [edge_ids[p]]
+                    u = v
+                    while u != w:
+                        nodes.append(u)
+                        edges.append(via[u])
+                        u = self.src[via[u]]
+                    nodes.append(w)
+                    nodes.reverse()
+                    edges.reverse()
+                    return nodes, edges
+                if state[w] == 0:
+                    state[w] = 1
+                    via[w] = edge_ids[p]
+                    stack.append((w, offsets[w]))
+        return None
+
+    def strongly_connected(self):
+        # Tarjan's algorithm without recursion: component id per node and the count.
+        # Components are numbered in reverse topological order of the condensation.
+        n = len(self)
+        offsets, targets = self.offsets, self.targets
+        index = array("i", [-1]) * n
+        low = array("i", bytes(4 * n))
+        on_stack = bytearray(n)
+        component = array("i", [-1]) * n
+        stack = []
+        counter = 0
+        count = 0
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            calls = [(root, offsets[root])]
+            while calls:
+                v, p = calls[-1]
+                end = offsets[v + 1]
+                descended = False
+                while p < end:
+                    w = targets[p]
+                    p += 1
+                    if index[w] < 0:
+                        calls[-1] = (v, p)
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = 1
+                        calls.append((w, offsets[w]))
+                        descended = True
+                        break
+                    if on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                if descended:
+                    continue
+                calls.pop()
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        component[w] = count
+                        if w == v:
+                            break
+                    count += 1
+                if calls:
+                    u = calls[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+        return component, count
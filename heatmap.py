@@ -0,0 +1,158 @@
+import math
+
+import labels
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Palette levels 0..254 map values low → high; level 255 marks a non-numeric cell.
+MISSING = 255
+MISSING_COLOR = (209, 213, 219)
+_ANCHORS = [(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)]
+
+
+def _palette():
+    colors = []
+    for level in range(MISSING):
+        t = level / (MISSING - 1) * (len(_ANCHORS) - 1)
+        i = min(int(t), len(_ANCHORS) - 2)
+        f = t - i
+        a, b = _ANCHORS[i], _ANCHORS[i + 1]
+        colors.append(tuple(round(a[c] + (b[c] - a[c]) * f) for c in range(3)))
+    colors.append(MISSING_COLOR)
+    return colors
+
+
+PALETTE = _palette()
+PALETTE_BYTES = [bytes(color) for color in PALETTE]
+PALETTE_HEX = ["#%02x%02x%02x" % color for color in PALETTE]
+
+
+def _number(item):
+    if isinstance(item, bool):
+        return float(item)
+    if isinstance(item, (int, float)) and math.isfinite(item):
+        return float(item)
+    return None
+
+
+class Heatmap:
+    def __init__(self, matrix, x0, y0, cell, font):
+        self.matrix = matrix
+        self.rows = len(matrix)
+        self.cols = max((len(row) for row in matrix), default=0)
+        self.x0 = x0
+        self.y0 = y0
+        self.cell = cell
+        self.font = font
+        self.levels = self._levels()
+
+    @property
+    def bounds(self):
+        return self.x0, self.y0, self.x0 + self.cols * self.cell, self.y0 + self.rows * self.cell
+
+    def _levels(self):
+        if np is not None:
+            try:
+                values = np.array(self.matrix, dtype=float)
+            except (TypeError, ValueError):
+                values = None
+            # Ragged or non-numeric matrices take the per-cell path below.
+            if values is not None and values.shape == (self.rows, self.cols):
+                return self._levels_numpy(values)
+        numbers = [[_number(item) for item in row] for row in self.matrix]
+        present = [v for row in numbers for v in row if v is not None]
+        lo, hi = (min(present), max(present)) if present else (0.0, 0.0)
+        self.low, self.high = lo, hi
+        scale = (MISSING - 1) / (hi - lo) if hi > lo else 0.0
+        levels = []
+        for row in numbers:
+            line = bytearray([MISSING]) * self.cols
+            for c, v in enumerate(row):
+                if v is not None:
+                    line[c] = int((v - lo) * scale)
+            levels.append(line)
+        if np is not None:
+            return np.frombuffer(b"".join(levels), dtype=np.uint8).reshape(self.rows, self.cols)
+        return levels
+
+    def _levels_numpy(self, values):
+        finite = np.isfinite(values)
+        present = values[finite]
+        lo, hi = (float(present.min()), float(present.max())) if present.size else (0.0, 0.0)
+        self.low, self.high = lo, hi
+        scale = (MISSING - 1) / (hi - lo) if hi > lo else 0.0
+        levels = np.full(values.shape, MISSING, dtype=np.uint8)
+        levels[finite] = ((present - lo) * scale).astype(np.uint8)
+        return levels
+
+    def nbytes(self):
+        # The matrix belongs to the parsed value and is accounted for there.
+        if np is not None:
+            return int(self.levels.nbytes)
+        return sum(len(line) for line in self.levels)
+
+    def value_at(self, row, col):
+        line = self.matrix[row]
+        return line[col] if col < len(line) else None
+
+    def cell_at(self, x, y):
+        col = int((x - self.x0) // self.cell)
+        row = int((y - self.y0) // self.cell)
+        if 0 <= row < self.rows and 0 <= col < self.cols and col < len(self.matrix[row]):
+            return row, col
+        return None
+
+    def pixel_rows(self, xs, ys):
+        # One RGB byte string per output row; xs/ys are the scene coordinates sampled by
+        # each output column/row.
+        cols = [min(self.cols - 1, max(0, int((x - self.x0) // self.cell))) for x in xs]
+        rows = [min(self.rows - 1, max(0, int((y - self.y0) // self.cell))) for y in ys]
+        if np is not None:
+            palette = np.array(PALETTE, dtype=np.uint8)
+            pixels = palette[self.levels[np.ix_(rows, cols)]]
+            return [line.tobytes() for line in pixels]
+        lines = []
+        cache = {}
+        for r in rows:
+            line = cache.get(r)
+            if line is None:
+                levels = self.levels[r]
+                line = cache[r] = b"".join([PALETTE_BYTES[levels[c]] for c in cols])
+            lines.append(line)
+        return lines
+
+    def ppm(self, xs, ys):
+        return b"P6 %d %d 255\n" % (len(xs), len(ys)) + b"".join(self.pixel_rows(xs, ys))
+
+    def native_axes(self):
+        # Sample points hitting every cell exactly once, for full-resolution exports.
+        xs = [self.x0 + (c + 0.5) * self.cell for c in range(self.cols)]
+        ys = [self.y0 + (r + 0.5) * self.cell for r in range(self.rows)]
+        return xs, ys
+
+    def cells_into(self, scene, x0, y0, x1, y1):
+        # Exact boxes for the cells inside the given scene rectangle, keyed by (row, col).
+        c0 = max(0, int((x0 - self.x0) // self.cell))
+        c1 = min(self.cols - 1, int((x1 - self.x0) // self.cell))
+        r0 = max(0, int((y0 - self.y0) // self.cell))
+        r1 = min(self.rows - 1, int((y1 - self.y0) // self.cell))
+        inset = self.cell * 0.08
+        font = (self.font[0], self.cell * 0.3) + tuple(self.font[2:])
+        dark_text = scene.style(font=font, fill="#111827")
+        light_text = scene.style(font=font, fill="#f9fafb")
+        for r in range(r0, r1 + 1):
+            line = self.matrix[r]
+            levels = self.levels[r]
+            for c in range(c0, min(c1 + 1, len(line))):
+                level = int(levels[c])
+                bx = self.x0 + c * self.cell
+                by = self.y0 + r * self.cell
+                scene.rect(bx + inset, by + inset, bx + self.cell - inset, by + self.cell - inset,
+                           scene.style(fill=PALETTE_HEX[level], outline="#1d4ed8", width=1), key=(r, c))
+                red, green, blue = PALETTE[level]
+                style = dark_text if red * 0.3 + green * 0.59 + blue * 0.11 > 140 else light_text
+                label = labels.fit(str(line[c]), font, self.cell - 2 * inset)
+                scene.text(bx + self.cell / 2, by + self.cell / 2, label, style, key=(r, c))
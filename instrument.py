@@ -0,0 +1,101 @@
+import cProfile
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# The Metrics a thread is currently reporting to; layouts and the scene call phase()
+# without knowing whether anyone is listening.
+_local = threading.local()
+
+
+class Metrics:
+    def __init__(self, label, profile=False):
+        self.label = label
+        self.profile = profile
+        self.phases = {}
+        self.counts = {}
+        self.profiles = []
+        self.total = None
+        self._started = time.perf_counter()
+        self._stack = []
+
+    @contextmanager
+    def active(self):
+        # Phases recorded on this thread go here until the block ends. A render runs on the
+        # worker thread first and then on the Tk thread, so it is activated once on each.
+        previous = getattr(_local, "metrics", None)
+        _local.metrics = self
+        profiler = None
+        if self.profile:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler already owns the interpreter.
+                profiler = None
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self.profiles.append(profiler)
+            _local.metrics = previous
+
+    @contextmanager
+    def phase(self, name):
+        # Phases nest (build runs inside layout); each keeps only its own time so the
+        # phases add up to the whole instead of counting the inner ones twice.
+        inner = [0.0]
+        self._stack.append(inner)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - inner[0]
+
+    def finish(self):
+        self.total = time.perf_counter() - self._started
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "total_s": self.total,
+            "phases_s": dict(self.phases),
+            "counts": self.counts,
+        }
+
+    def lines(self):
+        lines = [self.label]
+        if self.total is not None:
+            lines.append(f"total {self.total * 1000:.1f} ms")
+        if self.phases:
+            lines.append("  ".join(f"{name} {seconds * 1000:.1f}" for name, seconds in self.phases.items()) + " ms")
+        return lines
+
+    def dump_profile(self, path):
+        if not self.profiles:
+            raise ValueError("This render was not profiled; turn on profiling and visualize again.")
+        stats = pstats.Stats(self.profiles[0])
+        for profiler in self.profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+
+
+def current():
+    return getattr(_local, "metrics", None)
+
+
+@contextmanager
+def phase(name):
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    with metrics.phase(name):
+        yield
+
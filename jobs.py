@@ -0,0 +1,94 @@
+import queue
+import threading
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, job_id, messages):
+        self.id = job_id
+        self._messages = messages
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def progress(self, phase):
+        self.check()
+        self._messages.put(("progress", self.id, phase))
+
+
+class JobRunner:
+    # How often the Tk loop drains worker messages while a job is running.
+    POLL_MS = 30
+
+    def __init__(self, root, on_done, on_error, on_progress):
+        self.root = root
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.messages = queue.Queue()
+        self.current = None
+        self._next_id = 0
+        self._poll_id = None
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    def submit(self, fn, *args):
+        # Only the newest job may report back; anything older is cancelled and ignored.
+        self.cancel()
+        self._next_id += 1
+        job = Job(self._next_id, self.messages)
+        self.current = job
+        threading.Thread(target=self._run, args=(job, fn, args), daemon=True).start()
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_MS, self._poll)
+        return job
+
+    def cancel(self):
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    def _run(self, job, fn, args):
+        try:
+            result = fn(job, *args)
+            job.check()
+        except JobCancelled:
+            return
+        except Exception as e:
+            self.messages.put(("error", job.id, e))
+            return
+        self.messages.put(("done", job.id, result))
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                kind, job_id, payload = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if self.current is None or job_id != self.current.id:
+                continue
+            if kind == "progress":
+                self.on_progress(payload)
+            else:
+                self.current = None
+                if kind == "done":
+                    self.on_done(payload)
+                else:
+                    self.on_error(payload)
+        if self.current is not None:
+            self._poll_id = self.root.after(self.POLL_MS, self._poll)
@@ -0,0 +1,114 @@
+import string
+import threading
+import unicodedata
+
+ELLIPSIS = "…"
+# Room kept between a label and the edge of its shape, on each side.
+LABEL_PADDING = 3
+# Measured with the real font on the Tk thread before any layout runs.
+WARM_CHARS = string.ascii_letters + string.digits + string.punctuation + " " + ELLIPSIS
+# Strings remembered per font; the table starts over when it fills up.
+MAX_STRINGS = 200_000
+# Tk font sizes are points when positive and pixels when negative.
+PIXELS_PER_POINT = 96 / 72
+# Advance widths in em for characters measured without Tk (exports, benchmarks, workers
+# meeting a character the warm-up did not cover).
+NARROW = set("iljI.,:;|!'`()[]{} ")
+WIDE = set("mwMW@%&")
+
+
+class FontMetrics:
+    # Advance widths for one font, per glyph and per whole string. Tk can only measure on
+    # its own thread, so the glyph table is filled there once and layouts on worker
+    # threads add up glyph widths instead of asking Tk; kerning is ignored.
+    def __init__(self, font):
+        self.font = font
+        size = font[1] if len(font) > 1 else 10
+        self.em = -size if size < 0 else size * PIXELS_PER_POINT
+        self.glyphs = {}
+        self.strings = {}
+        # (text, max_width) -> fitted label
+        self.fits = {}
+
+    def warm(self, measure, chars=WARM_CHARS):
+        self.glyphs.update((ch, measure(ch)) for ch in chars)
+        self.strings = {}
+        self.fits = {}
+
+    def _estimate(self, ch):
+        if unicodedata.combining(ch):
+            return 0
+        if unicodedata.east_asian_width(ch) in "WF":
+            return self.em
+        if ch in NARROW:
+            return self.em * 0.3
+        if ch in WIDE:
+            return self.em * 0.85
+        return self.em * (0.62 if ch.isupper() else 0.55)
+
+    def glyph(self, ch):
+        width = self.glyphs.get(ch)
+        if width is None:
+            width = self.glyphs[ch] = self._estimate(ch)
+        return width
+
+    def width(self, text):
+        width = self.strings.get(text)
+        if width is None:
+            if len(self.strings) >= MAX_STRINGS:
+                self.strings = {}
+            glyphs = self.glyphs
+            width = 0
+            for ch in text:
+                w = glyphs.get(ch)
+                width += self.glyph(ch) if w is None else w
+            self.strings[text] = width
+        return width
+
+    def fit(self, text, max_width):
+        # The text itself if it fits, else its longest prefix that fits with an ellipsis.
+        # A glyph is at least a pixel wide, so longer strings cannot fit and are not
+        # measured (or remembered) in full.
+        if len(text) > max_width:
+            return self._cut(text, max_width)
+        key = (text, max_width)
+        fitted = self.fits.get(key)
+        if fitted is None:
+            if len(self.fits) >= MAX_STRINGS:
+                self.fits = {}
+            fitted = self.fits[key] = text if self.width(text) <= max_width else self._cut(text, max_width)
+        return fitted
+
+    def _cut(self, text, max_width):
+        budget = max_width - self.glyph(ELLIPSIS)
+        if budget < 0:
+            return ""
+        used = 0
+        for i, ch in enumerate(text):
+            used += self.glyph(ch)
+            if used > budget:
+                return text[:i] + ELLIPSIS
+        return text
+
+
+_metrics = {}
+_lock = threading.Lock()
+
+
+def metrics(font):
+    found = _metrics.get(font)
+    if found is None:
+        with _lock:
+            found = _metrics.setdefault(font, FontMetrics(font))
+    return found
+
+
+def warm(font, measure):
+    # measure(text) -> pixels, e.g. tkinter.font.Font(font=font).measure; Tk thread only.
+    metrics(font).warm(measure)
+
+
+def fit(text, font, width):
+    # Label for a shape width pixels wide at zoom 1; fonts scale with the zoom, so the
+    # same label fits at any zoom.
+    return metrics(font).fit(text, width - 2 * LABEL_PADDING)
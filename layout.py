@@ -0,0 +1,425 @@
+import math
+from array import array
+
+import instrument
+import labels
+import registry
+from lod import ChainDetail, TreeDetail
+from parsing import ParseError
+from scene import Scene
+from tidy import tidy_tree
+from tree import NIL, build_binary_tree_store, build_avl_tree_store
+
+# Tk arrow option values; kept as plain strings so layouts never import tkinter.
+ARROW_FIRST = "first"
+ARROW_LAST = "last"
+
+TITLE_FONT = ("Segoe UI", 20, "bold")
+LABEL_FONT = ("Segoe UI", 11)
+
+# Minimum horizontal gap between neighbouring tree nodes on the same level.
+NODE_GAP = 10
+NODE_RADIUS = 25
+LEVEL_HEIGHT = 80
+# Widest label that stays inside a node circle: the chord half a text line off its centre.
+NODE_LABEL_WIDTH = 2 * math.sqrt(NODE_RADIUS ** 2 - 8 ** 2)
+# Scene y of the root; titles sit above it.
+TREE_TOP = 100
+
+# 2D lists with more cells than this are drawn as one raster heatmap instead of boxes.
+HEATMAP_MIN_CELLS = 2500
+# Trees and linked lists with more nodes than this are drawn at the level of detail the
+# view calls for, with summary boxes standing in for what is too small to see.
+LOD_MIN_NODES = 2000
+
+
+def layout(value, value_type, width, height, overlay="none"):
+    spec = registry.get(value_type)
+    layout_fn = spec.handler("layout")
+    scene = Scene(width, height)
+    if spec.builder is not None:
+        with instrument.phase("build"):
+            value = spec.handler("builder")(value)
+    with instrument.phase("layout"):
+        if spec.overlays:
+            layout_fn(scene, value, value_type, overlay=overlay)
+        else:
+            layout_fn(scene, value, value_type)
+    return scene
+
+
+def error_scene(msg, width, height):
+    scene = Scene(width, height)
+    add_error(scene, msg)
+    return scene
+
+
+def add_error(scene, msg):
+    scene.text(scene.center_x, 230, msg, scene.style(fill="#ef4444", font=("Segoe UI", 20, "bold"), justify="center"), key="error")
+
+
+def add_title(scene, title):
+    scene.text(scene.center_x, 40, title, scene.style(font=TITLE_FONT), key="title")
+
+
+def layout_default(scene, value, value_type):
+    cx = scene.center_x
+    scene.rect(cx - 140, 180, cx + 140, 270, scene.style(fill="#f3f4f6", outline="#d1d5db", width=2), key="box")
+    scene.text(cx, 205, f"Type: {value_type}", scene.style(font=("Segoe UI", 13, "bold")), key="type")
+    scene.text(cx, 240, labels.fit(f"Value: {str(value)}", LABEL_FONT, 280), scene.style(font=LABEL_FONT), key="value")
+
+
+def sequence_length(value):
+    try:
+        return len(value)
+    except OverflowError:
+        # A range longer than sys.maxsize cannot report len(), but its length is plain arithmetic.
+        step = value.step
+        return max(0, (value.stop - value.start + step - (1 if step > 0 else -1)) // step)
+
+
+class SequenceView:
+    box_width = 60
+    spacing = 10
+
+    def __init__(self, value, value_type, width):
+        self.value = value
+        self.value_type = value_type
+        self.length = sequence_length(value)
+        self.window = max(1, (width - 40 + self.spacing) // (self.box_width + self.spacing))
+        self.start = 0
+
+    def scroll_to(self, index):
+        self.start = max(0, min(index, self.length - self.window))
+
+    def fraction(self):
+        if not self.length:
+            return 0.0, 1.0
+        return self.start / self.length, min(1.0, (self.start + self.window) / self.length)
+
+    def visible_items(self):
+        # Slicing a range is O(1) and a list or tuple slice only copies the window.
+        return self.value[self.start:min(self.start + self.window, self.length)]
+
+    def layout(self, width, height):
+        scene = Scene(width, height)
+        self.layout_into(scene)
+        return scene
+
+    def layout_into(self, scene):
+        add_title(scene, f"Type: {self.value_type}")
+        if self.value_type == "range":
+            if not self.length:
+                scene.text(scene.center_x, scene.center_y, "Empty range", scene.style(font=("Segoe UI", 14, "italic")), key="empty")
+                return
+            box_style = scene.style(fill="#fde68a", outline="#b45309", width=2)
+        else:
+            box_style = scene.style(fill="#bfdbfe", outline="#1d4ed8", width=2)
+        label_style = scene.style(font=LABEL_FONT)
+        note_style = scene.style(font=("Segoe UI", 9), fill="#6b7280")
+
+        items = self.visible_items()
+        step = self.box_width + self.spacing
+        y = scene.center_y - self.box_width // 2
+        total_width = len(items) * step - self.spacing
+        start_x = scene.center_x - total_width // 2
+
+        if self.length > len(items):
+            last = self.start + len(items) - 1
+            scene.text(scene.center_x, 80, f"Length: {self.length:,}   showing [{self.start:,} … {last:,}]", note_style, key="length")
+            more_style = scene.style(font=("Segoe UI", 16))
+            if self.start > 0:
+                scene.text(start_x - 15, y + 30, "...", more_style, key="more-left")
+            if last < self.length - 1:
+                scene.text(start_x + total_width + 15, y + 30, "...", more_style, key="more-right")
+        else:
+            scene.text(scene.center_x, 80, f"Length: {self.length:,}", note_style, key="length")
+
+        for i, item in enumerate(items):
+            index = self.start + i
+            x0 = start_x + i * step
+            x1 = x0 + self.box_width
+            scene.rect(x0, y, x1, y + 60, box_style, key=index)
+            scene.text((x0 + x1) // 2, y + 30, labels.fit(str(item), LABEL_FONT, self.box_width), label_style, key=index)
+            scene.text((x0 + x1) // 2, y + 72, str(index), note_style, key=("index", index))
+
+
+def layout_list(scene, value, value_type):
+    if not (isinstance(value, list) and value and all(isinstance(row, list) for row in value)):
+        SequenceView(value, value_type, scene.width).layout_into(scene)
+        return
+
+    add_title(scene, f"Type: {value_type}")
+    if sum(len(row) for row in value) > HEATMAP_MIN_CELLS:
+        layout_heatmap(scene, value)
+        return
+    box_style = scene.style(fill="#bfdbfe", outline="#1d4ed8", width=2)
+    label_style = scene.style(font=LABEL_FONT)
+
+    box_size = 50
+    spacing = 10
+    num_rows = len(value)
+    num_cols = max(len(row) for row in value)
+
+    total_width = num_cols * (box_size + spacing) - spacing
+    total_height = num_rows * (box_size + spacing) - spacing
+
+    # Anything bigger than the canvas starts at the top-left corner; pan to see the rest.
+    start_x = max(20, scene.center_x - total_width // 2)
+    start_y = max(80, scene.center_y - total_height // 2)
+
+    for row_idx, row in enumerate(value):
+        for col_idx, item in enumerate(row):
+            x0 = start_x + col_idx * (box_size + spacing)
+            y0 = start_y + row_idx * (box_size + spacing)
+            x1 = x0 + box_size
+            y1 = y0 + box_size
+            scene.rect(x0, y0, x1, y1, box_style, key=(row_idx, col_idx))
+            scene.text((x0 + x1) // 2, (y0 + y1) // 2, labels.fit(str(item), LABEL_FONT, box_size), label_style, key=(row_idx, col_idx))
+
+
+def layout_heatmap(scene, value):
+    num_rows = len(value)
+    num_cols = max(len(row) for row in value)
+    # Fit the whole matrix on screen, but never below one pixel per cell at zoom 1.
+    cell = max(1.0, min((scene.width - 40) / num_cols, (scene.height - 120) / num_rows))
+    start_x = max(20, scene.center_x - num_cols * cell / 2)
+    start_y = max(100, scene.center_y + 30 - num_rows * cell / 2)
+
+    # Resolved on first use: it pulls in numpy, which nothing else at start-up needs.
+    heatmap = registry.resolve("heatmap:Heatmap")(value, start_x, start_y, cell, LABEL_FONT)
+    scene.stats.update(cells=sum(len(row) for row in value))
+    note = f"{num_rows:,} × {num_cols:,} heatmap, {heatmap.low:g} … {heatmap.high:g}   (zoom in for values)"
+    scene.text(scene.center_x, 80, note, scene.style(font=("Segoe UI", 9), fill="#6b7280"), key="heatmap-note")
+    scene.image(*heatmap.bounds, heatmap, scene.style(), key="heatmap")
+
+
+def layout_tuple(scene, value, value_type):
+    layout_list(scene, value, "tuple")
+
+
+def layout_set(scene, value, value_type):
+    layout_list(scene, list(value), "set")
+
+
+def layout_2dlist(scene, value, value_type):
+    layout_list(scene, value, "2dlist")
+
+
+def layout_dict(scene, value, value_type):
+    add_title(scene, "Type: dict")
+    cx = scene.center_x
+    row_style = scene.style(fill="#fef9c3", outline="#ca8a04", width=2)
+    label_style = scene.style(font=LABEL_FONT)
+    y = 80
+    for i, (k, v) in enumerate(value.items()):
+        scene.rect(cx - 250, y + i * 50, cx + 250, y + 40 + i * 50, row_style, key=("key", k))
+        scene.text(cx, y + 20 + i * 50, labels.fit(f"{k} : {v}", LABEL_FONT, 500), label_style, key=("key", k))
+
+
+def layout_linkedlist(scene, value, value_type):
+    add_title(scene, "Type: Linked List")
+
+    node_width = 80
+    node_height = 60
+    spacing = 20
+    arrow_length = 30
+
+    total_width = len(value) * node_width + (len(value) - 1) * (arrow_length + spacing)
+    start_x = scene.center_x - total_width // 2
+    y = scene.center_y - node_height // 2  # Center vertically based on node height
+
+    scene.stats.update(nodes=len(value), edges=max(0, len(value) - 1))
+    node_style = scene.style(fill="#bbf7d0", outline="#16a34a", width=2)
+    label_style = scene.style(font=LABEL_FONT)
+    arrow_style = scene.style(arrow=ARROW_LAST, fill="#16a34a", width=2)
+    note_style = scene.style(font=("Segoe UI", 10, "italic"), fill="#6b7280")
+
+    if value:
+        scene.text(start_x + node_width // 2, y - 20, "Head", note_style, key="head")
+
+    pitch = node_width + arrow_length + spacing
+    if len(value) > LOD_MIN_NODES:
+        styles = (scene.style_table[node_style], scene.style_table[label_style], scene.style_table[arrow_style])
+        detail = ChainDetail(value, start_x, y, node_width, node_height, pitch, arrow_length, styles)
+        scene.group(*detail.bounds, detail, key="list")
+        x1 = start_x + (len(value) - 1) * pitch + node_width
+        scene.text(x1 + 40, y + node_height // 2, "None", note_style, key="none")
+        return
+
+    for i, item in enumerate(value):
+        x0 = start_x + i * pitch
+        x1 = x0 + node_width
+
+        scene.rect(x0, y, x1, y + node_height, node_style, key=i)
+        scene.text((x0 + x1) // 2, y + node_height // 2, labels.fit(str(item), LABEL_FONT, node_width), label_style, key=i)
+
+        # Arrow to next node (if not last)
+        if i < len(value) - 1:
+            scene.line(x1, y + node_height // 2, x1 + arrow_length, y + node_height // 2, arrow_style, key=i)
+
+    if value:
+        # "None" after the last node
+        scene.text(x1 + 40, y + node_height // 2, "None", note_style, key="none")
+
+
+def layout_stack(scene, value, value_type):
+    add_title(scene, "Type: Stack (Top → Bottom)")
+
+    box_width = 140
+    box_height = 40
+    start_x = scene.center_x - box_width // 2
+    start_y = 100
+
+    box_style = scene.style(fill="#fca5a5", outline="#b91c1c", width=2)
+    label_style = scene.style(font=LABEL_FONT)
+
+    for i, item in enumerate(reversed(value)):
+        idx = len(value) - 1 - i
+        y0 = start_y + i * (box_height + 10)
+        y1 = y0 + box_height
+        w_plus = i * 10
+        scene.rect(start_x - w_plus, y0, start_x + box_width + w_plus, y1, box_style, key=idx)
+        scene.text(start_x + box_width // 2, y0 + box_height // 2, labels.fit(str(item), LABEL_FONT, box_width), label_style, key=idx)
+
+    top_label_x = start_x + box_width + 40
+    top_label_y = start_y + 20
+    scene.text(top_label_x, top_label_y, "Top", scene.style(font=("Segoe UI", 10, "bold"), fill="#ef4444"), key="top")
+    scene.line(top_label_x - 10, top_label_y, start_x + box_width, top_label_y,
+               scene.style(arrow=ARROW_LAST, fill="#ef4444", width=2), key="top")
+
+
+def layout_queue(scene, value, value_type):
+    add_title(scene, "Type: Queue (Front → Rear)")
+
+    box_width = 80
+    box_height = 60
+    y = scene.center_y - box_height // 2
+    total_width = len(value) * (box_width + 10) - 10
+    start_x = scene.center_x - total_width // 2
+
+    box_style = scene.style(fill="#ddd6fe", outline="#7c3aed", width=2)
+    label_style = scene.style(font=LABEL_FONT)
+    arrow_style = scene.style(arrow=ARROW_LAST, fill="#7c3aed", width=2)
+
+    for i, item in enumerate(value):
+        x0 = start_x + i * (box_width + 10)
+        x1 = x0 + box_width
+        scene.rect(x0, y, x1, y + box_height, box_style, key=i)
+        scene.text((x0 + x1) // 2, y + box_height // 2, labels.fit(str(item), LABEL_FONT, box_width), label_style, key=i)
+
+        if i < len(value) - 1:
+            scene.line(x1, y + box_height // 2, x1 + 20, y + 30, arrow_style, key=i)
+
+    if value:
+        end_style = scene.style(font=("Segoe UI", 10), fill="#7c3aed")
+        scene.text(start_x - 10, y + 80, "Front", end_style, key="front")
+        scene.text(x1 + 30, y + 80, "Rear", end_style, key="rear")
+        front_arrow_x = start_x - 30
+        rear_arrow_x = x1 + 30
+
+        scene.line(front_arrow_x, y + box_height // 2, start_x, y + 30,
+                   scene.style(arrow=ARROW_FIRST, fill="#7c3aed", width=2), key="front")
+        scene.line(rear_arrow_x + 20, y + 30, x1, y + 30, arrow_style, key="rear")
+
+
+def tree_positions(left, right, root, width):
+    # Scene position of every slot of a binary tree given as child arrays.
+    xs, depths = tidy_tree(left, right, root, 2 * NODE_RADIUS + NODE_GAP)
+
+    # Centre trees that fit; for wider ones centre the root and let the user pan outwards.
+    min_x, max_x = min(xs), max(xs)
+    if max_x - min_x <= width - 2 * (NODE_RADIUS + 20):
+        shift = width // 2 - (min_x + max_x) / 2
+    else:
+        shift = width // 2 - xs[root]
+    for i in range(len(xs)):
+        xs[i] += shift
+    ys = array("d", [TREE_TOP + depth * LEVEL_HEIGHT for depth in depths])
+    return xs, ys
+
+
+def add_node_tree(scene, order, xs, ys, label, node_fill, edge_color, fills=None):
+    # order lists the (node, parent) pairs to draw; xs, ys, label and fills (per-node
+    # fills replacing node_fill, as diffs draw them) are indexed by node.
+    edge_style = scene.style(fill=edge_color, width=2)
+    node_style = scene.style(fill=node_fill, outline=edge_color, width=2)
+    label_style = scene.style(font=LABEL_FONT)
+
+    scene.stats.update(nodes=len(order), edges=max(0, len(order) - 1))
+    for node, parent in order:
+        if parent != NIL:
+            scene.line(xs[parent], ys[parent] + NODE_RADIUS, xs[node], ys[node] - NODE_RADIUS, edge_style, key=node)
+    for node, parent in order:
+        x, y = xs[node], ys[node]
+        style = node_style if fills is None else scene.style(fill=fills[node], outline=edge_color, width=2)
+        scene.oval(x - NODE_RADIUS, y - NODE_RADIUS, x + NODE_RADIUS, y + NODE_RADIUS, style, key=node)
+        scene.text(x, y, labels.fit(label(node), LABEL_FONT, NODE_LABEL_WIDTH), label_style, key=node)
+
+
+def layout_node_tree(scene, store, node_fill, edge_color, fills=None):
+    if store.root == NIL:
+        return
+    xs, ys = tree_positions(store.left, store.right, store.root, scene.width)
+    if len(store) > LOD_MIN_NODES:
+        detail = TreeDetail(store, xs, ys, NODE_RADIUS, LEVEL_HEIGHT, node_fill, edge_color, LABEL_FONT, NODE_LABEL_WIDTH, fills)
+        scene.stats.update(nodes=len(store), edges=len(store) - 1)
+        scene.group(*detail.bounds, detail, key="tree")
+        return
+    order = [(node, parent) for node, parent, depth in store.preorder()]
+    add_node_tree(scene, order, xs, ys, lambda node: str(store.val(node)), node_fill, edge_color, fills)
+
+
+def is_none(val):
+    # Typed input spells a gap as the string "None"; values loaded from files use null.
+    return val is None or (isinstance(val, str) and val.lower() == "none")
+
+
+def tree_store(value, value_type):
+    # The tree a binarytree, heap or avl_tree value is drawn as.
+    if value_type == "heap":
+        try:
+            numbers = [int(v) for v in value]
+        except (TypeError, ValueError):
+            raise ParseError("Heap must contain only integers.")
+        # A heap is a complete tree, which is exactly a level-order build with no gaps.
+        return build_binary_tree_store(numbers)
+    if value_type == "avl_tree":
+        try:
+            values = [int(v) for v in value if not is_none(v)]
+        except Exception:
+            raise ParseError("AVL Tree must contain only integers.")
+        return build_avl_tree_store(values)
+    return build_binary_tree_store([None if is_none(val) else val for val in value])
+
+
+# Registered builders: the layouts below receive the built store.
+def build_binarytree(value):
+    return tree_store(value, "binarytree")
+
+
+def build_heap(value):
+    return tree_store(value, "heap")
+
+
+def build_avl_tree(value):
+    return tree_store(value, "avl_tree")
+
+
+def layout_binarytree(scene, store, value_type):
+    add_title(scene, "Type: Binary Tree")
+    layout_node_tree(scene, store, "#ddd6fe", "#7c3aed")
+
+
+def layout_range(scene, value, value_type):
+    SequenceView(value, "range", scene.width).layout_into(scene)
+
+
+def layout_heap(scene, store, value_type):
+    add_title(scene, "Type: Heap (Min/Max)")
+    layout_node_tree(scene, store, "#fed7aa", "#f97316")
+
+
+def layout_avl_tree(scene, store, value_type):
+    add_title(scene, "Type: AVL Tree")
+    layout_node_tree(scene, store, "#d1fae5", "#10b981")
@@ -0,0 +1,383 @@
+import csv
+import json
+import os
+import re
+import sys
+
+from parsing import ParseError
+
+FORMATS = ("json", "jsonl", "csv", "tsv", "edges")
+EXTENSIONS = {
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".edges": "edges",
+    ".edgelist": "edges",
+}
+
+# Types that are a flat sequence of elements, built the same way the entry parser builds them.
+SEQUENCE_TYPES = ("list", "tuple", "set", "linkedlist", "stack", "queue", "binarytree", "heap", "avl_tree")
+LOADABLE_TYPES = SEQUENCE_TYPES + ("dict", "2dlist", "directed_graph")
+
+# Characters read from the source per refill; only about this much raw text is held at once.
+CHUNK_SIZE = 1 << 16
+# How many elements are read between cancellation checks and progress updates.
+PROGRESS_EVERY = 50000
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+# Characters that can legally follow a complete JSON value.
+_DELIMITERS = frozenset(" \t\r\n,:]}")
+
+
+class _Source:
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=0):
+        if self.pos > CHUNK_SIZE:
+            # Drop what has been consumed so the buffer never grows with the file.
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self.stream.read(size or CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+        self.buffer += chunk
+        return bool(chunk)
+
+    def peek(self):
+        # Next non-whitespace character, or "" at the end of the input.
+        while True:
+            buffer = self.buffer
+            pos = self.pos = _WHITESPACE.match(buffer, self.pos).end()
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ParseError(f"Invalid JSON: expected {char!r} at offset {self.pos}.")
+        self.pos += 1
+
+    def lines(self):
+        # Lines keep their terminator so csv can follow quoted fields across them.
+        while True:
+            end = self.buffer.find("\n", self.pos)
+            while end < 0 and self.fill():
+                end = self.buffer.find("\n", self.pos)
+            if end < 0:
+                if self.pos < len(self.buffer):
+                    yield self.buffer[self.pos:]
+                    self.pos = len(self.buffer)
+                return
+            yield self.buffer[self.pos:end + 1]
+            self.pos = end + 1
+
+
+class _JsonReader:
+    def __init__(self, source):
+        self.source = source
+        self.decoder = json.JSONDecoder()
+        self.scan = self.decoder.scan_once
+        self._failed = None
+
+    def value(self):
+        source = self.source
+        buffer = source.buffer
+        pos = _WHITESPACE.match(buffer, source.pos).end()
+        try:
+            # Fast path: the C scanner on the buffered text, with no refill needed.
+            value, end = self.scan(buffer, pos)
+            if end < len(buffer) and buffer[end] in _DELIMITERS:
+                source.pos = end
+                return value
+        except (StopIteration, json.JSONDecodeError):
+            pass
+        source.pos = pos
+        return self._value_refilling()
+
+    def _value_refilling(self):
+        source = self.source
+        source.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(source.buffer, source.pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # "12" or "2." at the end of a chunk may go on in the next one, so a value only
+            # counts once a delimiter (or the end of input) follows it.
+            if end is not None and (source.eof or (end < len(source.buffer) and source.buffer[end] in _DELIMITERS)):
+                source.pos = end
+                return value
+            if source.eof:
+                raise ParseError(f"Invalid JSON near offset {source.pos}.")
+            # Grow the read geometrically so one huge element does not re-parse per chunk.
+            source.fill(max(CHUNK_SIZE, len(source.buffer) - source.pos))
+
+    def _separated(self, close):
+        source = self.source
+        source.pos += 1
+        if source.peek() == close:
+            source.pos += 1
+            return
+        while True:
+            yield
+            char = source.peek()
+            source.pos += 1
+            if char == close:
+                return
+            if char != ",":
+                raise ParseError(f"Invalid JSON: expected ',' or {close!r} at offset {source.pos - 1}.")
+
+    def _batch(self, cuts, joined):
+        # Decode everything buffered up to a cut in one C call instead of value by value.
+        # A cut inside a string or nested value leaves the wrapped text unbalanced, so it
+        # fails to parse rather than producing wrong elements.
+        source = self.source
+        buffer, pos = source.buffer, source.pos
+        if buffer is self._failed:
+            return None
+        for cut in cuts(buffer, pos):
+            try:
+                items = self.decoder.decode("[" + joined(buffer[pos:cut]) + "]")
+            except ValueError:
+                continue
+            if items:
+                source.pos = cut + 1
+                return items
+        # Retry only once more text has been read.
+        self._failed = buffer
+        return None
+
+    def array_items(self):
+        source = self.source
+        source.pos += 1
+        if source.peek() == "]":
+            source.pos += 1
+            return
+        while True:
+            items = self._batch(_array_cuts, str)
+            if items:
+                # The cut was a top-level comma, so another element follows.
+                yield from items
+                continue
+            yield self.value()
+            char = source.peek()
+            source.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ParseError(f"Invalid JSON: expected ',' or ']' at offset {source.pos - 1}.")
+
+    def object_items(self):
+        for _ in self._separated("}"):
+            if self.source.peek() != '"':
+                raise ParseError(f"Invalid JSON: expected a key at offset {self.source.pos}.")
+            key = self.value()
+            self.source.expect(":")
+            yield key, self.value()
+
+    def documents(self):
+        # Top-level values one after another, as in JSON Lines or concatenated JSON.
+        source = self.source
+        while source.peek():
+            items = self._batch(_line_cuts, _join_lines)
+            if items:
+                yield from items
+                continue
+            yield self.value()
+
+
+def _array_cuts(buffer, pos):
+    # Commas right after a closing bracket are the likeliest top-level ones in arrays of
+    # rows or objects; walk back over a few of them before trying the last comma at all.
+    end = len(buffer)
+    for _ in range(4):
+        cut = max(buffer.rfind("},", pos, end), buffer.rfind("],", pos, end))
+        if cut < 0:
+            break
+        yield cut + 1
+        end = cut
+    cut = buffer.rfind(",", pos)
+    if cut > pos:
+        yield cut
+
+
+def _line_cuts(buffer, pos):
+    cut = buffer.rfind("\n", pos)
+    if cut > pos:
+        yield cut
+
+
+def _join_lines(text):
+    return ",".join(line for line in text.split("\n") if line.strip())
+
+
+def _cell(text):
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _csv_rows(source, delimiter):
+    for row in csv.reader(source.lines(), delimiter=delimiter):
+        if row:
+            yield [_cell(cell) for cell in row]
+
+
+def _edge_rows(source):
+    for line in source.lines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if "->" in line:
+            parts = line.split("->")
+        elif "," in line:
+            parts = line.split(",")
+        else:
+            parts = line.split()
+        # Labels stay strings: "1" and "a" in one file must still sort and compare.
+        yield [part.strip() for part in parts]
+
+
+def _pair(item, what):
+    if not (isinstance(item, (list, tuple)) and len(item) == 2):
+        raise ParseError(f"Each {what} must have exactly two fields, got {item!r}.")
+    return item[0], item[1]
+
+
+def detect_format(path, source, type_hint):
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is not None:
+        return fmt
+    first = source.peek()
+    if first not in "[{":
+        return "edges" if type_hint == "directed_graph" else "csv"
+    # One complete JSON value on the first line followed by more input means JSON Lines.
+    # Only about a chunk is looked at: a first line longer than that is one big JSON
+    # document, which is then streamed rather than read whole.
+    end = source.buffer.find("\n", source.pos)
+    while end < 0 and len(source.buffer) - source.pos < CHUNK_SIZE and source.fill():
+        end = source.buffer.find("\n", source.pos)
+    if end < 0:
+        return "json"
+    try:
+        json.loads(source.buffer[source.pos:end])
+    except ValueError:
+        return "json"
+    # Trailing blank lines after a single document do not make it JSON Lines; read on
+    # until something other than whitespace turns up or the input ends.
+    offset = end - source.pos
+    while not source.buffer[source.pos + offset:].strip():
+        if not source.fill():
+            return "json"
+    return "jsonl"
+
+
+def _records(source, fmt, type_hint):
+    # Yields elements, rows, edges or (key, value) pairs depending on the target type.
+    if fmt == "json":
+        reader = _JsonReader(source)
+        first = source.peek()
+        if first == "[":
+            items = _whole(source, reader.array_items())
+        elif first == "{" and type_hint == "dict":
+            return _whole(source, reader.object_items())
+        else:
+            raise ParseError(f"A JSON file for {type_hint} must contain an array.")
+    elif fmt == "jsonl":
+        items = _JsonReader(source).documents()
+        if type_hint == "dict":
+            return _jsonl_pairs(items)
+    elif fmt in ("csv", "tsv"):
+        items = _csv_rows(source, "\t" if fmt == "tsv" else ",")
+        if type_hint in SEQUENCE_TYPES:
+            return (cell for row in items for cell in row)
+    elif fmt == "edges":
+        if type_hint != "directed_graph":
+            raise ParseError("Edge lists can only be loaded as directed_graph.")
+        items = _edge_rows(source)
+    else:
+        raise ParseError(f"Unknown input format {fmt!r}. Use one of: {', '.join(FORMATS)}.")
+    return shape(items, type_hint)
+
+
+def shape(items, type_hint):
+    # Decoded JSON items as the elements, rows, edges or (key, value) pairs of the type.
+    if type_hint == "dict":
+        return (_pair(item, "dict entry") for item in items)
+    if type_hint == "directed_graph":
+        return (_pair(item, "edge") for item in items)
+    if type_hint == "2dlist":
+        return (_row(item) for item in items)
+    return items
+
+
+def _whole(source, items):
+    # A JSON file holds one value; anything after it is an error rather than ignored.
+    yield from items
+    if source.peek():
+        raise ParseError(f"Invalid JSON: unexpected data after the value at offset {source.pos}.")
+
+
+def _jsonl_pairs(documents):
+    for document in documents:
+        if isinstance(document, dict):
+            yield from document.items()
+        else:
+            yield _pair(document, "dict entry")
+
+
+def _row(item):
+    if not isinstance(item, list):
+        raise ParseError(f"Each row of a 2dlist must be a list, got {item!r}.")
+    return item
+
+
+def _reporting(records, job):
+    for count, record in enumerate(records, 1):
+        if count % PROGRESS_EVERY == 0:
+            job.progress(f"Loading… {count:,} items")
+        yield record
+
+
+def open_input(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, encoding="utf-8", newline="")
+
+
+# Collection each type is built into straight from the record stream.
+COLLECTORS = {"dict": dict, "set": set, "tuple": tuple}
+
+
+def load(path, type_hint, fmt=None, job=None):
+    # Builds the value while reading; path "-" reads standard input.
+    if type_hint not in LOADABLE_TYPES:
+        raise ParseError(f"{type_hint} values cannot be loaded from a file. Use one of: {', '.join(LOADABLE_TYPES)}.")
+    stream = open_input(path)
+    try:
+        source = _Source(stream)
+        if fmt is None:
+            fmt = detect_format(path, source, type_hint)
+        records = _records(source, fmt, type_hint)
+        if job is not None:
+            records = _reporting(records, job)
+        try:
+            return COLLECTORS.get(type_hint, list)(records)
+        except TypeError as e:
+            raise ParseError(f"Unsupported value in input: {e}.")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
@@ -0,0 +1,311 @@
+import heapq
+import math
+from array import array
+
+import labels
+from tree import NIL
+
+# A subtree or run narrower than this on screen is drawn as one summary glyph.
+COLLAPSE_PIXELS = 60
+# Screen area per expanded node; caps the nodes drawn at once by the canvas size.
+LOD_CELL = 24
+# Glyph text stays this many pixels tall whatever the zoom, and needs this much room.
+GLYPH_FONT_PX = 9
+GLYPH_TEXT_MIN = (64, 40)
+GLYPH_FILL = "#f3f4f6"
+# Narrowest run of list nodes that gets its own box.
+RUN_PIXELS = 120
+# Rough size of one value and its summary key, for cache accounting.
+VALUE_BYTES = 64
+
+
+def _numeric(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value if value == value else None
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        return number if number == number else None
+    return None
+
+
+def summary_keys(values):
+    # Ordering keys for min/max: numbers when every value reads as one, else the text.
+    keys = []
+    for value in values:
+        key = _numeric(value)
+        if key is None:
+            return [str(value) for value in values]
+        keys.append(key)
+    return keys
+
+
+def _glyph_text(scene, x0, y0, x1, y1, zoom, lines):
+    if (x1 - x0) * zoom < GLYPH_TEXT_MIN[0] or (y1 - y0) * zoom < GLYPH_TEXT_MIN[1]:
+        return None
+    # Fonts are scaled by the zoom when drawn; this keeps the summary readable at any zoom.
+    style = scene.style(font=("Segoe UI", GLYPH_FONT_PX / zoom), fill="#374151", justify="center")
+    return "\n".join(lines), style
+
+
+class TreeDetail:
+    # Draws a large binary tree at the detail the view can show: the widest subtrees are
+    # opened first, and whatever is too narrow or over budget becomes a summary box.
+    def __init__(self, store, xs, ys, radius, level_height, node_fill, edge_color, font, label_width, fills=None):
+        self.store = store
+        self.xs = xs
+        self.ys = ys
+        self.radius = radius
+        self.level_height = level_height
+        self.node_fill = node_fill
+        self.edge_color = edge_color
+        self.font = font
+        self.label_width = label_width
+        # Per-slot fills replacing node_fill, or None.
+        self.fills = fills
+        # Slots opened by a click; they stay open at any zoom.
+        self.opened = set()
+        # Glyphs of the latest detail_into, as (x0, y0, x1, y1, slot), for clicks.
+        self.glyphs = []
+        self._summarise()
+
+    def _summarise(self):
+        # Per-subtree size, extremes and x-extent, filled bottom-up in one pass.
+        store = self.store
+        n = len(store)
+        left, right, xs = store.left, store.right, self.xs
+        keys = summary_keys([store.val(i) for i in range(n)])
+        size = array("i", [1]) * n
+        arg_min = array("i", range(n))
+        arg_max = array("i", range(n))
+        lo = array("d", xs)
+        hi = array("d", xs)
+        order = [node for node, parent, depth in store.preorder()]
+        for node in reversed(order):
+            for child in (left[node], right[node]):
+                if child == NIL:
+                    continue
+                size[node] += size[child]
+                if keys[arg_min[child]] < keys[arg_min[node]]:
+                    arg_min[node] = arg_min[child]
+                if keys[arg_max[child]] > keys[arg_max[node]]:
+                    arg_max[node] = arg_max[child]
+                if lo[child] < lo[node]:
+                    lo[node] = lo[child]
+                if hi[child] > hi[node]:
+                    hi[node] = hi[child]
+        self.size, self.arg_min, self.arg_max, self.lo, self.hi = size, arg_min, arg_max, lo, hi
+
+    @property
+    def bounds(self):
+        return self._box(self.store.root)
+
+    def nbytes(self):
+        arrays = (self.xs, self.ys, self.size, self.arg_min, self.arg_max, self.lo, self.hi,
+                  self.store.left, self.store.right, self.store.height, self.store.value_ids)
+        return sum(len(a) * a.itemsize for a in arrays) + VALUE_BYTES * len(self.store.values)
+
+    def _box(self, node):
+        r = self.radius
+        return (self.lo[node] - r, self.ys[node] - r, self.hi[node] + r,
+                self.ys[node] + (self.store.height[node] - 1) * self.level_height + r)
+
+    def detail_into(self, scene, view):
+        zoom = view.zoom
+        vx0, vy0, vx1, vy1 = view.visible_rect()
+        min_width = COLLAPSE_PIXELS / zoom
+        budget = max(1, (view.width // LOD_CELL) * (view.height // LOD_CELL))
+        left, right = self.store.left, self.store.right
+        r = self.radius
+
+        nodes = []
+        glyphs = []
+        root = self.store.root
+        frontier = [(-(self.hi[root] - self.lo[root] + 2 * r), root)]
+        while frontier:
+            width, node = heapq.heappop(frontier)
+            x0, y0, x1, y1 = self._box(node)
+            if x1 < vx0 or x0 > vx1 or y1 < vy0 or y0 > vy1:
+                continue
+            leaf = left[node] == NIL and right[node] == NIL
+            if not leaf and node not in self.opened and (
+                -width < min_width or len(nodes) + len(glyphs) + len(frontier) >= budget
+            ):
+                glyphs.append(node)
+                continue
+            nodes.append(node)
+            for child in (left[node], right[node]):
+                if child != NIL:
+                    heapq.heappush(frontier, (-(self.hi[child] - self.lo[child] + 2 * r), child))
+
+        self._draw(scene, nodes, glyphs, zoom)
+
+    def full_into(self, scene):
+        # Every node, as the plain tree layout draws it (for exports).
+        self._draw(scene, [node for node, parent, depth in self.store.preorder()], [], 1.0)
+
+    def _draw(self, scene, nodes, glyphs, zoom):
+        store = self.store
+        left, right = store.left, store.right
+        xs, ys = self.xs, self.ys
+        r = self.radius
+        edge_style = scene.style(fill=self.edge_color, width=2)
+        for node in nodes:
+            for child in (left[node], right[node]):
+                if child != NIL:
+                    scene.line(xs[node], ys[node] + r, xs[child], ys[child] - r, edge_style, key=child)
+
+        self.glyphs = []
+        glyph_style = scene.style(fill=GLYPH_FILL, outline=self.edge_color, width=1, dash=(4, 2))
+        for node in glyphs:
+            box = self._box(node)
+            scene.rect(*box, glyph_style, key=("glyph", node))
+            self.glyphs.append(box + (node,))
+            lines = (
+                f"{self.size[node]:,} nodes",
+                f"{store.val(self.arg_min[node])} … {store.val(self.arg_max[node])}",
+                f"depth {store.height[node]}",
+            )
+            text = _glyph_text(scene, *box, zoom, lines)
+            if text is not None:
+                scene.text((box[0] + box[2]) / 2, (box[1] + box[3]) / 2, text[0], text[1], key=("glyph", node))
+
+        node_style = scene.style(fill=self.node_fill, outline=self.edge_color, width=2)
+        label_style = scene.style(font=self.font)
+        fills = self.fills
+        styles = {}
+        for node in nodes:
+            x, y = xs[node], ys[node]
+            style = node_style
+            if fills is not None:
+                style = styles.get(fills[node])
+                if style is None:
+                    style = styles[fills[node]] = scene.style(fill=fills[node], outline=self.edge_color, width=2)
+            scene.oval(x - r, y - r, x + r, y + r, style, key=node)
+            scene.text(x, y, labels.fit(str(store.val(node)), self.font, self.label_width), label_style, key=node)
+
+    def expand_at(self, x, y):
+        # Opens the glyph under a scene point; the smallest one wins where they overlap.
+        hits = [g for g in self.glyphs if g[0] <= x <= g[2] and g[1] <= y <= g[3]]
+        if not hits:
+            return False
+        node = min(hits, key=lambda g: self.size[g[4]])[4]
+        self.opened.add(node)
+        return True
+
+
+class ChainDetail:
+    # A long linked list seen from afar: aligned runs of 2^k nodes become one box each,
+    # with their extremes read from a min/max pyramid instead of a scan.
+    def __init__(self, values, start_x, y, node_width, node_height, pitch, arrow_length, styles):
+        self.values = values
+        self.start_x = start_x
+        self.y = y
+        self.node_width = node_width
+        self.node_height = node_height
+        self.pitch = pitch
+        self.arrow_length = arrow_length
+        # (node, label, arrow) style options, as the list layout uses them.
+        self.node_options, self.label_options, self.arrow_options = styles
+        self.keys = summary_keys(values)
+        # level -> (arg_min, arg_max) per aligned run of 2^level nodes
+        self._levels = {0: (range(len(values)), range(len(values)))}
+        # Runs opened by a click, as (level, index); they show as two runs one level down.
+        self.opened = set()
+        self.glyphs = []
+
+    @property
+    def bounds(self):
+        return (self.start_x, self.y, self.start_x + (len(self.values) - 1) * self.pitch + self.node_width,
+                self.y + self.node_height)
+
+    def nbytes(self):
+        pyramid = sum(len(a) * a.itemsize for level, pair in self._levels.items() if level for a in pair)
+        return pyramid + VALUE_BYTES * len(self.values)
+
+    def _extremes(self, level):
+        found = self._levels.get(level)
+        if found is not None:
+            return found
+        below_min, below_max = self._extremes(level - 1)
+        keys = self.keys
+        arg_min = array("i")
+        arg_max = array("i")
+        for i in range(0, len(below_min), 2):
+            a, b = below_min[i], below_min[i + 1] if i + 1 < len(below_min) else below_min[i]
+            arg_min.append(a if keys[a] <= keys[b] else b)
+            a, b = below_max[i], below_max[i + 1] if i + 1 < len(below_max) else below_max[i]
+            arg_max.append(a if keys[a] >= keys[b] else b)
+        self._levels[level] = arg_min, arg_max
+        return arg_min, arg_max
+
+    def _runs(self, level, i0, i1):
+        # (level, index) runs covering nodes i0..i1, split wherever a run was opened.
+        stack = [(level, j) for j in range(i1 >> level, (i0 >> level) - 1, -1)]
+        while stack:
+            level, j = stack.pop()
+            if level and (level, j) in self.opened:
+                stack.append((level - 1, 2 * j + 1))
+                stack.append((level - 1, 2 * j))
+            elif (j << level) < len(self.values):
+                yield level, j
+
+    def detail_into(self, scene, view):
+        n = len(self.values)
+        zoom = view.zoom
+        vx0, vy0, vx1, vy1 = view.visible_rect()
+        pitch = self.pitch
+        i0 = max(0, math.floor((vx0 - self.start_x - self.node_width) / pitch))
+        i1 = min(n - 1, math.ceil((vx1 - self.start_x) / pitch))
+        if i0 > i1:
+            return
+        node_pixels = pitch * zoom
+        # Single nodes while they are wide enough to read; otherwise runs wide enough for a summary.
+        level = 0 if node_pixels >= COLLAPSE_PIXELS else math.ceil(math.log2(RUN_PIXELS / node_pixels))
+        self._draw(scene, self._runs(level, i0, i1), zoom)
+
+    def full_into(self, scene):
+        self._draw(scene, ((0, i) for i in range(len(self.values))), 1.0)
+
+    def _draw(self, scene, runs, zoom):
+        node_style = scene.style(**self.node_options)
+        label_style = scene.style(**self.label_options)
+        arrow_style = scene.style(**self.arrow_options)
+        glyph_style = scene.style(fill=GLYPH_FILL, outline=self.node_options.get("outline", "#000000"), width=1, dash=(4, 2))
+        n = len(self.values)
+        y, h = self.y, self.node_height
+        mid = y + h / 2
+        # Runs get a box tall enough for their summary, centred on the list.
+        half = max(h, GLYPH_TEXT_MIN[1] / zoom) / 2
+        self.glyphs = []
+        for level, j in runs:
+            first = j << level
+            last = min(n, (j + 1) << level) - 1
+            x0 = self.start_x + first * self.pitch
+            x1 = self.start_x + last * self.pitch + self.node_width
+            if level == 0:
+                scene.rect(x0, y, x1, y + h, node_style, key=first)
+                label = labels.fit(str(self.values[first]), self.label_options["font"], self.node_width)
+                scene.text((x0 + x1) / 2, mid, label, label_style, key=first)
+            else:
+                box = (x0, mid - half, x1, mid + half)
+                scene.rect(*box, glyph_style, key=("run", level, j))
+                self.glyphs.append(box + ((level, j),))
+                arg_min, arg_max = self._extremes(level)
+                lines = (f"#{first:,}–#{last:,}", f"{self.values[arg_min[j]]} … {self.values[arg_max[j]]}")
+                text = _glyph_text(scene, *box, zoom, lines)
+                if text is not None:
+                    scene.text((x0 + x1) / 2, mid, text[0], text[1], key=("run", level, j))
+            if last < n - 1:
+                scene.line(x1, mid, x1 + self.arrow_length, mid, arrow_style, key=last)
+
+    def expand_at(self, x, y):
+        for x0, y0, x1, y1, run in self.glyphs:
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                self.opened.add(run)
+                return True
+        return False
@@ -0,0 +1,281 @@
+import ast
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from itertools import chain, islice
+
+import labels
+import registry
+from layout import ARROW_LAST, LABEL_FONT, TREE_TOP, add_title
+from parsing import ParseError
+
+# Levels opened up front, and children listed per node before a "more" marker.
+DEFAULT_DEPTH = 3
+DEFAULT_BREADTH = 12
+NODE_WIDTH = 120
+NODE_HEIGHT = 36
+NODE_GAP = 16
+LEVEL_HEIGHT = 90
+EDGE_FONT = ("Segoe UI", 9)
+# Strings and bytes longer than this are cut before repr, so huge values are never copied.
+REPR_CHARS = 80
+# Rough size of one discovered node for cache accounting.
+NODE_BYTES = 200
+
+# Drawn as values, never expanded, and not shared by identity (small ints and interned
+# strings would otherwise tie unrelated parents together).
+LEAF_TYPES = (type(None), bool, int, float, complex, str, bytes, bytearray, range)
+
+LEAF, CLOSED, OPEN = 0, 1, 2
+
+
+def _short_repr(obj):
+    if isinstance(obj, (str, bytes, bytearray)) and len(obj) > REPR_CHARS:
+        return repr(obj[:REPR_CHARS])[:-1] + "…"
+    if isinstance(obj, int) and not isinstance(obj, bool) and obj.bit_length() > 256:
+        return f"int ({obj.bit_length()} bits)"
+    return repr(obj)
+
+
+def _children(obj):
+    # (edge label, child) pairs as a lazy iterator, and how many there are.
+    if isinstance(obj, Mapping):
+        return ((_short_repr(k), v) for k, v in obj.items()), len(obj)
+    if isinstance(obj, (list, tuple, deque)):
+        return ((f"[{i}]", v) for i, v in enumerate(obj)), len(obj)
+    if isinstance(obj, (set, frozenset)):
+        return (("", v) for v in obj), len(obj)
+    fields = getattr(obj, "__dict__", None)
+    slots = _slot_names(obj)
+    slot_items = ((name, getattr(obj, name)) for name in slots)
+    if isinstance(fields, dict):
+        return chain(fields.items(), slot_items), len(fields) + len(slots)
+    return slot_items, len(slots)
+
+
+def _slot_names(obj):
+    # Set slots declared along the MRO, each once. "__dict__" and "__weakref__" slots only
+    # make room for the instance dict and weak references; the dict is walked on its own.
+    names = []
+    for cls in type(obj).__mro__:
+        declared = cls.__dict__.get("__slots__", ())
+        for name in (declared,) if isinstance(declared, str) else declared:
+            if name not in ("__dict__", "__weakref__") and name not in names and hasattr(obj, name):
+                names.append(name)
+    return names
+
+
+def _title(obj):
+    if isinstance(obj, LEAF_TYPES):
+        return _short_repr(obj)
+    name = type(obj).__name__
+    try:
+        return f"{name} · {len(obj):,}"
+    except TypeError:
+        return name
+
+
+class ObjectGraph:
+    # The part of a live object graph discovered so far. Containers and objects are nodes
+    # memoised by id(), so shared references and cycles are drawn once with extra edges;
+    # a node's children are only listed when it is opened, a page of `breadth` at a time.
+    # Nodes hold references to their objects so they can still be opened later.
+    def __init__(self, root, depth=DEFAULT_DEPTH, breadth=DEFAULT_BREADTH):
+        self.breadth = breadth
+        self.objects = []
+        self.titles = []
+        self.state = bytearray()
+        self.depth = array("i")
+        # Tree children (first discovery) per node; other references are cross edges.
+        self.tree = []
+        # (source, target, label, is tree edge) per reference listed so far.
+        self.edges = []
+        # Children listed and total per node, and the iterator that lists the rest.
+        self.listed = array("i")
+        self.total = array("i")
+        self._pending = {}
+        self._ids = {}
+        self.xs = array("d")
+        self.ys = array("d")
+        self.origin = (0, TREE_TOP)
+        self.open(self._node(root, 0), depth)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def _node(self, obj, depth):
+        if not isinstance(obj, LEAF_TYPES):
+            found = self._ids.get(id(obj))
+            if found is not None:
+                return found
+        node = len(self.objects)
+        self.objects.append(obj)
+        self.titles.append(_title(obj))
+        self.depth.append(depth)
+        self.tree.append([])
+        self.listed.append(0)
+        self.total.append(0)
+        if isinstance(obj, LEAF_TYPES):
+            self.state.append(LEAF)
+        else:
+            self._ids[id(obj)] = node
+            self.state.append(CLOSED)
+        return node
+
+    def _list_page(self, node):
+        # Lists the next `breadth` children of a node; returns the nodes seen for the first time.
+        pending = self._pending.get(node)
+        if pending is None:
+            pending, total = _children(self.objects[node])
+            self.total[node] = total
+        try:
+            page = list(islice(pending, self.breadth))
+        except RuntimeError:
+            # The live container changed while paging; pick up where it left off.
+            pending, self.total[node] = _children(self.objects[node])
+            pending = islice(pending, self.listed[node], None)
+            page = list(islice(pending, self.breadth))
+        self._pending[node] = pending
+        fresh = []
+        for label, child in page:
+            count = len(self.objects)
+            target = self._node(child, self.depth[node] + 1)
+            first = target == count
+            self.edges.append((node, target, label, first))
+            if first:
+                self.tree[node].append(target)
+                fresh.append(target)
+        self.listed[node] += len(page)
+        if len(page) < self.breadth:
+            self.total[node] = self.listed[node]
+            del self._pending[node]
+        return fresh
+
+    def hidden(self, node):
+        # Children not listed yet.
+        if self.state[node] != OPEN:
+            return 0
+        return self.total[node] - self.listed[node]
+
+    def open(self, node, levels=1):
+        # Breadth-first, so a depth budget opens whole levels rather than one deep path.
+        queue = deque([(node, levels)])
+        while queue:
+            node, levels = queue.popleft()
+            if self.state[node] != CLOSED or levels <= 0:
+                continue
+            self.state[node] = OPEN
+            for child in self._list_page(node):
+                queue.append((child, levels - 1))
+        self.place(*self.origin)
+
+    def place(self, center_x, top):
+        # Tidy-enough layered layout: each subtree gets as many slots as it has leaves.
+        self.origin = (center_x, top)
+        n = len(self.objects)
+        slots = array("i", [1]) * n
+        order = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(self.tree[node])
+        for node in reversed(order):
+            if self.tree[node]:
+                slots[node] = sum(slots[child] for child in self.tree[node])
+        pitch = NODE_WIDTH + NODE_GAP
+        xs = array("d", bytes(8 * n))
+        ys = array("d", bytes(8 * n))
+        xs[0] = center_x
+        for node in order:
+            ys[node] = top + self.depth[node] * LEVEL_HEIGHT
+            x = xs[node] - slots[node] * pitch / 2
+            for child in self.tree[node]:
+                xs[child] = x + slots[child] * pitch / 2
+                x += slots[child] * pitch
+        self.xs, self.ys = xs, ys
+
+    @property
+    def bounds(self):
+        half = NODE_WIDTH / 2
+        return (min(self.xs) - half, min(self.ys), max(self.xs) + half, max(self.ys) + NODE_HEIGHT + 20)
+
+    def nbytes(self):
+        return NODE_BYTES * len(self.objects)
+
+    def detail_into(self, scene, view):
+        self.full_into(scene)
+
+    def full_into(self, scene):
+        # Everything discovered so far; exports show the graph as it was opened.
+        xs, ys = self.xs, self.ys
+        half = NODE_WIDTH / 2
+        tree_style = scene.style(fill="#6b7280", width=1.5, arrow=ARROW_LAST)
+        shared_style = scene.style(fill="#f97316", width=1.5, arrow=ARROW_LAST, dash=(5, 3))
+        edge_label_style = scene.style(font=EDGE_FONT, fill="#4b5563")
+        for i, (source, target, label, first) in enumerate(self.edges):
+            x0, y0 = xs[source], ys[source] + NODE_HEIGHT
+            x1, y1 = xs[target], ys[target]
+            scene.line(x0, y0, x1, y1, tree_style if first else shared_style, key=("edge", i))
+            if label and first:
+                text = labels.fit(label, EDGE_FONT, NODE_WIDTH)
+                scene.text(x1, y1 - 12, text, edge_label_style, key=("edge", i))
+
+        styles = {
+            LEAF: scene.style(fill="#f9fafb", outline="#9ca3af", width=1),
+            CLOSED: scene.style(fill="#f3f4f6", outline="#6b7280", width=1, dash=(4, 2)),
+            OPEN: scene.style(fill="#e0e7ff", outline="#4f46e5", width=2),
+        }
+        label_style = scene.style(font=LABEL_FONT)
+        more_style = scene.style(font=EDGE_FONT, fill="#6b7280")
+        for node in range(len(self.objects)):
+            x, y = xs[node], ys[node]
+            state = self.state[node]
+            scene.rect(x - half, y, x + half, y + NODE_HEIGHT, styles[state], key=node)
+            title = self.titles[node] + (" ▸" if state == CLOSED else "")
+            scene.text(x, y + NODE_HEIGHT / 2, labels.fit(title, LABEL_FONT, NODE_WIDTH), label_style, key=node)
+            hidden = self.hidden(node)
+            if hidden > 0:
+                scene.text(x, y + NODE_HEIGHT + 10, f"+{hidden:,} more", more_style, key=("more", node))
+
+    def expand_at(self, x, y):
+        # Opens a closed node, or lists the next page of an open one.
+        half = NODE_WIDTH / 2
+        for node in range(len(self.objects)):
+            nx, ny = self.xs[node], self.ys[node]
+            if nx - half <= x <= nx + half and ny <= y <= ny + NODE_HEIGHT + 20:
+                if self.state[node] == CLOSED:
+                    self.open(node)
+                    return True
+                if self.hidden(node) > 0:
+                    self._list_page(node)
+                    self.place(*self.origin)
+                    return True
+                return False
+        return False
+
+
+def parse_literal(raw_value, type_hint):
+    # Typed-in values: any Python literal, nested as deep as it likes.
+    try:
+        return ast.literal_eval(raw_value)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        raise ParseError("Enter a Python literal, e.g. {'a': [1, (2, 3)], 'b': {4, 5}}.")
+
+
+def layout_object(scene, value, value_type):
+    graph = value if isinstance(value, ObjectGraph) else ObjectGraph(value)
+    add_title(scene, f"Type: object ({type(graph.objects[0]).__name__})")
+    graph.place(scene.center_x, TREE_TOP)
+    scene.stats.update(nodes=len(graph), edges=len(graph.edges))
+    scene.group(*graph.bounds, graph, key="objects")
+
+
+def visualize(obj, depth=DEFAULT_DEPTH, breadth=DEFAULT_BREADTH):
+    # Opens the visualizer on a live object and returns when its window is closed.
+    # Tk is only imported here, so headless callers can still use ObjectGraph.
+    root = registry.resolve("tkinter:Tk")()
+    app = registry.resolve("data-visualizer:DataVisualizer")(root)
+    app.type_var.set("object")
+    app.draw(ObjectGraph(obj, depth, breadth), "object")
+    root.mainloop()
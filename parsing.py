@@ -0,0 +1,84 @@
+import ast
+
+
+class ParseError(ValueError):
+    pass
+
+
+# Each type registers one of the parsers below in registry.py; they all take
+# (raw_value, type_hint) and fail with the same message.
+def _typecast(convert):
+    def parse(raw_value, type_hint):
+        try:
+            return convert(raw_value)
+        except Exception:
+            raise ParseError(f"Cannot typecast entered value. Please enter a valid {type_hint} value.")
+    return parse
+
+
+def _parts(raw_value):
+    stripped = raw_value.strip("[](){}")
+    return [part.strip() for part in stripped.split(",") if part.strip()]
+
+
+def _int(raw_value):
+    try:
+        return int(raw_value)
+    except ValueError:
+        return int(float(raw_value))
+
+
+def _bool(raw_value):
+    raw = raw_value.lower().strip()
+    if raw in ("", "false", "none"):
+        return False
+    try:
+        return float(raw) != 0
+    except ValueError:
+        return True
+
+
+def _dict(raw_value):
+    stripped = raw_value.strip("{}")
+    pairs = [pair.strip() for pair in stripped.split(",") if pair.strip()]
+    d = {}
+    for pair in pairs:
+        if ":" in pair:
+            k, v = pair.split(":", 1)
+            d[k.strip()] = v.strip()
+    return d
+
+
+def _directed_graph(raw_value):
+    value = ast.literal_eval(raw_value)
+    if not (isinstance(value, list) and all(isinstance(edge, tuple) and len(edge) == 2 for edge in value)):
+        raise ValueError("Each edge must be a tuple (from, to)")
+    return value
+
+
+def _2dlist(raw_value):
+    parsed = ast.literal_eval(raw_value)
+    if not (isinstance(parsed, list) and all(isinstance(row, list) for row in parsed)):
+        raise ValueError("Invalid 2D list format")
+    return parsed
+
+
+def _range(raw_value):
+    parts = _parts(raw_value)
+    if not 1 <= len(parts) <= 3:
+        raise ValueError("Invalid input for range. Use start, stop[, step]")
+    return range(*(int(part) for part in parts))
+
+
+parse_int = _typecast(_int)
+parse_float = _typecast(float)
+parse_str = _typecast(str)
+parse_bool = _typecast(_bool)
+# Comma-separated parts, for list and every type built from a sequence of elements.
+parse_parts = _typecast(_parts)
+parse_tuple = _typecast(lambda raw_value: tuple(_parts(raw_value)))
+parse_set = _typecast(lambda raw_value: set(_parts(raw_value)))
+parse_dict = _typecast(_dict)
+parse_directed_graph = _typecast(_directed_graph)
+parse_2dlist = _typecast(_2dlist)
+parse_range = _typecast(_range)
@@ -0,0 +1,181 @@
+import json
+import mmap
+import struct
+import threading
+import zlib
+
+import feed
+from parsing import ParseError
+
+# A recording is two append-only files. PATH holds the frames back to back: a keyframe is
+# b"K", the type name (length-prefixed) and the zlib-compressed JSON value; a delta is b"D"
+# and the JSON ops list, as sent by feed.FeedClient.delta. PATH + INDEX_SUFFIX holds one
+# fixed-width entry per frame: its offset and length in PATH and the keyframe it builds on,
+# so any frame is found without reading the frames before it.
+DATA_MAGIC = b"DVREC1\n\x00"
+INDEX_MAGIC = b"DVIDX1\n\x00"
+INDEX_SUFFIX = ".idx"
+ENTRY = struct.Struct("<QII")
+KEYFRAME, DELTA = b"K", b"D"
+# A keyframe is written instead of a delta once the deltas since the last one add up to
+# its size, or after this many frames; replaying any frame is then at most one keyframe
+# and a bounded run of deltas.
+KEYFRAME_EVERY = 4096
+COMPRESSION = 1
+
+
+def _json(value):
+    return json.dumps(value, separators=(",", ":"), default=list).encode("utf-8")
+
+
+class Recorder:
+    # Records the states one structure goes through, with the snapshot/delta calls of
+    # feed.FeedClient (minus the stream name). Ops are checked as they are recorded.
+    def __init__(self, path, keyframe_every=KEYFRAME_EVERY):
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self._data = open(path, "wb")
+        self._index = open(path + INDEX_SUFFIX, "wb")
+        self._data.write(DATA_MAGIC)
+        self._index.write(INDEX_MAGIC)
+        self.offset = len(DATA_MAGIC)
+        self.frames = 0
+        self.value_type = None
+        self.state = None
+        self._key = 0
+        self._key_bytes = 0
+        self._delta_bytes = 0
+
+    def snapshot(self, value_type, value):
+        # Round-tripped through JSON so the state matches what replay will rebuild
+        # (dict keys become strings, tuples lists).
+        if not isinstance(value, dict):
+            value = list(value)
+        self.state = feed.to_state(value_type, json.loads(_json(value)))
+        self.value_type = value_type
+        self._keyframe()
+
+    def delta(self, *ops):
+        if self.state is None:
+            raise ParseError("Record a snapshot before any delta.")
+        entries = json.loads(_json([list(op) for op in ops]))
+        for applied, entry in enumerate(entries):
+            try:
+                feed.apply_ops(self.value_type, self.state, [entry], self.path)
+            except ParseError:
+                # Keep the file in step with the state: record the ops that went through.
+                if applied:
+                    self._delta(entries[:applied])
+                raise
+        self._delta(entries)
+
+    def _delta(self, entries):
+        payload = DELTA + _json(entries)
+        self._delta_bytes += len(payload)
+        if self._delta_bytes >= self._key_bytes or self.frames - self._key >= self.keyframe_every:
+            self._keyframe()
+        else:
+            self._append(payload, self._key)
+
+    def _keyframe(self):
+        name = self.value_type.encode("utf-8")
+        value = zlib.compress(_json(feed.to_view(self.value_type, self.state)), COMPRESSION)
+        payload = KEYFRAME + bytes((len(name),)) + name + value
+        self._key = self.frames
+        self._key_bytes = len(payload)
+        self._delta_bytes = 0
+        self._append(payload, self._key)
+
+    def _append(self, payload, key):
+        self._data.write(payload)
+        self._index.write(ENTRY.pack(self.offset, len(payload), key))
+        self.offset += len(payload)
+        self.frames += 1
+
+    def close(self):
+        # Frames first, so a reader never finds an index entry past the end of the data.
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    # Random access to a recording through mmap: finding frame N reads one index entry,
+    # and rebuilding it decodes one keyframe and the deltas after it. Stepping forward
+    # from the last frame read only applies the deltas in between.
+    def __init__(self, path):
+        self.path = path
+        self._data = self._map(path, DATA_MAGIC)
+        self._index = self._map(path + INDEX_SUFFIX, INDEX_MAGIC)
+        frames = (len(self._index) - len(INDEX_MAGIC)) // ENTRY.size
+        # A recording cut short may index frames that never reached the data file.
+        while frames and sum(self._entry(frames - 1)[:2]) > len(self._data):
+            frames -= 1
+        self.frames = frames
+        # (frame, keyframe, type, state) of the last frame rebuilt. A cancelled job may
+        # still be rebuilding a frame when the next one starts.
+        self._last = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _map(path, magic):
+        with open(path, "rb") as f:
+            if f.read(len(magic)) != magic:
+                raise ParseError(f"{path} is not a recording.")
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.frames
+
+    def _entry(self, n):
+        return ENTRY.unpack_from(self._index, len(INDEX_MAGIC) + n * ENTRY.size)
+
+    def _check(self, n):
+        if not 0 <= n < self.frames:
+            raise IndexError(f"frame {n} is out of range (0 to {self.frames - 1})")
+
+    def value_type(self, n):
+        self._check(n)
+        offset = self._entry(self._entry(n)[2])[0]
+        size = self._data[offset + 1]
+        return self._data[offset + 2:offset + 2 + size].decode("utf-8")
+
+    def _keyframe(self, n):
+        offset, length, _ = self._entry(n)
+        size = self._data[offset + 1]
+        value_type = self._data[offset + 2:offset + 2 + size].decode("utf-8")
+        value = json.loads(zlib.decompress(self._data[offset + 2 + size:offset + length]))
+        return value_type, feed.to_state(value_type, value)
+
+    def _ops(self, n):
+        offset, length, _ = self._entry(n)
+        return json.loads(self._data[offset + 1:offset + length])
+
+    def frame(self, n):
+        # (type, value) at frame n, in the shape the layouts take.
+        self._check(n)
+        key = self._entry(n)[2]
+        with self._lock:
+            last = self._last
+            if last is not None and last[1] == key and last[0] <= n:
+                start, value_type, state = last[0] + 1, last[2], last[3]
+            else:
+                start = key + 1
+                value_type, state = self._keyframe(key)
+            # Forgotten until the deltas are applied, so an error cannot leave it half done.
+            self._last = None
+            for i in range(start, n + 1):
+                feed.apply_ops(value_type, state, self._ops(i), self.path)
+            self._last = (n, key, value_type, state)
+            return value_type, feed.to_view(value_type, state)
+
+    def close(self):
+        with self._lock:
+            self._last = None
+            self._data.close()
+            self._index.close()
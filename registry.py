@@ -0,0 +1,122 @@
+import importlib
+
+from parsing import ParseError
+
+# Installed packages add types by declaring entry points in this group; each one loads to
+# a TypeSpec. Keep the module it lives in light: handlers are named, not imported.
+ENTRY_POINT_GROUP = "data_visualizer.types"
+
+# Analyses a directed graph can be drawn with; "none" draws the plain graph.
+GRAPH_OVERLAYS = ("none", "scc", "topological", "cycle", "bfs", "dfs")
+
+# "module:attr" -> the object, imported on first use.
+_resolved = {}
+# name -> TypeSpec, in registration order.
+_types = {}
+_discovered = False
+# (entry point, error) for plugins that failed to load; the other types still work.
+errors = []
+
+
+def resolve(path):
+    found = _resolved.get(path)
+    if found is None:
+        module, _, attr = path.partition(":")
+        found = importlib.import_module(module)
+        for part in attr.split(".") if attr else ():
+            found = getattr(found, part)
+        _resolved[path] = found
+    return found
+
+
+class TypeSpec:
+    # One visualizable type. Handlers are "module:attr" strings (or the callables
+    # themselves), imported the first time the type is used:
+    #   parser(raw_text, type_name) -> value; the raw text itself by default
+    #   builder(value) -> value handed to the layout; None passes the value through
+    #   layout(scene, value, type_name[, overlay=...]) fills the scene
+    #   renderer(value, type_name, width) -> a view that lays out only what is on screen
+    #     (see layout.SequenceView); None draws the layout's scene as it is
+    def __init__(self, name, layout, parser="parsing:parse_str", builder=None, renderer=None,
+                 parse_kind=None, overlays=()):
+        self.name = name
+        self.layout = layout
+        self.parser = parser
+        self.builder = builder
+        self.renderer = renderer
+        # Types with the same parse kind parse any input to equal values, so they share
+        # cached parses.
+        self.parse_kind = parse_kind or name
+        self.overlays = overlays
+
+    def handler(self, role):
+        ref = getattr(self, role)
+        return resolve(ref) if isinstance(ref, str) else ref
+
+
+def register(spec):
+    _types[spec.name] = spec
+    return spec
+
+
+def _discover():
+    global _discovered
+    _discovered = True
+    # importlib.metadata is only imported when a type is missing or the full list is asked for.
+    found = resolve("importlib.metadata:entry_points")()
+    group = found.select(group=ENTRY_POINT_GROUP) if hasattr(found, "select") else found.get(ENTRY_POINT_GROUP, ())
+    for entry_point in group:
+        try:
+            spec = entry_point.load()
+        except Exception as e:
+            errors.append((entry_point.name, e))
+            continue
+        if isinstance(spec, TypeSpec):
+            _types.setdefault(spec.name, spec)
+        else:
+            errors.append((entry_point.name, TypeError(f"{entry_point.value} is not a TypeSpec")))
+
+
+def get(name):
+    spec = _types.get(name)
+    if spec is None and not _discovered:
+        _discover()
+        spec = _types.get(name)
+    if spec is None:
+        raise ParseError(f"Unknown type {name!r}.")
+    return spec
+
+
+def names(discover=True):
+    # discover=False lists only what is registered so far, without scanning installed packages.
+    if discover and not _discovered:
+        _discover()
+    return list(_types)
+
+
+def parse(raw_value, type_name):
+    spec = get(type_name)
+    return spec.handler("parser")(raw_value, type_name)
+
+
+for _spec in (
+    TypeSpec("int", "layout:layout_default", parser="parsing:parse_int"),
+    TypeSpec("float", "layout:layout_default", parser="parsing:parse_float"),
+    TypeSpec("str", "layout:layout_default"),
+    TypeSpec("list", "layout:layout_list", parser="parsing:parse_parts", renderer="layout:SequenceView", parse_kind="parts"),
+    TypeSpec("tuple", "layout:layout_tuple", parser="parsing:parse_tuple", renderer="layout:SequenceView"),
+    TypeSpec("set", "layout:layout_set", parser="parsing:parse_set"),
+    TypeSpec("dict", "layout:layout_dict", parser="parsing:parse_dict"),
+    TypeSpec("bool", "layout:layout_default", parser="parsing:parse_bool"),
+    TypeSpec("linkedlist", "layout:layout_linkedlist", parser="parsing:parse_parts", parse_kind="parts"),
+    TypeSpec("stack", "layout:layout_stack", parser="parsing:parse_parts", parse_kind="parts"),
+    TypeSpec("queue", "layout:layout_queue", parser="parsing:parse_parts", parse_kind="parts"),
+    TypeSpec("binarytree", "layout:layout_binarytree", parser="parsing:parse_parts", builder="layout:build_binarytree", parse_kind="parts"),
+    TypeSpec("2dlist", "layout:layout_2dlist", parser="parsing:parse_2dlist"),
+    TypeSpec("range", "layout:layout_range", parser="parsing:parse_range", renderer="layout:SequenceView"),
+    TypeSpec("directed_graph", "digraph:layout_directed_graph", parser="parsing:parse_directed_graph", overlays=GRAPH_OVERLAYS),
+    TypeSpec("heap", "layout:layout_heap", parser="parsing:parse_parts", builder="layout:build_heap", parse_kind="parts"),
+    TypeSpec("avl_tree", "layout:layout_avl_tree", parser="parsing:parse_parts", builder="layout:build_avl_tree", parse_kind="parts"),
+    TypeSpec("object", "objwalk:layout_object", parser="objwalk:parse_literal"),
+):
+    register(_spec)
@@ -0,0 +1,235 @@
+import math
+import time
+import tkinter as tk
+
+from scene import RECT, OVAL, TEXT, IMAGE, GROUP, KIND_NAMES, Scene, Viewport
+
+# Text smaller than this many pixels is skipped rather than drawn as an unreadable smudge.
+MIN_FONT_SIZE = 4
+# Extra screen pixels queried around the view so labels and arrow heads at the edge survive.
+CULL_MARGIN = 80
+# Once a raster cell is this many pixels wide it is drawn as exact boxes with values.
+CELL_BOX_PIXELS = 28
+
+
+class CanvasRenderer:
+    def __init__(self, canvas, width, height):
+        self.canvas = canvas
+        self.viewport = Viewport(width, height)
+        self.scene = None
+        # Retained canvas items: scene key -> (item id, screen coords, options, text)
+        self.items = {}
+        self._refresh_pending = False
+        self._scaled = (None, None, None)
+        # Rasterised image per key: (source, zoom, origin, screen rect, PhotoImage).
+        # Tk drops an image as soon as Python does, so the reference has to live here.
+        self.photos = {}
+        # Figures from the latest refresh, for the metrics overlay; on_refresh is called after each one.
+        self.last_refresh = None
+        self.on_refresh = None
+
+    def clear(self):
+        self.scene = None
+        self.items = {}
+        self.photos = {}
+        self.canvas.delete("all")
+
+    def draw(self, scene):
+        self.scene = scene
+        self.refresh()
+
+    def reset_view(self):
+        self.viewport.reset()
+        self.schedule_refresh()
+
+    def pan(self, dx, dy):
+        self.viewport.pan(dx, dy)
+        self.schedule_refresh()
+
+    def zoom_at(self, factor, sx, sy):
+        self.viewport.zoom_at(factor, sx, sy)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        # Coalesce bursts of pan/zoom events into one redraw once Tk is idle.
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def _scaled_styles(self, scene):
+        zoom = self.viewport.zoom
+        cached_scene, cached_zoom, scaled = self._scaled
+        if cached_scene is scene and cached_zoom == zoom:
+            return scaled
+        scaled = []
+        for options in scene.style_table:
+            font = options.get("font")
+            if font is not None and (zoom != 1.0 or isinstance(font[1], float)):
+                size = round(font[1] * zoom)
+                if size < MIN_FONT_SIZE:
+                    scaled.append(None)
+                    continue
+                options = dict(options, font=(font[0], size) + tuple(font[2:]))
+            scaled.append(options)
+        self._scaled = (scene, zoom, scaled)
+        return scaled
+
+    def _create(self, kind, points, options, text):
+        canvas = self.canvas
+        tag = KIND_NAMES[kind]
+        if kind == TEXT:
+            return canvas.create_text(*points, text=text, tags=tag, **options)
+        if kind == RECT:
+            return canvas.create_rectangle(*points, tags=tag, **options)
+        if kind == OVAL:
+            return canvas.create_oval(*points, tags=tag, **options)
+        if kind == IMAGE:
+            return canvas.create_image(*points, tags=tag, **options)
+        return canvas.create_line(*points, tags=tag, **options)
+
+    def _raster(self, source, key, photos):
+        # Sample the source once per visible screen pixel; the image never outgrows the canvas.
+        view = self.viewport
+        zoom, ox, oy = view.zoom, view.x, view.y
+        x0, y0, x1, y1 = source.bounds
+        px0 = max(0, math.floor((x0 - ox) * zoom))
+        py0 = max(0, math.floor((y0 - oy) * zoom))
+        px1 = min(view.width, math.ceil((x1 - ox) * zoom))
+        py1 = min(view.height, math.ceil((y1 - oy) * zoom))
+        if px0 >= px1 or py0 >= py1:
+            return None
+        rect = (px0, py0, px1, py1)
+        cached = self.photos.get(key)
+        if cached is not None and cached[:4] == (source, zoom, (ox, oy), rect):
+            photo = cached[4]
+        else:
+            xs = [ox + (px + 0.5) / zoom for px in range(px0, px1)]
+            ys = [oy + (py + 0.5) / zoom for py in range(py0, py1)]
+            photo = self.make_photo(source.ppm(xs, ys))
+        photos[key] = (source, zoom, (ox, oy), rect, photo)
+        return (px0, py0), {"image": photo, "anchor": "nw"}
+
+    def make_photo(self, ppm):
+        return tk.PhotoImage(master=self.canvas, data=ppm, format="PPM")
+
+    def refresh(self):
+        self._refresh_pending = False
+        canvas = self.canvas
+        old_items = self.items
+        items = {}
+        photos = {}
+        created = dict.fromkeys(KIND_NAMES, 0)
+        start = time.perf_counter()
+        if self.scene is not None:
+            self._sync(self.scene, None, old_items, items, photos, created)
+
+        if old_items:
+            canvas.delete(*(item[0] for item in old_items.values()))
+        self.items = items
+        self.photos = photos
+
+        total_created = sum(created.values())
+        if total_created and len(items) > total_created:
+            # New items land on top of the stack; keep edges under shapes and labels above.
+            canvas.tag_lower("line")
+            canvas.tag_lower("image")
+            canvas.tag_raise("text")
+
+        self.last_refresh = {
+            "visible": len(items),
+            "created": created,
+            "deleted": len(old_items),
+            "seconds": time.perf_counter() - start,
+        }
+        if self.on_refresh is not None:
+            self.on_refresh()
+
+    def _sync(self, scene, parent, old_items, items, photos, created):
+        canvas = self.canvas
+        view = self.viewport
+        zoom, ox, oy = view.zoom, view.x, view.y
+        coords = scene.coords
+        kinds = scene.kinds
+        styles = scene.styles
+        labels = scene.labels
+        texts = scene.texts
+        style_table = self._scaled_styles(scene)
+
+        for i in scene.query(*view.visible_rect(CULL_MARGIN)):
+            options = style_table[styles[i]]
+            if options is None:
+                continue
+            kind = kinds[i]
+            key = scene.key(i) if parent is None else (parent, scene.key(i))
+            j = 4 * i
+            text = None
+            if kind == GROUP:
+                # Level of detail: the source picks the items this view can usefully show.
+                detail = Scene(scene.width, scene.height)
+                scene.groups[labels[i]].detail_into(detail, view)
+                self._sync(detail, key, old_items, items, photos, created)
+                continue
+            if kind == IMAGE:
+                source = scene.images[labels[i]]
+                if source.cell * zoom >= CELL_BOX_PIXELS:
+                    cells = Scene(scene.width, scene.height)
+                    source.cells_into(cells, *view.visible_rect())
+                    self._sync(cells, key, old_items, items, photos, created)
+                    continue
+                raster = self._raster(source, key, photos)
+                if raster is None:
+                    continue
+                points, options = raster
+            elif kind == TEXT:
+                points = ((coords[j] - ox) * zoom, (coords[j + 1] - oy) * zoom)
+                text = texts[labels[i]]
+            else:
+                points = (
+                    (coords[j] - ox) * zoom, (coords[j + 1] - oy) * zoom,
+                    (coords[j + 2] - ox) * zoom, (coords[j + 3] - oy) * zoom,
+                )
+
+            old = old_items.pop(key, None)
+            if old is not None and old[2].keys() != options.keys():
+                # Options can only be changed in place, not removed; start over.
+                canvas.delete(old[0])
+                old = None
+            if old is None:
+                item_id = self._create(kind, points, options, text)
+                created[KIND_NAMES[kind]] += 1
+            else:
+                item_id, old_points, old_options, old_text = old
+                if old_points != points:
+                    canvas.coords(item_id, *points)
+                if old_options != options:
+                    canvas.itemconfigure(item_id, **options)
+                if old_text != text:
+                    canvas.itemconfigure(item_id, text=text)
+            items[key] = (item_id, points, options, text)
+
+    def expand_at(self, sx, sy):
+        # Opens the summary glyph under a screen point, if there is one.
+        scene = self.scene
+        if scene is None:
+            return False
+        x, y = self.viewport.to_scene(sx, sy)
+        for i in reversed(scene.query(x, y, x, y)):
+            if scene.kinds[i] == GROUP and scene.groups[scene.labels[i]].expand_at(x, y):
+                scene.refit(i)
+                self.schedule_refresh()
+                return True
+        return False
+
+    def cell_at(self, sx, sy):
+        # Raster cell under a screen point as (row, col, value), for hover read-outs.
+        scene = self.scene
+        if scene is None:
+            return None
+        x, y = self.viewport.to_scene(sx, sy)
+        for i in reversed(scene.query(x, y, x, y)):
+            if scene.kinds[i] == IMAGE:
+                source = scene.images[scene.labels[i]]
+                cell = source.cell_at(x, y)
+                if cell is not None:
+                    return cell[0], cell[1], source.value_at(*cell)
+        return None
@@ -0,0 +1,279 @@
+import sys
+from array import array
+
+import instrument
+
+RECT = 0
+OVAL = 1
+LINE = 2
+TEXT = 3
+IMAGE = 4
+# Placeholder for content generated per view (lod.TreeDetail, lod.ChainDetail); it is never
+# drawn itself.
+GROUP = 5
+
+KIND_NAMES = ("rectangle", "oval", "line", "text", "image", "group")
+
+# Side of a spatial index bucket, in scene units.
+INDEX_CELL = 256
+# Items covering more buckets than this (groups, heatmaps) are kept in one list that every
+# query checks, instead of being copied into each bucket.
+LARGE_ITEM_BUCKETS = 64
+# Rough size of one structural key (a small int, string or tuple) for memory accounting.
+KEY_BYTES = 64
+
+
+class Scene:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.center_x = width // 2
+        self.center_y = height // 2
+
+        # One entry per item; coords holds four floats per item (x0, y0, x1, y1).
+        # Text items only use the first two.
+        self.kinds = array("B")
+        self.coords = array("d")
+        self.styles = array("I")
+        self.labels = array("i")
+        # Stable structural identity per item (list index, dict key, node slot, ...),
+        # used to match items between renders. Unkeyed items fall back to their position.
+        self.keys = []
+
+        self.style_table = []
+        self.texts = []
+        # Raster sources (e.g. heatmap.Heatmap) for image items; the renderer rasterises
+        # only the visible part, so the scene never holds Tk images.
+        self.images = []
+        # Level-of-detail sources for group items; the renderer asks them for the items
+        # that suit the current view.
+        self.groups = []
+        # Structure-level figures (nodes, edges, cells) filled in by the layouts.
+        self.stats = {}
+        self._style_ids = {}
+        self._text_ids = {}
+        self._grid = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def style(self, **options):
+        key = tuple(sorted(options.items()))
+        style_id = self._style_ids.get(key)
+        if style_id is None:
+            style_id = len(self.style_table)
+            self.style_table.append(options)
+            self._style_ids[key] = style_id
+        return style_id
+
+    def _intern(self, text):
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            text_id = len(self.texts)
+            self.texts.append(text)
+            self._text_ids[text] = text_id
+        return text_id
+
+    def _add(self, kind, x0, y0, x1, y1, style, label=-1, key=None):
+        self.kinds.append(kind)
+        self.coords.extend((x0, y0, x1, y1))
+        self.styles.append(style)
+        self.labels.append(label)
+        self.keys.append(key)
+        self._grid = None
+        return len(self.kinds) - 1
+
+    def rect(self, x0, y0, x1, y1, style, key=None):
+        return self._add(RECT, x0, y0, x1, y1, style, key=key)
+
+    def oval(self, x0, y0, x1, y1, style, key=None):
+        return self._add(OVAL, x0, y0, x1, y1, style, key=key)
+
+    def line(self, x0, y0, x1, y1, style, key=None):
+        return self._add(LINE, x0, y0, x1, y1, style, key=key)
+
+    def text(self, x, y, text, style, key=None):
+        return self._add(TEXT, x, y, x, y, style, self._intern(text), key)
+
+    def image(self, x0, y0, x1, y1, source, style, key=None):
+        self.images.append(source)
+        return self._add(IMAGE, x0, y0, x1, y1, style, len(self.images) - 1, key)
+
+    def group(self, x0, y0, x1, y1, source, key=None):
+        self.groups.append(source)
+        return self._add(GROUP, x0, y0, x1, y1, self.style(), len(self.groups) - 1, key)
+
+    def refit(self, index):
+        # A group whose source grew after it was added (an opened object graph) takes its
+        # new bounds, so culling and hit tests see all of it.
+        j = 4 * index
+        self.coords[j:j + 4] = array("d", self.groups[self.labels[index]].bounds)
+        self._grid = None
+
+    def flattened(self):
+        # This scene with every group drawn in full, for consumers that want every item.
+        if GROUP not in self.kinds:
+            return self
+        flat = Scene(self.width, self.height)
+        flat.stats = dict(self.stats)
+        for i in range(len(self.kinds)):
+            kind, (x0, y0, x1, y1), options, label = self.item(i)
+            key = self.keys[i]
+            if kind == GROUP:
+                label.full_into(flat)
+            elif kind == TEXT:
+                flat.text(x0, y0, label, flat.style(**options), key)
+            elif kind == IMAGE:
+                flat.image(x0, y0, x1, y1, label, flat.style(**options), key)
+            else:
+                flat._add(kind, x0, y0, x1, y1, flat.style(**options), key=key)
+        return flat
+
+    def key(self, index):
+        key = self.keys[index]
+        # Kind is part of the identity, so a node's oval and its label can share a key.
+        return (self.kinds[index], key if key is not None else ("#", index))
+
+    def item(self, index):
+        j = 4 * index
+        kind = self.kinds[index]
+        label = self.labels[index]
+        if label < 0:
+            label = None
+        elif kind == IMAGE:
+            label = self.images[label]
+        elif kind == GROUP:
+            label = self.groups[label]
+        else:
+            label = self.texts[label]
+        return kind, tuple(self.coords[j:j + 4]), self.style_table[self.styles[index]], label
+
+    def counts(self):
+        counts = dict.fromkeys(KIND_NAMES, 0)
+        for kind in self.kinds:
+            counts[KIND_NAMES[kind]] += 1
+        return counts
+
+    def nbytes(self):
+        # Approximate footprint for the layout cache: the arrays exactly, keys by estimate,
+        # plus room for the spatial index that the first draw builds.
+        n = len(self.kinds)
+        size = sum(len(a) * a.itemsize for a in (self.kinds, self.coords, self.styles, self.labels))
+        size += sys.getsizeof(self.keys) + n * KEY_BYTES + n * 4
+        size += sum(sys.getsizeof(text) for text in self.texts)
+        size += sum(image.nbytes() for image in self.images)
+        size += sum(group.nbytes() for group in self.groups)
+        return size
+
+    def bbox(self, index):
+        j = 4 * index
+        x0, y0, x1, y1 = self.coords[j], self.coords[j + 1], self.coords[j + 2], self.coords[j + 3]
+        return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+    def bounds(self):
+        if not self.kinds:
+            return 0, 0, self.width, self.height
+        coords = self.coords
+        xs = coords[0::2]
+        ys = coords[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _build_index(self):
+        grid = {}
+        large = array("i")
+        coords = self.coords
+        for i in range(len(self.kinds)):
+            j = 4 * i
+            gx0 = int(coords[j] // INDEX_CELL)
+            gy0 = int(coords[j + 1] // INDEX_CELL)
+            gx1 = int(coords[j + 2] // INDEX_CELL)
+            gy1 = int(coords[j + 3] // INDEX_CELL)
+            if gx0 == gx1 and gy0 == gy1:
+                # Most items sit inside a single bucket.
+                bucket = grid.get((gx0, gy0))
+                if bucket is None:
+                    grid[(gx0, gy0)] = bucket = array("i")
+                bucket.append(i)
+                continue
+            if gx0 > gx1:
+                gx0, gx1 = gx1, gx0
+            if gy0 > gy1:
+                gy0, gy1 = gy1, gy0
+            if (gx1 - gx0 + 1) * (gy1 - gy0 + 1) > LARGE_ITEM_BUCKETS:
+                large.append(i)
+                continue
+            for gx in range(gx0, gx1 + 1):
+                for gy in range(gy0, gy1 + 1):
+                    bucket = grid.get((gx, gy))
+                    if bucket is None:
+                        grid[(gx, gy)] = bucket = array("i")
+                    bucket.append(i)
+        self._grid = grid
+        self._large = large
+
+    def query(self, x0, y0, x1, y1):
+        if self._grid is None:
+            with instrument.phase("index"):
+                self._build_index()
+        grid = self._grid
+        gx0, gy0 = int(x0 // INDEX_CELL), int(y0 // INDEX_CELL)
+        gx1, gy1 = int(x1 // INDEX_CELL), int(y1 // INDEX_CELL)
+        hits = set(self._large)
+        if (gx1 - gx0 + 1) * (gy1 - gy0 + 1) > len(grid):
+            # Zoomed far out: scanning the occupied buckets is cheaper than the empty cells.
+            for (gx, gy), bucket in grid.items():
+                if gx0 <= gx <= gx1 and gy0 <= gy <= gy1:
+                    hits.update(bucket)
+        else:
+            for gx in range(gx0, gx1 + 1):
+                for gy in range(gy0, gy1 + 1):
+                    bucket = grid.get((gx, gy))
+                    if bucket is not None:
+                        hits.update(bucket)
+        visible = []
+        for i in hits:
+            bx0, by0, bx1, by1 = self.bbox(i)
+            if bx1 >= x0 and bx0 <= x1 and by1 >= y0 and by0 <= y1:
+                visible.append(i)
+        # Keep scene order so later items still paint on top.
+        visible.sort()
+        return visible
+
+
+class Viewport:
+    MIN_ZOOM = 0.02
+    # Deep zoom is what lets a one-pixel heatmap cell grow into a readable box.
+    MAX_ZOOM = 64.0
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.reset()
+
+    def reset(self):
+        self.zoom = 1.0
+        self.x = 0.0
+        self.y = 0.0
+
+    def to_screen(self, x, y):
+        return (x - self.x) * self.zoom, (y - self.y) * self.zoom
+
+    def to_scene(self, sx, sy):
+        return self.x + sx / self.zoom, self.y + sy / self.zoom
+
+    def visible_rect(self, margin=0):
+        x0, y0 = self.to_scene(-margin, -margin)
+        x1, y1 = self.to_scene(self.width + margin, self.height + margin)
+        return x0, y0, x1, y1
+
+    def pan(self, dx, dy):
+        self.x -= dx / self.zoom
+        self.y -= dy / self.zoom
+
+    def zoom_at(self, factor, sx, sy):
+        zoom = min(self.MAX_ZOOM, max(self.MIN_ZOOM, self.zoom * factor))
+        # Keep the scene point under the cursor fixed on screen.
+        px, py = self.to_scene(sx, sy)
+        self.zoom = zoom
+        self.x = px - sx / zoom
+        self.y = py - sy / zoom
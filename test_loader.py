@@ -0,0 +1,43 @@
+import io
+import json
+
+import pytest
+
+import loader
+from parsing import ParseError
+
+
+def _load_stdin(monkeypatch, text, type_hint="list"):
+    monkeypatch.setattr("sys.stdin", io.StringIO(text))
+    return loader.load("-", type_hint)
+
+
+def test_stdin_json_is_streamed_not_read_whole(monkeypatch):
+    monkeypatch.setattr(loader, "CHUNK_SIZE", 64)
+    largest = [0]
+    fill = loader._Source.fill
+
+    def watched(source, size=0):
+        read = fill(source, size)
+        largest[0] = max(largest[0], len(source.buffer))
+        return read
+
+    monkeypatch.setattr(loader._Source, "fill", watched)
+    values = list(range(5000))
+    text = json.dumps(values)
+    assert _load_stdin(monkeypatch, text + "\n") == values
+    # A few chunks at most, never the whole single-line document.
+    assert largest[0] < 8 * 64 < len(text)
+
+
+def test_stdin_single_document_with_trailing_newlines(monkeypatch):
+    assert _load_stdin(monkeypatch, "[1,2,3]\n\n  \n") == [1, 2, 3]
+
+
+def test_stdin_json_lines(monkeypatch):
+    assert _load_stdin(monkeypatch, "[1]\n[2]\n") == [[1], [2]]
+
+
+def test_trailing_data_is_rejected(monkeypatch):
+    with pytest.raises(ParseError):
+        _load_stdin(monkeypatch, "[1,2]]")
@@ -0,0 +1,119 @@
+from array import array
+
+from tree import NIL
+
+
+def tidy_tree(left, right, root, min_sep):
+    # Reingold–Tilford tidy drawing of a binary tree given as parallel child arrays.
+    # Returns per-slot x positions (root at 0) and depths; unreachable slots stay 0.
+    n = len(left)
+    xs = array("d", bytes(8 * n))
+    depths = array("i", bytes(4 * n))
+    if root == NIL:
+        return xs, depths
+
+    # Working copies of the links: leaves get threaded to the next contour node below them.
+    link_left = array("i", left)
+    link_right = array("i", right)
+    offset = array("l", bytes(8 * n))
+
+    # Extreme descendants of each subtree: deepest leftmost/rightmost node, its level
+    # and its x offset relative to the subtree root.
+    lm_node = array("i", bytes(4 * n))
+    lm_lev = array("i", bytes(4 * n))
+    lm_off = array("l", bytes(8 * n))
+    rm_node = array("i", bytes(4 * n))
+    rm_lev = array("i", bytes(4 * n))
+    rm_off = array("l", bytes(8 * n))
+
+    # Iterative post-order: every subtree is finished before its parent.
+    stack = [(root, 0, False)]
+    while stack:
+        t, level, expanded = stack.pop()
+        if not expanded:
+            depths[t] = level
+            stack.append((t, level, True))
+            if right[t] != NIL:
+                stack.append((right[t], level + 1, False))
+            if left[t] != NIL:
+                stack.append((left[t], level + 1, False))
+            continue
+
+        tl, tr = left[t], right[t]
+        if tl == NIL and tr == NIL:
+            lm_node[t] = rm_node[t] = t
+            lm_lev[t] = rm_lev[t] = level
+            lm_off[t] = rm_off[t] = 0
+            offset[t] = 0
+            continue
+
+        # Walk the right contour of the left subtree against the left contour of the right one.
+        L, R = tl, tr
+        cursep = rootsep = min_sep
+        loffsum = roffsum = 0
+        while L != NIL and R != NIL:
+            if cursep < min_sep:
+                rootsep += min_sep - cursep
+                cursep = min_sep
+            if link_right[L] != NIL:
+                loffsum += offset[L]
+                cursep -= offset[L]
+                L = link_right[L]
+            else:
+                loffsum -= offset[L]
+                cursep += offset[L]
+                L = link_left[L]
+            if link_left[R] != NIL:
+                roffsum -= offset[R]
+                cursep -= offset[R]
+                R = link_left[R]
+            else:
+                roffsum += offset[R]
+                cursep += offset[R]
+                R = link_right[R]
+
+        # Children sit symmetrically at -offset and +offset from their parent.
+        half = (rootsep + 1) // 2
+        offset[t] = half
+        loffsum -= half
+        roffsum += half
+
+        if tl == NIL or (tr != NIL and lm_lev[tr] > lm_lev[tl]):
+            lm_node[t], lm_lev[t], lm_off[t] = lm_node[tr], lm_lev[tr], lm_off[tr] + half
+        else:
+            lm_node[t], lm_lev[t], lm_off[t] = lm_node[tl], lm_lev[tl], lm_off[tl] - half
+        if tr == NIL or (tl != NIL and rm_lev[tl] > rm_lev[tr]):
+            rm_node[t], rm_lev[t], rm_off[t] = rm_node[tl], rm_lev[tl], rm_off[tl] - half
+        else:
+            rm_node[t], rm_lev[t], rm_off[t] = rm_node[tr], rm_lev[tr], rm_off[tr] + half
+
+        # The shorter subtree's extreme leaf continues the contour into the taller one.
+        if L != NIL and tr != NIL:
+            leaf = rm_node[tr]
+            leaf_x = rm_off[tr] + half
+            offset[leaf] = abs(loffsum - leaf_x)
+            if loffsum > leaf_x:
+                link_right[leaf] = L
+            else:
+                link_left[leaf] = L
+        elif R != NIL and tl != NIL:
+            leaf = lm_node[tl]
+            leaf_x = lm_off[tl] - half
+            offset[leaf] = abs(roffsum - leaf_x)
+            if roffsum > leaf_x:
+                link_right[leaf] = R
+            else:
+                link_left[leaf] = R
+
+    # Turn relative offsets into absolute positions along the real (unthreaded) links.
+    stack = [root]
+    while stack:
+        t = stack.pop()
+        if left[t] != NIL:
+            xs[left[t]] = xs[t] - offset[t]
+            stack.append(left[t])
+        if right[t] != NIL:
+            xs[right[t]] = xs[t] + offset[t]
+            stack.append(right[t])
+
+    return xs, depths
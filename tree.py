@@ -1,102 +1,344 @@
-class TreeNode:
-    def __init__(self, val):
-        self.val = val
-        self.left = None
-        self.right = None
+from array import array
+from collections import deque
 
-def build_binary_tree(values):
+# Sorted inputs at least this long are bulk-loaded instead of inserted one by one, into
+# the same tree the insertions would build.
+BULK_LOAD_THRESHOLD = 1024
+
+NIL = -1
+
+
+class TreeStore:
+    def __init__(self):
+        # Parallel arrays indexed by node slot; values live once in an interned table.
+        self.value_ids = array("i")
+        self.left = array("i")
+        self.right = array("i")
+        self.height = array("i")
+        self.values = []
+        self._value_index = {}
+        self.root = NIL
+
+    def __len__(self):
+        return len(self.value_ids)
+
+    def add(self, val):
+        value_id = self._value_index.get(val)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(val)
+            self._value_index[val] = value_id
+        self.value_ids.append(value_id)
+        self.left.append(NIL)
+        self.right.append(NIL)
+        self.height.append(1)
+        return len(self.value_ids) - 1
+
+    def copy(self):
+        store = TreeStore()
+        store.value_ids = array("i", self.value_ids)
+        store.left = array("i", self.left)
+        store.right = array("i", self.right)
+        store.height = array("i", self.height)
+        store.values = list(self.values)
+        store._value_index = dict(self._value_index)
+        store.root = self.root
+        return store
+
+    def val(self, node):
+        return self.values[self.value_ids[node]]
+
+    def view(self, node=None):
+        if node is None:
+            node = self.root
+        return NodeView(self, node) if node != NIL else None
+
+    def preorder(self, start=None):
+        if start is None:
+            start = self.root
+        if start == NIL:
+            return
+        left, right = self.left, self.right
+        stack = [(start, NIL, 0)]
+        while stack:
+            node, parent, depth = stack.pop()
+            yield node, parent, depth
+            if right[node] != NIL:
+                stack.append((right[node], node, depth + 1))
+            if left[node] != NIL:
+                stack.append((left[node], node, depth + 1))
+
+    def level_order(self, start=None):
+        if start is None:
+            start = self.root
+        if start == NIL:
+            return
+        left, right = self.left, self.right
+        queue = deque([(start, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            yield node, depth
+            if left[node] != NIL:
+                queue.append((left[node], depth + 1))
+            if right[node] != NIL:
+                queue.append((right[node], depth + 1))
+
+    def update_heights(self, order):
+        left, right, height = self.left, self.right, self.height
+        # `order` must list every node after its parent; heights are filled bottom-up.
+        for node in reversed(order):
+            lh = height[left[node]] if left[node] != NIL else 0
+            rh = height[right[node]] if right[node] != NIL else 0
+            height[node] = 1 + (lh if lh > rh else rh)
+
+
+class NodeView:
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def val(self):
+        return self.store.val(self.index)
+
+    @property
+    def left(self):
+        return self.store.view(self.store.left[self.index])
+
+    @property
+    def right(self):
+        return self.store.view(self.store.right[self.index])
+
+    @property
+    def height(self):
+        return self.store.height[self.index]
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and self.store is other.store and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+
+def build_binary_tree_store(values):
+    store = TreeStore()
     if not values or values[0] is None:
-        return None
+        return store
 
-    root = TreeNode(values[0])
-    queue = [root]
+    store.root = store.add(values[0])
+    left, right = store.left, store.right
+    # Slots are handed out in level order, so the BFS queue is just a cursor over them.
+    current = 0
     i = 1
 
-    while queue and i < len(values):
-        current = queue.pop(0)
-        if current:
-            if i < len(values):
-                left_val = values[i]
-                current.left = TreeNode(left_val) if left_val is not None else None
-                queue.append(current.left)
-                i += 1
-            if i < len(values):
-                right_val = values[i]
-                current.right = TreeNode(right_val) if right_val is not None else None
-                queue.append(current.right)
-                i += 1
-
-    return root
-
-class AVLNode:
-    def __init__(self, val):
-        self.val = val
-        self.left = None
-        self.right = None
-        self.height = 1
+    while current < len(store) and i < len(values):
+        if i < len(values):
+            if values[i] is not None:
+                left[current] = store.add(values[i])
+            i += 1
+        if i < len(values):
+            if values[i] is not None:
+                right[current] = store.add(values[i])
+            i += 1
+        current += 1
 
-def build_avl_tree(values):
-    def insert(root, key):
-        if not root:
-            return AVLNode(key)
-        elif key < root.val:
-            root.left = insert(root.left, key)
-        else:
-            root.right = insert(root.right, key)
+    store.update_heights(range(len(store)))
+    return store
 
-        root.height = 1 + max(get_height(root.left), get_height(root.right))
 
-        balance = get_balance(root)
+def build_binary_tree(values):
+    return build_binary_tree_store(values).view()
 
-        # Left Heavy
-        if balance > 1 and key < root.left.val:
-            return right_rotate(root)
-        # Right Heavy
-        if balance < -1 and key > root.right.val:
-            return left_rotate(root)
+
+def _height(store, node):
+    return store.height[node] if node != NIL else 0
+
+
+def _update_height(store, node):
+    lh = _height(store, store.left[node])
+    rh = _height(store, store.right[node])
+    store.height[node] = 1 + (lh if lh > rh else rh)
+
+
+def _balance(store, node):
+    if node == NIL:
+        return 0
+    return _height(store, store.left[node]) - _height(store, store.right[node])
+
+
+def _left_rotate(store, z):
+    y = store.right[z]
+    store.right[z] = store.left[y]
+    store.left[y] = z
+    _update_height(store, z)
+    _update_height(store, y)
+    return y
+
+
+def _right_rotate(store, z):
+    y = store.left[z]
+    store.left[z] = store.right[y]
+    store.right[y] = z
+    _update_height(store, z)
+    _update_height(store, y)
+    return y
+
+
+def _rebalance(store, node):
+    balance = _balance(store, node)
+
+    # The heavy child's own balance picks the case, which stays correct with duplicate keys.
+    if balance > 1:
         # Left-Right
-        if balance > 1 and key > root.left.val:
-            root.left = left_rotate(root.left)
-            return right_rotate(root)
+        if _balance(store, store.left[node]) < 0:
+            store.left[node] = _left_rotate(store, store.left[node])
+        # Left Heavy
+        return _right_rotate(store, node)
+    if balance < -1:
         # Right-Left
-        if balance < -1 and key < root.right.val:
-            root.right = right_rotate(root.right)
-            return left_rotate(root)
+        if _balance(store, store.right[node]) > 0:
+            store.right[node] = _right_rotate(store, store.right[node])
+        # Right Heavy
+        return _left_rotate(store, node)
+
+    return node
+
+
+def avl_insert(store, key, events=None):
+    # events, if given, is called as events(kind, *slots) whenever the tree is consistent
+    # again: ("insert", new) once the node is linked, ("rotate", old_top, new_top) per rotation.
+    new = store.add(key)
+    if store.root == NIL:
+        store.root = new
+        if events is not None:
+            events("insert", new)
+        return new
 
-        return root
+    left, right = store.left, store.right
+    values, value_ids = store.values, store.value_ids
+    path = []
+    node = store.root
+    while node != NIL:
+        path.append(node)
+        node = left[node] if key < values[value_ids[node]] else right[node]
 
-    def get_height(node):
-        return node.height if node else 0
+    parent = path[-1]
+    if key < values[value_ids[parent]]:
+        left[parent] = new
+    else:
+        right[parent] = new
+    if events is not None:
+        events("insert", new)
 
-    def get_balance(node):
-        return get_height(node.left) - get_height(node.right) if node else 0
+    # Walk back up, fixing heights and re-linking any rotated subtree into its parent.
+    for i in range(len(path) - 1, -1, -1):
+        node = path[i]
+        _update_height(store, node)
+        subtree = _rebalance(store, node)
+        if subtree != node:
+            if i == 0:
+                store.root = subtree
+            elif left[path[i - 1]] == node:
+                left[path[i - 1]] = subtree
+            else:
+                right[path[i - 1]] = subtree
+            if events is not None:
+                events("rotate", node, subtree)
 
-    def left_rotate(z):
-        y = z.right
-        T2 = y.left
+    return new
 
-        y.left = z
-        z.right = T2
 
-        z.height = 1 + max(get_height(z.left), get_height(z.right))
-        y.height = 1 + max(get_height(y.left), get_height(y.right))
+def build_avl_tree_sorted_store(values):
+    store = TreeStore()
+    if not values:
+        return store
 
-        return y
+    # Each frame is (lo, hi, parent, is_left).
+    stack = [(0, len(values) - 1, NIL, False)]
+    while stack:
+        lo, hi, parent, is_left = stack.pop()
+        # Inserting n sorted keys one by one leaves a perfect left subtree of 2**k - 1
+        # nodes under the root, for the largest k with 3 * 2**(k - 1) <= n. Splitting there
+        # rather than at the middle builds that same tree, so bulk-loaded trees look just
+        # like the insertions the build animation shows.
+        mid = lo + (1 << ((hi - lo + 1) // 3).bit_length()) - 1
+        node = store.add(values[mid])
+        if parent == NIL:
+            store.root = node
+        elif is_left:
+            store.left[parent] = node
+        else:
+            store.right[parent] = node
+        if mid + 1 <= hi:
+            stack.append((mid + 1, hi, node, False))
+        if lo <= mid - 1:
+            stack.append((lo, mid - 1, node, True))
+
+    # Slots are handed out in pre-order, so every child comes after its parent.
+    store.update_heights(range(len(store)))
+    return store
 
-    def right_rotate(z):
-        y = z.left
-        T3 = y.right
 
-        y.right = z
-        z.left = T3
+def _is_sorted(values):
+    return all(values[i] <= values[i + 1] for i in range(len(values) - 1))
 
-        z.height = 1 + max(get_height(z.left), get_height(z.right))
-        y.height = 1 + max(get_height(y.left), get_height(y.right))
 
-        return y
+def build_avl_tree_store(values, events=None):
+    values = [val for val in values if val is not None]
+    # Bulk loading has no insertions to report, so watched builds always insert.
+    if events is None and len(values) >= BULK_LOAD_THRESHOLD and _is_sorted(values):
+        return build_avl_tree_sorted_store(values)
 
-    root = None
+    store = TreeStore()
     for val in values:
-        if val is not None:
-            root = insert(root, val)
-    return root
\ No newline at end of file
+        avl_insert(store, val, events)
+    return store
+
+
+def build_avl_tree(values):
+    return build_avl_tree_store(values).view()
+
+
+def build_avl_tree_sorted(values):
+    return build_avl_tree_sorted_store(values).view()
+
+
+def heap_push(heap, keys, item, events=None):
+    # Min-heap of item ids ordered by keys[item], as a level-order list. Items sift up by
+    # swapping; events gets ("insert", item) and then ("swap", risen, sunk) for each swap.
+    heap.append(item)
+    if events is not None:
+        events("insert", item)
+    i = len(heap) - 1
+    while i > 0:
+        parent = (i - 1) // 2
+        if not keys[heap[i]] < keys[heap[parent]]:
+            break
+        heap[i], heap[parent] = heap[parent], heap[i]
+        if events is not None:
+            events("swap", heap[parent], heap[i])
+        i = parent
+    return i
+
+
+def build_heap(keys, events=None):
+    heap = []
+    for item in range(len(keys)):
+        heap_push(heap, keys, item, events)
+    return heap
+
+
+def preorder(root):
+    if not root:
+        return
+    for node, parent, depth in root.store.preorder(root.index):
+        yield root.store.view(node), root.store.view(parent) if parent != NIL else None, depth
+
+
+def level_order(root):
+    if not root:
+        return
+    for node, depth in root.store.level_order(root.index):
+        yield root.store.view(node), depth